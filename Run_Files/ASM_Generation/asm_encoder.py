@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+CV32E40P Machine Code Encoder
+
+Encodes the assembly written by generate_asm.py into a memory image, without
+an external assembler and objcopy. Covers RV32IM, the pseudo-instructions the
+generator uses (nop, j, subi) and the CV32E40P general ALU (cv.abs, cv.sle,
+cv.min, cv.clip, ...) and bit manipulation (cv.extractr, cv.ror, cv.cnt, ...)
+extensions. Compressed instructions are not generated and not encoded.
+
+Labels are resolved in two passes. Like the GNU assembler, a conditional
+branch whose target is beyond +-4KiB is relaxed into the inverted branch over
+a jal. A jump beyond the +-1MiB of jal becomes auipc+jalr, as call and tail
+expand: jal rd goes through rd itself, j and far branches through t1.
+
+Images are written in the `objcopy -O verilog` format loaded by the example
+testbench with +firmware=<file>.hex, or as a raw little-endian binary.
+"""
+
+import argparse
+import bisect
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+ABI_NAMES = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1', 'a0', 'a1', 'a2', 'a3', 'a4', 'a5',
+             'a6', 'a7', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6']
+REGISTERS = {**{f"x{i}": i for i in range(32)}, **{name: i for i, name in enumerate(ABI_NAMES)}, 'fp': 8}
+
+# mnemonic: (funct7, funct3, opcode)
+R_TYPE = {
+    'add': (0x00, 0x0, 0x33), 'sub': (0x20, 0x0, 0x33), 'sll': (0x00, 0x1, 0x33), 'slt': (0x00, 0x2, 0x33),
+    'sltu': (0x00, 0x3, 0x33), 'xor': (0x00, 0x4, 0x33), 'srl': (0x00, 0x5, 0x33), 'sra': (0x20, 0x5, 0x33),
+    'or': (0x00, 0x6, 0x33), 'and': (0x00, 0x7, 0x33),
+    # M extension
+    'mul': (0x01, 0x0, 0x33), 'mulh': (0x01, 0x1, 0x33), 'mulhsu': (0x01, 0x2, 0x33), 'mulhu': (0x01, 0x3, 0x33),
+    'div': (0x01, 0x4, 0x33), 'divu': (0x01, 0x5, 0x33), 'rem': (0x01, 0x6, 0x33), 'remu': (0x01, 0x7, 0x33),
+    # CV32E40P bit manipulation, register variants (custom-1 opcode)
+    'cv.extractr': (0x18, 0x3, 0x2B), 'cv.extractur': (0x19, 0x3, 0x2B), 'cv.insertr': (0x1A, 0x3, 0x2B),
+    'cv.bclrr': (0x1C, 0x3, 0x2B), 'cv.bsetr': (0x1D, 0x3, 0x2B), 'cv.ror': (0x20, 0x3, 0x2B),
+    # CV32E40P general ALU
+    'cv.sle': (0x29, 0x3, 0x2B), 'cv.sleu': (0x2A, 0x3, 0x2B), 'cv.min': (0x2B, 0x3, 0x2B),
+    'cv.minu': (0x2C, 0x3, 0x2B), 'cv.max': (0x2D, 0x3, 0x2B), 'cv.maxu': (0x2E, 0x3, 0x2B),
+    'cv.clipr': (0x3A, 0x3, 0x2B), 'cv.clipur': (0x3B, 0x3, 0x2B),
+}
+# Single source register, rs2 field is zero
+R1_TYPE = {
+    'cv.ff1': (0x21, 0x3, 0x2B), 'cv.fl1': (0x22, 0x3, 0x2B), 'cv.clb': (0x23, 0x3, 0x2B),
+    'cv.cnt': (0x24, 0x3, 0x2B), 'cv.abs': (0x28, 0x3, 0x2B),
+}
+# 5-bit unsigned immediate in the rs2 field: mnemonic: (funct7, funct3, opcode)
+IMM5_TYPE = {'cv.clip': (0x38, 0x3, 0x2B), 'cv.clipu': (0x39, 0x3, 0x2B)}
+# mnemonic: funct3
+I_ALU = {'addi': 0x0, 'slti': 0x2, 'sltiu': 0x3, 'xori': 0x4, 'ori': 0x6, 'andi': 0x7}
+SHIFT_IMM = {'slli': (0x00, 0x1), 'srli': (0x00, 0x5), 'srai': (0x20, 0x5)}
+LOADS = {'lb': 0x0, 'lh': 0x1, 'lw': 0x2, 'lbu': 0x4, 'lhu': 0x5}
+STORES = {'sb': 0x0, 'sh': 0x1, 'sw': 0x2}
+BRANCHES = {'beq': 0x0, 'bne': 0x1, 'blt': 0x4, 'bge': 0x5, 'bltu': 0x6, 'bgeu': 0x7}
+
+NOP = 0x00000013
+OPCODE_JAL = 0x6F
+OPCODE_JALR = 0x67
+OPCODE_AUIPC = 0x17
+T1 = 6  # Scratch register of far jumps without a link register, as for tail
+
+
+class EncodingError(ValueError):
+    """An assembly line that cannot be encoded"""
+
+
+def check_range(value: int, low: int, high: int, what: str) -> int:
+    if not low <= value <= high:
+        raise EncodingError(f"{what} {value} out of range [{low}, {high}]")
+    return value
+
+
+def r_type(funct7: int, rs2: int, rs1: int, funct3: int, rd: int, opcode: int) -> int:
+    return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def i_type(imm: int, rs1: int, funct3: int, rd: int, opcode: int) -> int:
+    check_range(imm, -2048, 2047, "12-bit immediate")
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def s_type(imm: int, rs2: int, rs1: int, funct3: int) -> int:
+    check_range(imm, -2048, 2047, "store offset")
+    imm &= 0xFFF
+    return ((imm >> 5) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | ((imm & 0x1F) << 7) | 0x23
+
+
+def b_type(offset: int, rs2: int, rs1: int, funct3: int) -> int:
+    offset &= 0x1FFF
+    return (((offset >> 12) & 1) << 31) | (((offset >> 5) & 0x3F) << 25) | (rs2 << 20) | (rs1 << 15) | \
+        (funct3 << 12) | (((offset >> 1) & 0xF) << 8) | (((offset >> 11) & 1) << 7) | 0x63
+
+
+def j_type(offset: int, rd: int) -> int:
+    offset &= 0x1FFFFF
+    return (((offset >> 20) & 1) << 31) | (((offset >> 1) & 0x3FF) << 21) | (((offset >> 11) & 1) << 20) | \
+        (((offset >> 12) & 0xFF) << 12) | (rd << 7) | OPCODE_JAL
+
+
+def far_jump(offset: int, link: int, scratch: int) -> Tuple[int, int]:
+    """auipc+jalr reaching pc+offset: the upper 20 bits rounded for the signed lower 12"""
+    upper = (offset + 0x800) >> 12
+    lower = offset - (upper << 12)
+    return ((upper & 0xFFFFF) << 12) | (scratch << 7) | OPCODE_AUIPC, i_type(lower, scratch, 0x0, link, OPCODE_JALR)
+
+
+def branch_in_range(offset: int) -> bool:
+    return -4096 <= offset <= 4094
+
+
+def jal_in_range(offset: int) -> bool:
+    return -(1 << 20) <= offset < (1 << 20)
+
+
+class AssemblyEncoder:
+    """Two-pass encoder from generate_asm.py assembly to a memory image
+
+    Pass one (add_line) encodes every instruction that does not name a label
+    straight into a word array and records the others as fixups. Pass two
+    (link) lays out the sections, relaxes out-of-range branches and patches
+    the fixups. Only the words and the fixups are held, about 4 bytes per
+    instruction.
+    """
+
+    def __init__(self, base_address: int = 0x180):
+        self.base_address = base_address
+        self.sections = {'.text': array('I'), '.data': array('I')}
+        self.section = '.text'
+        self.labels: Dict[str, Tuple[str, int]] = {}
+        self.fixups: List[Tuple[int, str, int, int, str, int]] = []  # (index, kind, rs1/rd, rs2, label, line)
+        self.line_number = 0
+        self.image = None
+
+    def register(self, name: str) -> int:
+        if name not in REGISTERS:
+            raise EncodingError(f"unknown register '{name}'")
+        return REGISTERS[name]
+
+    def immediate(self, text: str) -> int:
+        try:
+            return int(text, 0)
+        except ValueError:
+            raise EncodingError(f"bad immediate '{text}'") from None
+
+    def memory_operands(self, operands: List[str]) -> Tuple[int, int]:
+        """Offset and base register of 'off(rs1)', or of 'off, rs1' as older generators wrote it"""
+        if len(operands) == 1 and operands[0].endswith(')') and '(' in operands[0]:
+            offset, base = operands[0][:-1].split('(', 1)
+            return self.immediate(offset or '0'), self.register(base.strip())
+        if len(operands) == 2:
+            return self.immediate(operands[0]), self.register(operands[1])
+        raise EncodingError(f"bad memory operand '{', '.join(operands)}'")
+
+    def emit(self, word: int):
+        self.sections[self.section].append(word)
+
+    def add_lines(self, lines: Iterable[str]):
+        for line in lines:
+            self.add_line(line)
+
+    def tee(self, lines: Iterable[str]) -> Iterator[str]:
+        """Pass lines through, encoding each on the way"""
+        for line in lines:
+            self.add_line(line)
+            yield line
+
+    def add_line(self, line: str):
+        """Pass one over one line of assembly"""
+        self.line_number += 1
+        code = line.split('#', 1)[0].strip()
+        if not code:
+            return
+        try:
+            while ':' in code.split(None, 1)[0]:
+                label, _, code = code.partition(':')
+                self.define(label.strip())
+                code = code.strip()
+                if not code:
+                    return
+            if code.startswith('.'):
+                self.directive(code)
+            else:
+                self.instruction(code)
+        except EncodingError as e:
+            raise EncodingError(f"line {self.line_number}: {e}: {line.strip()}") from None
+
+    def define(self, label: str):
+        if label in self.labels:
+            raise EncodingError(f"label '{label}' defined twice")
+        self.labels[label] = (self.section, len(self.sections[self.section]))
+
+    def directive(self, code: str):
+        name, _, args = code.partition(' ')
+        args = args.strip()
+        if name == '.section':
+            name = args.split(',')[0].strip()
+        if name in ('.text', '.data'):
+            self.section = name
+        elif name == '.word':
+            for value in args.split(','):
+                self.emit(self.immediate(value.strip()) & 0xFFFFFFFF)
+        elif name not in ('.global', '.globl', '.type', '.size', '.option'):
+            raise EncodingError(f"unsupported directive '{name}'")
+
+    def instruction(self, code: str):
+        mnemonic, _, rest = code.partition(' ')
+        ops = [op.strip() for op in rest.split(',')] if rest.strip() else []
+
+        if mnemonic == 'nop':
+            self.emit(NOP)
+        elif mnemonic == 'j':
+            self.fixup('J', 0, 0, ops[0])
+        elif mnemonic == 'subi':
+            # Pseudo-instruction: addi with the negated immediate
+            self.emit(i_type(-self.immediate(ops[2]), self.register(ops[1]), 0x0, self.register(ops[0]), 0x13))
+        elif mnemonic in R_TYPE:
+            funct7, funct3, opcode = R_TYPE[mnemonic]
+            self.emit(r_type(funct7, self.register(ops[2]), self.register(ops[1]), funct3, self.register(ops[0]), opcode))
+        elif mnemonic in R1_TYPE:
+            funct7, funct3, opcode = R1_TYPE[mnemonic]
+            self.emit(r_type(funct7, 0, self.register(ops[1]), funct3, self.register(ops[0]), opcode))
+        elif mnemonic in IMM5_TYPE:
+            funct7, funct3, opcode = IMM5_TYPE[mnemonic]
+            imm = check_range(self.immediate(ops[2]), 0, 31, "clip bound")
+            self.emit(r_type(funct7, imm, self.register(ops[1]), funct3, self.register(ops[0]), opcode))
+        elif mnemonic in I_ALU:
+            self.emit(i_type(self.immediate(ops[2]), self.register(ops[1]), I_ALU[mnemonic], self.register(ops[0]), 0x13))
+        elif mnemonic in SHIFT_IMM:
+            funct7, funct3 = SHIFT_IMM[mnemonic]
+            shamt = check_range(self.immediate(ops[2]), 0, 31, "shift amount")
+            self.emit(r_type(funct7, shamt, self.register(ops[1]), funct3, self.register(ops[0]), 0x13))
+        elif mnemonic in LOADS:
+            offset, base = self.memory_operands(ops[1:])
+            self.emit(i_type(offset, base, LOADS[mnemonic], self.register(ops[0]), 0x03))
+        elif mnemonic in STORES:
+            offset, base = self.memory_operands(ops[1:])
+            self.emit(s_type(offset, self.register(ops[0]), base, STORES[mnemonic]))
+        elif mnemonic in BRANCHES:
+            self.fixup('B' + str(BRANCHES[mnemonic]), self.register(ops[0]), self.register(ops[1]), ops[2])
+        elif mnemonic == 'jal':
+            rd, target = (self.register(ops[0]), ops[1]) if len(ops) == 2 else (1, ops[0])
+            self.fixup('J', rd, 0, target)
+        elif mnemonic == 'jalr':
+            if len(ops) == 2:
+                offset, base = self.memory_operands(ops[1:])
+            else:
+                offset, base = self.immediate(ops[2]), self.register(ops[1])
+            self.emit(i_type(offset, base, 0x0, self.register(ops[0]), 0x67))
+        elif mnemonic in ('lui', 'auipc'):
+            imm = check_range(self.immediate(ops[1]), 0, 0xFFFFF, "20-bit immediate")
+            self.emit((imm << 12) | (self.register(ops[0]) << 7) | (0x37 if mnemonic == 'lui' else 0x17))
+        else:
+            raise EncodingError(f"unsupported instruction '{mnemonic}'")
+
+    def fixup(self, kind: str, reg_a: int, reg_b: int, label: str):
+        """Placeholder word for an instruction whose offset depends on a label"""
+        if self.section != '.text':
+            raise EncodingError("branches and jumps must be in .text")
+        self.fixups.append((len(self.sections['.text']), kind, reg_a, reg_b, label, self.line_number))
+        self.emit(0)
+
+    def link(self) -> bytes:
+        """Pass two: lay out the sections, relax far branches and resolve every label"""
+        text = self.sections['.text']
+        for _, _, _, _, label, line in self.fixups:
+            if label not in self.labels:
+                raise EncodingError(f"line {line}: undefined label '{label}'")
+
+        # Indices of fixups grown by one word (far branches, far jals) and by
+        # a second one (branches beyond jal), grown until every target fits
+        relaxed, far = [], []
+
+        def address(section: str, index: int) -> int:
+            if section == '.text':
+                return self.base_address + 4 * (index + bisect.bisect_left(relaxed, index) + bisect.bisect_left(far, index))
+            return self.base_address + 4 * (len(text) + len(relaxed) + len(far) + index)
+
+        while True:
+            grown, further = [], []
+            for index, kind, _, _, label, _ in self.fixups:
+                offset = address(*self.labels[label]) - address('.text', index)
+                if kind == 'J':
+                    if not jal_in_range(offset):
+                        grown.append(index)
+                elif not branch_in_range(offset):
+                    grown.append(index)
+                    if not jal_in_range(offset - 4):
+                        further.append(index)
+            if not set(grown) - set(relaxed) and not set(further) - set(far):
+                break
+            relaxed = sorted(set(relaxed) | set(grown))
+            far = sorted(set(far) | set(further))
+
+        patched = {}
+        long_jumps, far_branches = set(relaxed), set(far)
+        for index, kind, reg_a, reg_b, label, line in self.fixups:
+            pc = address('.text', index)
+            target = address(*self.labels[label])
+            if kind == 'J' and index in long_jumps:
+                patched[index] = far_jump(target - pc, reg_a, reg_a or T1)
+            elif kind == 'J':
+                patched[index] = (j_type(target - pc, reg_a),)
+            elif index in far_branches:
+                # Inverted condition skips the auipc+jalr that reaches the far target
+                patched[index] = (b_type(12, reg_b, reg_a, int(kind[1:]) ^ 1),) + far_jump(target - pc - 4, 0, T1)
+            elif index in long_jumps:
+                # Inverted condition skips the jal that reaches the far target
+                patched[index] = (b_type(8, reg_b, reg_a, int(kind[1:]) ^ 1), j_type(target - pc - 4, 0))
+            else:
+                patched[index] = (b_type(target - pc, reg_b, reg_a, int(kind[1:])),)
+
+        words = array('I')
+        for index, word in enumerate(text):
+            words.extend(patched.get(index, (word,)))
+        words.extend(self.sections['.data'])
+        if words.itemsize != 4:
+            raise RuntimeError("array('I') is not 32 bits on this platform")
+        if array('I', [1]).tobytes()[0] != 1:
+            words.byteswap()  # Image is little-endian
+        self.image = words.tobytes()
+        return self.image
+
+    def write_hex(self, path: str, bytes_per_line: int = 16):
+        """Write the image in the `objcopy -O verilog` format ($readmemh of a byte array)"""
+        image = self.image if self.image is not None else self.link()
+        with open(path, 'w') as f:
+            f.write(f"@{self.base_address:08X}\n")
+            for offset in range(0, len(image), bytes_per_line):
+                f.write(" ".join(f"{byte:02X}" for byte in image[offset:offset + bytes_per_line]) + "\n")
+
+    def write_bin(self, path: str):
+        """Write the raw little-endian image, starting at the base address"""
+        image = self.image if self.image is not None else self.link()
+        with open(path, 'wb') as f:
+            f.write(image)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode generate_asm.py assembly into a CV32E40P memory image')
+    parser.add_argument('input', help='Assembly file written by generate_asm.py')
+    parser.add_argument('-o', '--output', type=str,
+                        help='Output file (default: input with .hex, or .bin with --bin)')
+    parser.add_argument('--bin', action='store_true',
+                        help='Write a raw binary instead of objcopy-style verilog hex')
+    parser.add_argument('--base-address', type=lambda value: int(value, 0), default=0x180,
+                        help='Load address of .text (default: 0x180, the example testbench boot address)')
+    args = parser.parse_args()
+
+    encoder = AssemblyEncoder(args.base_address)
+    with open(args.input, 'r') as f:
+        encoder.add_lines(f)
+    image = encoder.link()
+
+    output = args.output or args.input.rsplit('.', 1)[0] + ('.bin' if args.bin else '.hex')
+    if args.bin:
+        encoder.write_bin(output)
+    else:
+        encoder.write_hex(output)
+    print(f"Encoded {len(image) // 4} words at 0x{args.base_address:x} in {output}")
+
+
+if __name__ == "__main__":
+    main()
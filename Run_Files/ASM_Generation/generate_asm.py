@@ -15,11 +15,23 @@ Distribution Strategy:
 
 import random
 import argparse
+import heapq
 import json
-from typing import Dict, List, Tuple
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from asm_encoder import AssemblyEncoder, EncodingError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class InstrType(Enum):
     ARITHMETIC = "arithmetic"
     LOGICAL = "logical"
@@ -42,8 +54,131 @@ class InstructionTemplate:
     weight: float
     operands: List[str]
 
+class WeightedSampler:
+    """Draws items with probability proportional to their weights (Vose alias method)
+    
+    Setup is O(n) and every draw O(1), with exact probabilities at any weight
+    precision. Draws come from rng, so a seed gives the same stream on every
+    host. With use_numpy, batches are drawn from a NumPy generator seeded from
+    rng instead: faster, but a different stream for the same seed.
+    """
+    
+    def __init__(self, items: List[str], weights: List[float], rng=random, use_numpy: bool = False):
+        pairs = [(item, float(weight)) for item, weight in zip(items, weights) if weight > 0]
+        if not pairs:
+            raise ValueError("WeightedSampler needs at least one positive weight")
+        self.items = [item for item, _ in pairs]
+        self.rng = rng
+        
+        # Scale to mean 1, then pair every under-full column with an over-full one
+        count = len(pairs)
+        total = sum(weight for _, weight in pairs)
+        scaled = [weight * count / total for _, weight in pairs]
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Leftovers are 1.0 up to rounding and keep prob 1.0
+        
+        self.np_rng = None
+        if use_numpy:
+            if np is None:
+                raise RuntimeError("WeightedSampler(use_numpy=True) needs NumPy")
+            self.np_rng = np.random.default_rng(rng.getrandbits(64))
+            self.np_prob = np.array(self.prob)
+            self.np_alias = np.array(self.alias)
+    
+    def sample(self) -> str:
+        """Draw one item"""
+        column = int(self.rng.random() * len(self.items))
+        return self.items[column] if self.rng.random() < self.prob[column] else self.items[self.alias[column]]
+    
+    def sample_batch(self, count: int) -> List[str]:
+        """Draw count items at once"""
+        if self.np_rng is None:
+            return [self.sample() for _ in range(count)]
+        columns = self.np_rng.integers(0, len(self.items), count)
+        picks = np.where(self.np_rng.random(count) < self.np_prob[columns], columns, self.np_alias[columns])
+        return [self.items[i] for i in picks.tolist()]
+    
+    def __iter__(self):
+        """Endless stream of draws, fetched in batches"""
+        while True:
+            yield from self.sample_batch(4096)
+
+class LabelManager:
+    """Branch and jump target labels, tracked without searching the program
+    
+    Referenced labels that are not defined yet are kept in creation order,
+    so each one is resolved in O(1). Existing labels are reused from a window
+    of the most recent ones, which bounds memory and keeps branch offsets
+    short. With a forward distance (min, max), every new target is scheduled
+    to be defined that many instructions after its reference.
+    """
+    
+    def __init__(self, window: int = 64, distance: Tuple[int, int] = None, rng=random):
+        self.counter = 0
+        self.window = window
+        self.distance = distance
+        self.rng = rng
+        self.recent = []      # Ring buffer of the last `window` labels
+        self.pending = {}     # Referenced but not yet defined, in creation order
+        self.schedule = []    # Heap of (position, label) for forward targets
+    
+    def new(self) -> str:
+        """Create a unique label"""
+        label = f"label_{self.counter}"
+        if self.counter < self.window:
+            self.recent.append(label)
+        else:
+            self.recent[self.counter % self.window] = label
+        self.counter += 1
+        return label
+    
+    def define(self, label: str) -> str:
+        """Mark a label as placed and return its definition line"""
+        self.pending.pop(label, None)
+        return f"{label}:"
+    
+    def reference(self, position: int, reuse_probability: float = 0.3) -> str:
+        """Target for a branch or jump at instruction `position`: a recent label or a new forward one"""
+        if self.rng.random() < reuse_probability and self.recent:
+            return self.rng.choice(self.recent)
+        label = self.new()
+        self.pending[label] = position
+        if self.distance:
+            heapq.heappush(self.schedule, (position + self.rng.randint(*self.distance), label))
+        return label
+    
+    def due(self, position: int) -> List[str]:
+        """Scheduled forward targets to define before instruction `position`"""
+        labels = []
+        while self.schedule and self.schedule[0][0] <= position:
+            _, label = heapq.heappop(self.schedule)
+            if label in self.pending:
+                labels.append(label)
+        return labels
+    
+    def dangling(self) -> List[str]:
+        """Referenced labels never defined, in creation order"""
+        labels = list(self.pending)
+        self.pending.clear()
+        self.schedule.clear()
+        return labels
+
 class CV32E40PAssemblyGenerator:
-    def __init__(self):
+    def __init__(self, rng=None, use_numpy=False):
+        # Random number source, a random.Random per program (default: the global random module)
+        self.rng = rng or random
+        # Draw instructions from a NumPy stream (see WeightedSampler)
+        self.use_numpy = use_numpy
+        
         # Register definitions
         self.registers = [f"x{i}" for i in range(32)]
         self.abi_names = {
@@ -71,7 +206,7 @@ class CV32E40PAssemblyGenerator:
             "add": InstructionTemplate("add", "R", InstrType.ARITHMETIC, 8.0, ["rd", "rs1", "rs2"]),
             "sub": InstructionTemplate("sub", "R", InstrType.ARITHMETIC, 6.0, ["rd", "rs1", "rs2"]),
             "addi": InstructionTemplate("addi", "I", InstrType.ARITHMETIC, 12.0, ["rd", "rs1", "imm12"]),
-            "subi": InstructionTemplate("subi", "I", InstrType.ARITHMETIC, 4.0, ["rd", "rs1", "imm12"]),
+            "subi": InstructionTemplate("subi", "I", InstrType.ARITHMETIC, 4.0, ["rd", "rs1", "nimm12"]),
             
             # Logical Operations (15% total)
             "and": InstructionTemplate("and", "R", InstrType.LOGICAL, 3.0, ["rd", "rs1", "rs2"]),
@@ -122,7 +257,7 @@ class CV32E40PAssemblyGenerator:
             "cv.max": InstructionTemplate("cv.max", "R", InstrType.CUSTOM_ALU, 1.0, ["rd", "rs1", "rs2"]),
             "cv.minu": InstructionTemplate("cv.minu", "R", InstrType.CUSTOM_ALU, 0.5, ["rd", "rs1", "rs2"]),
             "cv.maxu": InstructionTemplate("cv.maxu", "R", InstrType.CUSTOM_ALU, 0.5, ["rd", "rs1", "rs2"]),
-            "cv.clip": InstructionTemplate("cv.clip", "R", InstrType.CUSTOM_ALU, 0.5, ["rd", "rs1", "rs2"]),
+            "cv.clipr": InstructionTemplate("cv.clipr", "R", InstrType.CUSTOM_ALU, 0.5, ["rd", "rs1", "rs2"]),
             
             # CV32E40P Custom Bit Manipulation (2% total)
             "cv.extractr": InstructionTemplate("cv.extractr", "R", InstrType.CUSTOM_BIT, 0.3, ["rd", "rs1", "rs2"]),
@@ -155,126 +290,128 @@ class CV32E40PAssemblyGenerator:
         self.memory_base = 0x10000000
         self.memory_size = 0x1000
         
-        # Label counter for branches and jumps
-        self.label_counter = 0
-        self.generated_labels = []
+        # Labels for branches and jumps
+        self.labels = LabelManager(rng=self.rng)
+        self.position = 0  # Index of the instruction being generated
         self.branch_setup_registers = ['t3', 't4', 't5', 't6']  # Registers for branch condition setup
         
     def get_random_register(self, exclude_zero=True) -> str:
         """Get a random register, optionally excluding x0"""
         if exclude_zero:
-            return random.choice(self.registers[1:])
-        return random.choice(self.registers)
+            return self.rng.choice(self.registers[1:])
+        return self.rng.choice(self.registers)
     
     def get_random_immediate(self, bits=12, signed=True) -> int:
         """Generate random immediate value"""
         if signed:
-            return random.randint(-(2**(bits-1)), 2**(bits-1)-1)
+            return self.rng.randint(-(2**(bits-1)), 2**(bits-1)-1)
         else:
-            return random.randint(0, 2**bits-1)
+            return self.rng.randint(0, 2**bits-1)
     
     def get_random_offset(self) -> int:
-        """Generate random memory offset"""
-        return random.randint(0, self.memory_size-4) & ~3  # Word-aligned
+        """Generate random memory offset (within the 12-bit signed offset field)"""
+        return self.rng.randint(0, min(self.memory_size-4, 2047)) & ~3  # Word-aligned
     
     def get_misaligned_offset(self) -> int:
-        """Generate misaligned memory offset"""
-        base_offset = random.randint(0, self.memory_size-8) & ~3  # Start with word-aligned base
-        misalign = random.choice(self.misaligned_offsets)
+        """Generate misaligned memory offset (within the 12-bit signed offset field)"""
+        base_offset = self.rng.randint(0, min(self.memory_size-8, 2040)) & ~3  # Start with word-aligned base
+        misalign = self.rng.choice(self.misaligned_offsets)
         return base_offset + misalign
     
+    def load_immediate(self, reg: str, value: int) -> List[str]:
+        """lui/addi pair loading a 32-bit value, as the li pseudo-instruction expands"""
+        upper = ((value + 0x800) >> 12) & 0xFFFFF  # Rounded up when the low part is negative
+        lower = ((value & 0xFFF) ^ 0x800) - 0x800  # Sign-extended low 12 bits
+        return [f"    lui {reg}, {upper}", f"    addi {reg}, {reg}, {lower}"]
+    
     def generate_misaligned_memory_setup(self, instruction_type: str) -> List[str]:
         """Generate setup instructions for misaligned memory access"""
         setup_instructions = []
-        base_reg = random.choice(self.branch_setup_registers)
+        base_reg = self.rng.choice(self.branch_setup_registers)
         
         # Set up base address for misaligned access
-        base_addr = self.memory_base + random.randint(0, self.memory_size//2)
-        setup_instructions.append(f"    lui {base_reg}, {base_addr >> 12}")
-        setup_instructions.append(f"    addi {base_reg}, {base_reg}, {base_addr & 0xfff}")
+        base_addr = self.memory_base + self.rng.randint(0, self.memory_size//2)
+        setup_instructions.extend(self.load_immediate(base_reg, base_addr))
         
         # Add some test data setup for stores
         if instruction_type in ["sw_misaligned", "sh_misaligned"]:
-            data_reg = random.choice([r for r in self.branch_setup_registers if r != base_reg])
-            test_value = random.randint(0x1000, 0xFFFF)
-            setup_instructions.append(f"    addi {data_reg}, zero, {test_value}")
+            data_reg = self.rng.choice([r for r in self.branch_setup_registers if r != base_reg])
+            test_value = self.rng.randint(0x1000, 0xFFFF)
+            setup_instructions.extend(self.load_immediate(data_reg, test_value))
             return setup_instructions, base_reg, data_reg
         
         return setup_instructions, base_reg, None
     
     def generate_label(self) -> str:
         """Generate a unique label"""
-        label = f"label_{self.label_counter}"
-        self.label_counter += 1
-        self.generated_labels.append(label)
-        return label
+        return self.labels.new()
     
     def generate_branch_setup(self, branch_type: str, taken: bool) -> List[str]:
         """Generate instructions to set up registers for branch conditions"""
         setup_instructions = []
-        reg1 = random.choice(self.branch_setup_registers)
-        reg2 = random.choice(self.branch_setup_registers)
+        reg1 = self.rng.choice(self.branch_setup_registers)
+        reg2 = self.rng.choice(self.branch_setup_registers)
         
         if taken:
             # Generate conditions that will cause branch to be taken
             if branch_type == "beq":
-                val = random.randint(1, 100)
+                val = self.rng.randint(1, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val}")
             elif branch_type == "bne":
-                val1 = random.randint(1, 100)
-                val2 = random.randint(101, 200)
+                val1 = self.rng.randint(1, 100)
+                val2 = self.rng.randint(101, 200)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "blt":
-                val1 = random.randint(1, 50)
-                val2 = random.randint(51, 100)
+                val1 = self.rng.randint(1, 50)
+                val2 = self.rng.randint(51, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bge":
-                val1 = random.randint(51, 100)
-                val2 = random.randint(1, 50)
+                val1 = self.rng.randint(51, 100)
+                val2 = self.rng.randint(1, 50)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bltu":
-                val1 = random.randint(1, 50)
-                val2 = random.randint(51, 100)
+                val1 = self.rng.randint(1, 50)
+                val2 = self.rng.randint(51, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bgeu":
-                val1 = random.randint(51, 100)
-                val2 = random.randint(1, 50)
+                val1 = self.rng.randint(51, 100)
+                val2 = self.rng.randint(1, 50)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
         else:
             # Generate conditions that will cause branch to NOT be taken
             if branch_type == "beq":
-                val1 = random.randint(1, 100)
-                val2 = random.randint(101, 200)
+                val1 = self.rng.randint(1, 100)
+                val2 = self.rng.randint(101, 200)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bne":
-                val = random.randint(1, 100)
+                val = self.rng.randint(1, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val}")
             elif branch_type == "blt":
-                val1 = random.randint(51, 100)
-                val2 = random.randint(1, 50)
+                val1 = self.rng.randint(51, 100)
+                val2 = self.rng.randint(1, 50)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bge":
-                val1 = random.randint(1, 50)
-                val2 = random.randint(51, 100)
+                val1 = self.rng.randint(1, 50)
+                val2 = self.rng.randint(51, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bltu":
-                val1 = random.randint(51, 100)
-                val2 = random.randint(1, 50)
+                val1 = self.rng.randint(51, 100)
+                val2 = self.rng.randint(1, 50)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
             elif branch_type == "bgeu":
-                val1 = random.randint(1, 50)
-                val2 = random.randint(51, 100)
+                val1 = self.rng.randint(1, 50)
+                val2 = self.rng.randint(51, 100)
                 setup_instructions.append(f"    addi {reg1}, zero, {val1}")
                 setup_instructions.append(f"    addi {reg2}, zero, {val2}")
         
@@ -303,8 +440,11 @@ class CV32E40PAssemblyGenerator:
                     operands.append(self.get_random_register())
             elif operand == "imm12":
                 operands.append(str(self.get_random_immediate(12)))
+            elif operand == "nimm12":
+                # Negated into an addi immediate, so -2048 is excluded
+                operands.append(str(self.rng.randint(-2047, 2047)))
             elif operand == "shamt":
-                operands.append(str(random.randint(0, 31)))
+                operands.append(str(self.rng.randint(0, 31)))
             elif operand == "offset":
                 operands.append(str(self.get_random_offset()))
             elif operand == "misaligned_offset":
@@ -314,26 +454,31 @@ class CV32E40PAssemblyGenerator:
                     operands.append(str(self.get_misaligned_offset()))
             elif operand == "label":
                 # For branches, use existing labels or create forward references
-                if random.random() < 0.3 and self.generated_labels:
-                    operands.append(random.choice(self.generated_labels))
-                else:
-                    operands.append(self.generate_label())
+                operands.append(self.labels.reference(self.position))
         
+        if template.instr_type in (InstrType.LOAD_STORE, InstrType.MISALIGNED_MEM):
+            # Memory operand as offset(base)
+            return f"    {template.mnemonic} {operands[0]}, {operands[1]}({operands[2]})"
         return f"    {template.mnemonic} {', '.join(operands)}"
     
-    def generate_assembly(self, num_instructions: int, distribution: Dict[str, float] = None, cv_weight: float = 1.0, branch_taken_rate: float = 0.5, misaligned_rate: float = 0.3) -> str:
+    def generate_assembly(self, num_instructions: int, distribution: Dict[str, float] = None, cv_weight: float = 1.0, branch_taken_rate: float = 0.5, misaligned_rate: float = 0.3, label_distance: Tuple[int, int] = None) -> str:
         """Generate assembly code with specified instruction count and distribution"""
+        return "\n".join(self.iter_assembly(num_instructions, distribution, cv_weight, branch_taken_rate, misaligned_rate, label_distance))
+    
+    def iter_assembly(self, num_instructions: int, distribution: Dict[str, float] = None, cv_weight: float = 1.0, branch_taken_rate: float = 0.5, misaligned_rate: float = 0.3, label_distance: Tuple[int, int] = None) -> Iterator[str]:
+        """Generate assembly lines one at a time, without holding the program in memory"""
         
-        # Set branch taken probability and misaligned rate
+        # Set branch taken probability, misaligned rate and forward target distance
         self.branch_taken_probability = branch_taken_rate
         self.misaligned_probability = misaligned_rate
+        self.labels.distance = label_distance
         
         # Use default distribution if none provided
         if distribution is None:
             distribution = {instr_type.value: 1.0 for instr_type in InstrType}
         
-        # Create weighted instruction list based on distribution
-        weighted_instructions = []
+        # Weighted instruction sampler based on distribution
+        names, weights = [], []
         for name, template in self.instruction_templates.items():
             type_weight = distribution.get(template.instr_type.value, 1.0)
             
@@ -342,10 +487,12 @@ class CV32E40PAssemblyGenerator:
                 type_weight *= cv_weight
             
             final_weight = template.weight * type_weight
-            weighted_instructions.extend([name] * int(final_weight * 10))
+            names.append(name)
+            weights.append(final_weight)
+        instruction_stream = iter(WeightedSampler(names, weights, self.rng, self.use_numpy))
         
         # Generate assembly header
-        assembly = [
+        yield from [
             "# CV32E40P Assembly Test Program",
             "# Generated with target instruction distribution",
             "",
@@ -354,77 +501,76 @@ class CV32E40PAssemblyGenerator:
             "",
             "_start:",
             "    # Initialize stack pointer",
-            f"    lui sp, {(self.memory_base + self.memory_size) >> 12}",
-            f"    addi sp, sp, {(self.memory_base + self.memory_size) & 0xfff}",
+            *self.load_immediate("sp", self.memory_base + self.memory_size),
             "",
             "    # Initialize base register for memory operations",
-            f"    lui t0, {self.memory_base >> 12}",
-            f"    addi t0, t0, {self.memory_base & 0xfff}",
+            *self.load_immediate("t0", self.memory_base),
             "",
             "main_loop:"
         ]
         
         # Generate instructions
         for i in range(num_instructions):
-            if random.random() < 0.1:  # 10% chance of adding a label
-                assembly.append(f"{self.generate_label()}:")
+            self.position = i
+            for label in self.labels.due(i):
+                yield self.labels.define(label)
             
-            instr_name = random.choice(weighted_instructions)
+            if self.rng.random() < 0.1:  # 10% chance of adding a label
+                yield self.labels.define(self.generate_label())
+            
+            instr_name = next(instruction_stream)
             template = self.instruction_templates[instr_name]
             
             # Special handling for branch instructions to create predictable taken/not-taken patterns
             if template.instr_type == InstrType.BRANCH:
-                branch_taken = random.random() < self.branch_taken_probability
+                branch_taken = self.rng.random() < self.branch_taken_probability
                 setup_instructions, reg1, reg2 = self.generate_branch_setup(template.mnemonic, branch_taken)
                 
                 # Add setup instructions
-                for setup_instr in setup_instructions:
-                    assembly.append(setup_instr)
+                yield from setup_instructions
                 
                 # Add the branch instruction with setup registers
-                assembly.append(self.format_instruction(template, setup_regs=[reg1, reg2]))
+                yield self.format_instruction(template, setup_regs=[reg1, reg2])
                 
                 # Add some instructions after branch to create pipeline flush scenarios
                 if branch_taken:
                     # Add a few NOPs or simple instructions that will be flushed
-                    assembly.append("    nop  # This will be flushed if branch taken")
-                    assembly.append("    nop  # This will be flushed if branch taken")
+                    yield "    nop  # This will be flushed if branch taken"
+                    yield "    nop  # This will be flushed if branch taken"
             
             # Special handling for misaligned memory instructions
             elif template.instr_type == InstrType.MISALIGNED_MEM:
                 setup_instructions, base_reg, data_reg = self.generate_misaligned_memory_setup(instr_name)
                 
                 # Add setup instructions
-                for setup_instr in setup_instructions:
-                    assembly.append(setup_instr)
+                yield from setup_instructions
                 
                 # Generate misaligned offset
-                misaligned_offset = random.choice(self.misaligned_offsets)
+                misaligned_offset = self.rng.choice(self.misaligned_offsets)
                 
                 # Add the misaligned memory instruction
                 if data_reg:  # Store instruction
-                    assembly.append(self.format_instruction(template, setup_regs=[base_reg, data_reg], misaligned_data=misaligned_offset))
+                    yield self.format_instruction(template, setup_regs=[base_reg, data_reg], misaligned_data=misaligned_offset)
                 else:  # Load instruction
-                    assembly.append(self.format_instruction(template, setup_regs=[base_reg], misaligned_data=misaligned_offset))
+                    yield self.format_instruction(template, setup_regs=[base_reg], misaligned_data=misaligned_offset)
                 
                 # Add comment about the misalignment
-                assembly.append(f"    # Above instruction uses misaligned offset {misaligned_offset} - will cause structural hazard")
+                yield f"    # Above instruction uses misaligned offset {misaligned_offset} - will cause structural hazard"
                 
                 # Add a few instructions that might be affected by the misaligned access stall
-                assembly.append("    nop  # May be stalled due to misaligned access")
-                assembly.append("    add t1, t1, t2  # May be stalled due to misaligned access")
+                yield "    nop  # May be stalled due to misaligned access"
+                yield "    add t1, t1, t2  # May be stalled due to misaligned access"
             
             else:
-                assembly.append(self.format_instruction(template))
+                yield self.format_instruction(template)
         
         # Add remaining labels that were referenced but not yet defined
-        for label in self.generated_labels:
-            if f"{label}:" not in assembly:
-                assembly.append(f"{label}:")
-                assembly.append("    nop")
+        for label in self.labels.dangling():
+            yield f"{label}:"
+            yield "    nop"
         
         # Add program termination
-        assembly.extend([
+        yield from [
             "",
             "program_end:",
             "    # Infinite loop to end program",
@@ -433,33 +579,92 @@ class CV32E40PAssemblyGenerator:
             ".section .data",
             "test_data:",
             "    .word 0x12345678, 0xdeadbeef, 0xcafebabe, 0x0f0f0f0f"
-        ])
-        
-        return "\n".join(assembly)
+        ]
     
-    def generate_statistics(self, assembly_code: str) -> Dict:
-        """Generate statistics about the generated assembly"""
-        lines = assembly_code.split('\n')
-        instruction_lines = [line.strip() for line in lines if line.strip() and not line.strip().startswith('#') and not line.strip().startswith('.') and not line.strip().endswith(':') and line.strip() != '']
+    def write_assembly(self, f, lines: Iterator[str], stats: Dict = None, chunk_lines: int = 4096) -> int:
+        """Write assembly lines to f in chunks as they are generated, counting them into stats
         
-        stats = {
-            'total_instructions': len(instruction_lines),
+        Returns the number of lines written. Only one chunk is held in memory.
+        """
+        written = 0
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if stats is not None:
+                self.count_statistics(stats, line)
+            if len(chunk) >= chunk_lines:
+                f.write("\n".join(chunk) + "\n")
+                written += len(chunk)
+                chunk.clear()
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+            written += len(chunk)
+        return written
+    
+    def new_statistics(self) -> Dict:
+        """Empty statistics, filled line by line with count_statistics"""
+        return {
+            'sampler': "numpy" if self.use_numpy else "python",
+            'total_instructions': 0,
             'instruction_types': {instr_type.value: 0 for instr_type in InstrType},
             'instruction_breakdown': {}
         }
+    
+    def count_statistics(self, stats: Dict, line: str):
+        """Add one assembly line to the statistics"""
+        line = line.strip()
+        if not line or line.startswith('#') or line.startswith('.') or line.endswith(':'):
+            return
+        stats['total_instructions'] += 1
         
-        for line in instruction_lines:
-            # Extract instruction mnemonic
-            parts = line.strip().split()
-            if parts:
-                mnemonic = parts[0]
-                if mnemonic in self.instruction_templates:
-                    template = self.instruction_templates[mnemonic]
-                    stats['instruction_types'][template.instr_type.value] += 1
-                    stats['instruction_breakdown'][mnemonic] = stats['instruction_breakdown'].get(mnemonic, 0) + 1
-        
+        # Extract instruction mnemonic
+        mnemonic = line.split()[0]
+        if mnemonic in self.instruction_templates:
+            template = self.instruction_templates[mnemonic]
+            stats['instruction_types'][template.instr_type.value] += 1
+            stats['instruction_breakdown'][mnemonic] = stats['instruction_breakdown'].get(mnemonic, 0) + 1
+    
+    def generate_statistics(self, assembly_code: str) -> Dict:
+        """Generate statistics about the generated assembly"""
+        stats = self.new_statistics()
+        for line in assembly_code.split('\n'):
+            self.count_statistics(stats, line)
         return stats
 
+def generate_program(output: str, seed: int, options: Dict) -> Dict:
+    """Generate one program from its own RNG stream, seeded with seed
+    
+    Runs in a worker process in batch mode. Returns the manifest entry of
+    the program; `-s <seed>` with the same options reproduces it alone.
+    """
+    generator = CV32E40PAssemblyGenerator(random.Random(seed), options['numpy'])
+    stats = generator.new_statistics()
+    lines = generator.iter_assembly(options['num_instructions'], options['distribution'], options['cv_weight'],
+                                    options['branch_taken_rate'], options['misaligned_rate'], options['label_distance'])
+    encoder = None
+    if options['hex'] or options['bin']:
+        # Encode as the lines stream past, the image is linked once the program is complete
+        encoder = AssemblyEncoder(options['base_address'])
+        lines = encoder.tee(lines)
+    with open(output, 'w', buffering=options['buffer_size']) as f:
+        generator.write_assembly(f, lines, stats)
+    
+    entry = {'file': output, 'seed': seed, 'stats': stats}
+    if encoder:
+        encoder.link()
+        root = os.path.splitext(output)[0]
+        if options['hex']:
+            entry['hex'] = f"{root}.hex"
+            encoder.write_hex(entry['hex'])
+        if options['bin']:
+            entry['bin'] = f"{root}.bin"
+            encoder.write_bin(entry['bin'])
+    if options['stats']:
+        entry['stats_file'] = f"{os.path.splitext(output)[0]}_stats.json"
+        with open(entry['stats_file'], 'w') as f:
+            json.dump(stats, f, indent=2)
+    return entry
+
 def main():
     parser = argparse.ArgumentParser(description='Generate CV32E40P assembly with target instruction distribution')
     parser.add_argument('-n', '--num-instructions', type=int, default=1000, 
@@ -480,14 +685,29 @@ def main():
                        help='Probability of branches being taken (0.0-1.0, default: 0.5)')
     parser.add_argument('--misaligned-rate', type=float, default=0.3,
                        help='Probability of memory accesses being misaligned (0.0-1.0, default: 0.3)')
+    parser.add_argument('--label-distance', type=str,
+                       help='Place forward branch/jump targets MIN[:MAX] instructions after the reference (default: end of program)')
+    parser.add_argument('--buffer-size', type=int, default=1 << 20,
+                       help='Output write buffer in bytes (default: 1048576)')
+    parser.add_argument('--hex', action='store_true',
+                       help='Also encode the program into <output>.hex for +firmware=, no assembler needed')
+    parser.add_argument('--bin', action='store_true',
+                       help='Also encode the program into a raw binary <output>.bin')
+    parser.add_argument('--base-address', type=lambda value: int(value, 0), default=0x180,
+                       help='Load address of the encoded program (default: 0x180, the example testbench boot address)')
+    parser.add_argument('--count', type=int, default=1,
+                       help='Number of programs to generate, named <output>_NNNN.s (default: 1)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                       help='Worker processes for --count (default: number of cores)')
+    parser.add_argument('--numpy', action='store_true',
+                       help='Draw instructions with NumPy: faster, but a seed gives a different program '
+                            'than without --numpy (default: off)')
     
     args = parser.parse_args()
-    
-    # Set random seed if provided
-    if args.seed:
-        random.seed(args.seed)
-    
-    generator = CV32E40PAssemblyGenerator()
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.numpy and np is None:
+        parser.error("--numpy needs NumPy installed")
     
     # Load distribution from file or use preset
     distribution = None
@@ -527,23 +747,77 @@ def main():
         }
         distribution = presets[args.preset]
     
-    # Generate assembly
-    assembly_code = generator.generate_assembly(args.num_instructions, distribution, args.cv_weight, args.branch_taken_rate, args.misaligned_rate)
+    label_distance = None
+    if args.label_distance:
+        low, _, high = args.label_distance.partition(':')
+        label_distance = (int(low), int(high or low))
+        if not 0 < label_distance[0] <= label_distance[1]:
+            parser.error("--label-distance needs 0 < MIN <= MAX")
     
-    # Write output file
-    with open(args.output, 'w') as f:
-        f.write(assembly_code)
+    options = {
+        'num_instructions': args.num_instructions, 'distribution': distribution, 'cv_weight': args.cv_weight,
+        'branch_taken_rate': args.branch_taken_rate, 'misaligned_rate': args.misaligned_rate,
+        'label_distance': label_distance, 'buffer_size': args.buffer_size, 'stats': args.stats,
+        'hex': args.hex, 'bin': args.bin, 'base_address': args.base_address, 'numpy': args.numpy,
+    }
     
-    print(f"Generated {args.num_instructions} instructions in {args.output}")
+    try:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    except OSError as e:
+        parser.exit(1, f"Error creating output directory: {e}\n")
     
-    # Generate statistics if requested
-    if args.stats:
-        stats = generator.generate_statistics(assembly_code)
-        stats_file = args.output.replace('.s', '_stats.json')
-        with open(stats_file, 'w') as f:
-            json.dump(stats, f, indent=2)
+    # Program seeds: the given seed (0 included) for one program, or drawn
+    # from it for a batch, so every program can be regenerated on its own
+    base_rng = random.Random(args.seed)
+    if args.count > 1:
+        seeds = [base_rng.getrandbits(32) for _ in range(args.count)]
+        root, ext = os.path.splitext(args.output)
+        width = max(4, len(str(args.count - 1)))
+        outputs = [f"{root}_{i:0{width}d}{ext}" for i in range(args.count)]
         
-        print(f"Statistics written to {stats_file}")
+        start = time.monotonic()
+        jobs = max(1, min(args.jobs, args.count))
+        try:
+            if jobs > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    programs = list(pool.map(generate_program, outputs, seeds, repeat(options),
+                                             chunksize=max(1, args.count // (jobs * 4))))
+            else:
+                programs = [generate_program(output, seed, options) for output, seed in zip(outputs, seeds)]
+        except EncodingError as e:
+            parser.exit(1, f"Error encoding machine code: {e}\n")
+        except OSError as e:
+            parser.exit(1, f"Error writing programs: {e}\n")
+        
+        manifest_file = f"{root}_manifest.json"
+        with open(manifest_file, 'w') as f:
+            json.dump({'base_seed': args.seed, 'sampler': "numpy" if args.numpy else "python",
+                       'options': vars(args), 'programs': programs}, f, indent=2)
+        print(f"Generated {args.count} programs of {args.num_instructions} instructions with {jobs} jobs "
+              f"in {time.monotonic() - start:.1f}s")
+        print(f"Manifest written to {manifest_file}")
+        return
+    
+    # Generate assembly straight into the output file, memory use does not grow with -n
+    seed = args.seed if args.seed is not None else base_rng.getrandbits(32)
+    try:
+        program = generate_program(args.output, seed, options)
+    except EncodingError as e:
+        parser.exit(1, f"Error encoding machine code: {e}\n")
+    except OSError as e:
+        parser.exit(1, f"Error writing program: {e}\n")
+    stats = program['stats']
+    
+    print(f"Generated {args.num_instructions} instructions in {args.output} "
+          f"(seed {seed}{', --numpy' if args.numpy else ''})")
+    
+    for image in ('hex', 'bin'):
+        if image in program:
+            print(f"Machine code written to {program[image]}")
+    
+    # Write statistics if requested
+    if args.stats:
+        print(f"Statistics written to {program['stats_file']}")
         print("\nInstruction Type Distribution:")
         for instr_type, count in stats['instruction_types'].items():
             percentage = (count / stats['total_instructions']) * 100
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the orchestration overhead of run_sim.py
+Runs against the fake tool backend (fake_tools.py), no Synopsys tools needed
+
+Benchmarks:
+  scheduler  jobs/s through run_parallel with zero-time fake simulations
+  log_parse  lines/s through LogWatcher over fake simv logs
+  merge      wall time of merge_coverage over N fake coverage databases
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+import fake_tools
+from run_sim import LogWatcher, SimJob, SimRunner
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_NAME = "cv32e40p_random_test"
+
+
+def make_runner(work_dir, jobs, coverage=False, log_lines=20):
+    """SimRunner on the fake backend with history, metrics and caching off"""
+    with open(os.path.join(SCRIPT_DIR, "sim_config.yaml"), 'r') as f:
+        config = yaml.safe_load(f)
+
+    config['tools']['backend'] = "fake"
+    config['tools']['fake'].update({'sim_time': [0.0, 0.0], 'compile_time': 0.0,
+                                    'merge_time': 0.0, 'log_lines': log_lines})
+    config['build']['coverage']['enabled'] = coverage
+    config['build']['cache']['enabled'] = False
+    config['history']['enabled'] = False
+    config['metrics']['enabled'] = False
+    config['coverage_merge']['report']['enabled'] = False
+    config['coverage_merge']['workers'] = jobs
+    config['regression']['run_dir'] = os.path.join(work_dir, "runs")
+
+    config_file = os.path.join(work_dir, "bench_config.yaml")
+    with open(config_file, 'w') as f:
+        yaml.safe_dump(config, f)
+    return SimRunner(config_file)
+
+
+def make_image(runner):
+    """Create the fake simv image in the working directory"""
+    config = fake_tools.load_config()
+    config.update(runner.config['tools']['fake'])
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        fake_tools.fake_vcs([], config)
+
+
+def bench_scheduler(size, jobs, work_dir):
+    """Throughput of run_parallel when the simulations themselves take no time"""
+    runner = make_runner(work_dir, jobs)
+    make_image(runner)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        sim_jobs = [SimJob(TEST_NAME, seed) for seed in range(1, size + 1)]
+        start = time.perf_counter()
+        results = runner.run_parallel(sim_jobs, jobs)
+        elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'rate': size / elapsed, 'unit': "jobs/s",
+            'detail': f"{sum(r.passed for r in results)}/{size} passed"}
+
+
+def bench_log_parse(size, jobs, work_dir, log_lines=2000):
+    """LogWatcher throughput over `size` fake simulation logs"""
+    runner = make_runner(work_dir, jobs, log_lines=log_lines)
+    cmd = runner.backend.command("simv", os.path.join(work_dir, "simv"))
+    make_image(runner)
+
+    logs = []
+    for seed in range(1, min(size, 20) + 1):
+        output = subprocess.run(cmd + [f"+UVM_TESTNAME={TEST_NAME}", f"+ntb_random_seed={seed}"],
+                                capture_output=True, text=True, env=runner.backend.child_env()).stdout
+        logs.append(output.splitlines(keepends=True))
+
+    lines = 0
+    start = time.perf_counter()
+    for i in range(size):
+        watcher = LogWatcher(runner.config)
+        for line in logs[i % len(logs)]:
+            watcher.feed(line)
+        lines += len(logs[i % len(logs)])
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'rate': lines / elapsed, 'unit': "lines/s",
+            'detail': f"{lines} lines"}
+
+
+def bench_merge(size, jobs, work_dir):
+    """merge_coverage over `size` fake databases (tree merge above group_size)"""
+    runner = make_runner(work_dir, jobs, coverage=True)
+    config = fake_tools.load_config()
+    config.update(runner.config['tools']['fake'])
+
+    databases = []
+    for seed in range(1, size + 1):
+        database = os.path.join(work_dir, f"coverage_db_{TEST_NAME}_seed{seed}.vdb")
+        fake_tools.write_items(database, fake_tools.covered_items(config, TEST_NAME, seed),
+                               [f"{TEST_NAME}_seed{seed}"])
+        databases.append(database)
+    runner.coverage_databases = databases
+    runner.config['coverage_merge']['merged_name'] = os.path.join(work_dir, "merged_coverage")
+    runner.config['coverage_merge']['work_dir'] = os.path.join(work_dir, "merge_tmp")
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        success = runner.merge_coverage() if size > 1 else True
+        elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'rate': size / elapsed if elapsed else 0.0, 'unit': "dbs/s",
+            'detail': f"{len(runner.metrics.processes)} urg calls, {'ok' if success else 'FAILED'}"}
+
+
+BENCHMARKS = {
+    'scheduler': bench_scheduler,
+    'log_parse': bench_log_parse,
+    'merge': bench_merge,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_sim.py orchestration on the fake tool backend")
+    parser.add_argument("--sizes", default="10,1000,10000",
+                        help="Comma separated job counts (default: 10,1000,10000)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"Comma separated benchmarks (default: {','.join(BENCHMARKS)})")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Parallel jobs / urg workers (default: number of cores)")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    names = args.benchmarks.split(",")
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)}")
+        sys.exit(1)
+
+    results = []
+    print(f"{'benchmark':12} {'size':>7} {'seconds':>10} {'rate':>14}  detail")
+    for name in names:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix="bench_run_sim_") as work_dir:
+                cwd = os.getcwd()
+                os.chdir(work_dir)
+                try:
+                    result = BENCHMARKS[name](size, args.jobs, work_dir)
+                finally:
+                    os.chdir(cwd)
+            result.update({'benchmark': name, 'size': size, 'jobs': args.jobs})
+            results.append(result)
+            rate = f"{result['rate']:.1f} {result['unit']}"
+            print(f"{name:12} {size:>7} {result['seconds']:>10.3f} {rate:>14}  {result['detail']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Stand-in for vcs, simv and urg
+Lets run_sim.py be exercised and benchmarked on machines without Synopsys tools
+
+Usage: fake_tools.py vcs <vcs args>
+       fake_tools.py simv <image> <simv args>
+       fake_tools.py urg <urg args>
+
+Behaviour is controlled by the JSON in $RUN_SIM_FAKE_CONFIG (the tools.fake
+section of sim_config.yaml). Outcomes, run times and covered items are derived
+from (test, seed), so a given job always behaves the same way.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# Modules of the fake coverage model, named after the real RTL
+MODULES = [
+    "cv32e40p_if_stage", "cv32e40p_id_stage", "cv32e40p_ex_stage", "cv32e40p_load_store_unit",
+    "cv32e40p_alu", "cv32e40p_alu_div", "cv32e40p_mult", "cv32e40p_decoder",
+    "cv32e40p_compressed_decoder", "cv32e40p_controller", "cv32e40p_cs_registers",
+    "cv32e40p_register_file_ff", "cv32e40p_prefetch_buffer", "cv32e40p_obi_interface",
+]
+
+ITEMS_FILE = "fake_items.json"
+
+
+def load_config():
+    """Fake tool settings passed down by run_sim.py"""
+    config = {
+        'compile_time': 0.0,
+        'sim_time': [0.0, 0.0],
+        'log_lines': 200,
+        'error_rate': 0.05,
+        'fatal_rate': 0.02,
+        'crash_rate': 0.0,
+        'coverage_items': 2000,
+        'coverage_fraction': 0.3,
+        'merge_time': 0.0,
+        'boot_time': 0.0,
+    }
+    config.update(json.loads(os.environ.get('RUN_SIM_FAKE_CONFIG', '{}')))
+    return config
+
+
+def option_value(args, name, default=None):
+    """Value following a `-name value` style option"""
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return default
+
+
+def plusarg_value(args, name, default=None):
+    """Value of a `+name=value` plusarg"""
+    prefix = f"+{name}="
+    for arg in args:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+def coverage_universe(config):
+    """Every coverable item as (module, line number)"""
+    per_module = max(1, config['coverage_items'] // len(MODULES))
+    return [(module, 10 + 3 * i) for module in MODULES for i in range(per_module)]
+
+
+def covered_items(config, test, seed):
+    """Items hit by a job.
+    
+    Most items come from a test specific core; each seed adds a few items from
+    a small hard-to-reach pool, so extra seeds show diminishing returns.
+    """
+    universe = coverage_universe(config)
+    count = int(len(universe) * config['coverage_fraction'])
+    hard_pool = universe[::10]
+    items = set(random.Random(f"cover:{test}").sample(universe, count))
+    items.update(random.Random(f"cover:{test}:{seed}").sample(hard_pool, max(1, len(hard_pool) // 20)))
+    return sorted(f"{module}:{line}" for module, line in items)
+
+
+def read_items(database):
+    try:
+        with open(os.path.join(database, ITEMS_FILE), 'r') as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+
+def write_items(database, items, tests):
+    os.makedirs(database, exist_ok=True)
+    with open(os.path.join(database, ITEMS_FILE), 'w') as f:
+        json.dump(sorted(items), f)
+    with open(os.path.join(database, "tests.txt"), 'w') as f:
+        f.write("\n".join(sorted(tests)) + "\n")
+
+
+def fake_vcs(args, config):
+    """Pretend to compile: create simv, simv.daidir and csrc"""
+    image = option_value(args, "-o", "simv")
+    mdir = next((arg.split("=", 1)[1] for arg in args if arg.startswith("-Mdir=")), "csrc")
+    log_file = option_value(args, "-l")
+
+    lines = ["Chronologic VCS (TM)", "  Fake compiler for run_sim.py testing", ""]
+    lines += [f"Parsing design file '{arg}'" for arg in args if arg.endswith(('.sv', '.v'))]
+    time.sleep(config['compile_time'])
+
+    os.makedirs(f"{image}.daidir", exist_ok=True)
+    os.makedirs(mdir, exist_ok=True)
+    with open(image, 'w') as f:
+        json.dump({'fake_image': True, 'args': args}, f)
+    lines.append(f"../{os.path.basename(image)} up to date")
+
+    print("\n".join(lines))
+    if log_file:
+        with open(log_file, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+    return 0
+
+
+def ucli_commands(args):
+    """{command: argument} of the UCLI do-script given with -ucli -do"""
+    script = option_value(args, "-do")
+    if "-ucli" not in args or not script:
+        return {}
+    with open(script, 'r') as f:
+        return dict((line.split(None, 1) + [""])[:2] for line in f if line.strip())
+
+
+def fake_simv(image, args, config):
+    """Pretend to simulate: realistic UVM log, exit code and coverage database.
+    
+    A UCLI do-script with `save <file>` stops after the boot phase and
+    writes a snapshot; one with `restore <file>` skips the boot phase and
+    continues the snapshot's test, reseeded by +ntb_random_reseed.
+    """
+    if not os.path.exists(image):
+        print(f"fake simv: image {image} not found", file=sys.stderr)
+        return 127
+    
+    ucli = {command: arg.strip() for command, arg in ucli_commands(args).items()}
+    snapshot = None
+    if "restore" in ucli:
+        try:
+            with open(ucli["restore"], 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            print(f"Error-[UCLI-RESTORE] cannot restore {ucli['restore']}")
+            return 1
+        if snapshot['image'] != os.path.abspath(image):
+            print(f"Error-[UCLI-RESTORE] {ucli['restore']} was saved by another simv")
+            return 1
+
+    try:
+        with open(image, 'r') as f:
+            image_args = json.load(f).get('args', [])
+    except (OSError, ValueError):
+        image_args = []
+    
+    test = plusarg_value(args, "UVM_TESTNAME", "unknown_test")
+    seed = plusarg_value(args, "ntb_random_seed", "1")
+    verbose = plusarg_value(args, "UVM_VERBOSITY", "UVM_MEDIUM") not in ("UVM_NONE", "UVM_LOW")
+    if snapshot:
+        # The test and verbosity were fixed when the snapshot was taken
+        test, verbose = snapshot['test'], snapshot['verbose']
+        seed = plusarg_value(args, "ntb_random_reseed", snapshot['seed'])
+    rng = random.Random(f"{test}:{seed}")
+
+    roll = rng.random()
+    if roll < config['crash_rate']:
+        outcome = "crash"
+    elif roll < config['crash_rate'] + config['fatal_rate']:
+        outcome = "fatal"
+    elif roll < config['crash_rate'] + config['fatal_rate'] + config['error_rate']:
+        outcome = "error"
+    else:
+        outcome = "pass"
+
+    low, high = config['sim_time']
+    run_time = rng.uniform(low, high)
+    num_lines = config['log_lines']
+    fail_at = rng.randint(num_lines // 4, max(num_lines // 4, num_lines - 1))
+    counts = {'UVM_INFO': 0, 'UVM_WARNING': 0, 'UVM_ERROR': 0, 'UVM_FATAL': 0}
+
+    out = sys.stdout
+    out.write("Chronologic VCS simulator copyright 1991-2024\n")
+    if snapshot:
+        out.write(f"Restoring simulation from {ucli['restore']} at {snapshot['time']}\n")
+    else:
+        out.write(f"UVM_INFO @ 0: reporter [RNTST] Running test {test}...\n")
+        counts['UVM_INFO'] += 1
+        time.sleep(config['boot_time'])
+    
+    if "save" in ucli:
+        with open(ucli["save"], 'w') as f:
+            json.dump({'image': os.path.abspath(image), 'test': test, 'seed': seed,
+                       'verbose': verbose, 'time': ucli.get("run", "0")}, f)
+        out.write(f"Checkpoint saved to {ucli['save']} at {ucli.get('run', '0')}\n")
+        return 0
+
+    for i in range(num_lines):
+        sim_time = (i + 1) * 10
+        if i == fail_at and outcome == "crash":
+            out.write(f"Error-[SIGSEGV] Segmentation fault\n  Simulation time {sim_time} ns\n")
+            out.flush()
+            return 139
+        if i == fail_at and outcome == "fatal":
+            out.write(f"UVM_FATAL ../MY_UVM_TB/driver.sv(87) @ {sim_time}: uvm_test_top.env.agent.driver "
+                      f"[DRV] Timed out waiting for instr_gnt at addr 0x{rng.getrandbits(32):08x}\n")
+            counts['UVM_FATAL'] += 1
+            break
+        if outcome == "error" and i >= fail_at and rng.random() < 0.05:
+            out.write(f"UVM_ERROR ../MY_UVM_TB/monitor.sv(142) @ {sim_time}: uvm_test_top.env.agent.monitor "
+                      f"[MON] Result mismatch: expected 0x{rng.getrandbits(32):08x} got 0x{rng.getrandbits(32):08x}\n")
+            counts['UVM_ERROR'] += 1
+        elif rng.random() < 0.01:
+            out.write(f"UVM_WARNING ../MY_UVM_TB/sequence.sv(55) @ {sim_time}: reporter [SEQ] "
+                      f"Retrying transaction {i}\n")
+            counts['UVM_WARNING'] += 1
+        elif verbose:
+            out.write(f"UVM_INFO ../MY_UVM_TB/driver.sv(64) @ {sim_time}: uvm_test_top.env.agent.driver "
+                      f"[DRV] Drove instruction {i} pc=0x{0x80 + 4 * i:08x}\n")
+            counts['UVM_INFO'] += 1
+
+    if outcome == "error" and not counts['UVM_ERROR']:
+        out.write(f"UVM_ERROR ../MY_UVM_TB/monitor.sv(142) @ {num_lines * 10}: uvm_test_top.env.agent.monitor "
+                  f"[MON] Result mismatch: expected 0x{rng.getrandbits(32):08x} got 0x{rng.getrandbits(32):08x}\n")
+        counts['UVM_ERROR'] += 1
+
+    out.flush()
+    time.sleep(run_time)
+    
+    if "+vcs+dumpvars" in image_args:
+        with open(plusarg_value(args, "vcdfile", "verilog.dump"), 'w') as f:
+            f.write(f"$comment fake waves for {test} seed {seed} $end\n$timescale 1ns $end\n"
+                    f"$enddefinitions $end\n#{num_lines * 10}\n")
+
+    out.write("\n--- UVM Report Summary ---\n\n** Report counts by severity\n")
+    for severity, count in counts.items():
+        out.write(f"{severity} : {count:4d}\n")
+    out.write(f"$finish called from file \"uvm_root.svh\", line 527.\n"
+              f"           V C S   S i m u l a t i o n   R e p o r t\n"
+              f"Time: {num_lines * 10} ns\n")
+    out.flush()
+
+    cm_dir = option_value(args, "-cm_dir")
+    if cm_dir:
+        name = option_value(args, "-cm_name", test)
+        write_items(f"{cm_dir}.vdb", covered_items(config, test, seed), [name])
+    return 0
+
+
+def write_text_report(report_dir, items, config):
+    """modinfo.txt in the layout of a urg text report"""
+    os.makedirs(report_dir, exist_ok=True)
+    universe = coverage_universe(config)
+    with open(os.path.join(report_dir, "modinfo.txt"), 'w') as f:
+        module = None
+        for mod, line in universe:
+            if mod != module:
+                module = mod
+                f.write(f"\nLine Coverage for Module : {module}\n\n"
+                        f"             Line No.   Total   Covered  Percent\n")
+            hit = f"{mod}:{line}" in items
+            f.write(f"ALWAYS       {line:6d}       1       {int(hit)}   {100.0 * hit:6.2f}\n")
+    with open(os.path.join(report_dir, "dashboard.txt"), 'w') as f:
+        f.write(f"Total Coverage Summary\nSCORE  LINE\n{100.0 * len(items) / len(universe):6.2f}\n")
+
+
+def fake_urg(args, config):
+    """Pretend to merge databases and write reports"""
+    databases, i = [], 0
+    while i < len(args):
+        if args[i] == "-dir":
+            i += 1
+            while i < len(args) and not args[i].startswith("-"):
+                databases.append(args[i])
+                i += 1
+            continue
+        i += 1
+
+    missing = [db for db in databases if not os.path.isdir(db)]
+    if missing:
+        print(f"Error: database {missing[0]} not found", file=sys.stderr)
+        return 1
+
+    items, tests = set(), set()
+    for db in databases:
+        items |= read_items(db)
+        if os.path.exists(os.path.join(db, "tests.txt")):
+            with open(os.path.join(db, "tests.txt")) as f:
+                tests.update(line.strip() for line in f if line.strip())
+    time.sleep(config['merge_time'] * len(databases))
+
+    dbname = option_value(args, "-dbname")
+    if dbname:
+        write_items(dbname, items, tests)
+
+    report_dir = option_value(args, "-report")
+    if report_dir and option_value(args, "-format") in ("text", "both"):
+        write_text_report(report_dir, items, config)
+    elif report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+        with open(os.path.join(report_dir, "dashboard.html"), 'w') as f:
+            f.write(f"<html><body>{len(items)} items covered</body></html>\n")
+    return 0
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 2
+
+    config = load_config()
+    tool, args = sys.argv[1], sys.argv[2:]
+    if tool == "vcs":
+        return fake_vcs(args, config)
+    if tool == "simv" and args:
+        return fake_simv(args[0], args[1:], config)
+    if tool == "urg":
+        return fake_urg(args, config)
+    print(f"fake_tools.py: unknown tool {tool}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+File-system job queue daemon, a local stand-in for LSF/Slurm
+Serves jobs submitted by run_sim.py with executor.backend: local_queue
+
+Queue layout (executor.local_queue.dir, default job_queue/):
+  pending/<id>.json  submitted, waiting for a free slot
+  running/<id>.json  claimed by a daemon and running
+  done/<id>.json     finished, with exit code
+  cancel/<id>        cancellation request for a running job
+  logs/<id>.out      output of the job script itself
+
+Jobs are claimed with an atomic rename, so several daemons (also on
+different hosts sharing the directory) can serve the same queue.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+STATES = ("pending", "running", "done", "cancel", "logs")
+
+
+def job_file(queue_dir, state, job_id):
+    return os.path.join(queue_dir, state, f"{job_id}.json")
+
+
+def finish(queue_dir, job, returncode, cancelled=False):
+    """Publish the result, then drop the running entry"""
+    job.update({'exit_code': returncode, 'cancelled': cancelled, 'finished_at': time.time()})
+    job.pop('env', None)
+    tmp_file = job_file(queue_dir, "done", job['id']) + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_file, job_file(queue_dir, "done", job['id']))
+    os.remove(job_file(queue_dir, "running", job['id']))
+    cancel_file = os.path.join(queue_dir, "cancel", job['id'])
+    if os.path.exists(cancel_file):
+        os.remove(cancel_file)
+
+
+def claim(queue_dir):
+    """Oldest pending job, moved to running/, or None"""
+    pending_dir = os.path.join(queue_dir, "pending")
+    for name in sorted(n for n in os.listdir(pending_dir) if n.endswith(".json")):
+        job_id = name[:-len(".json")]
+        try:
+            os.rename(job_file(queue_dir, "pending", job_id), job_file(queue_dir, "running", job_id))
+        except FileNotFoundError:
+            continue  # Taken by another daemon or cancelled
+        with open(job_file(queue_dir, "running", job_id), 'r') as f:
+            return json.load(f)
+    return None
+
+
+def start(queue_dir, job):
+    log = open(os.path.join(queue_dir, "logs", f"{job['id']}.out"), 'w')
+    # The daemon's environment, with the variables the submitter passed on top
+    env = dict(os.environ, **job.get('env', {}))
+    proc = subprocess.Popen(["/bin/sh", job['script']], cwd=job['cwd'], env=env,
+                            stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    log.close()
+    print(f"[local_queue] started {job['id']} {job['name']} (pid {proc.pid})", flush=True)
+    return proc
+
+
+def kill(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def serve(queue_dir, slots, interval, once):
+    for state in STATES:
+        os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+
+    running = {}
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    try:
+        while not stopping:
+            for job_id, (job, proc) in list(running.items()):
+                cancelled = os.path.exists(os.path.join(queue_dir, "cancel", job_id))
+                if cancelled and proc.poll() is None:
+                    kill(proc)
+                    job['cancel_requested'] = True
+                if proc.poll() is not None:
+                    del running[job_id]
+                    finish(queue_dir, job, proc.returncode, job.get('cancel_requested', False))
+                    print(f"[local_queue] finished {job_id} {job['name']} (exit {proc.returncode})", flush=True)
+
+            while len(running) < slots:
+                job = claim(queue_dir)
+                if job is None:
+                    break
+                try:
+                    running[job['id']] = (job, start(queue_dir, job))
+                except OSError as e:
+                    print(f"[local_queue] could not start {job['id']}: {e}", flush=True)
+                    finish(queue_dir, job, 127)
+
+            if once and not running and not os.listdir(os.path.join(queue_dir, "pending")):
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for job_id, (job, proc) in running.items():
+            kill(proc)
+            proc.wait()
+            finish(queue_dir, job, proc.returncode, cancelled=True)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the run_sim.py file-system job queue")
+    parser.add_argument("--dir", default="job_queue", help="Queue directory (default: job_queue)")
+    parser.add_argument("--slots", type=int, default=os.cpu_count() or 1,
+                        help="Jobs run at the same time (default: number of cores)")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="Seconds between queue scans (default: 0.5)")
+    parser.add_argument("--once", action="store_true",
+                        help="Exit once the queue is empty and no job is running")
+    args = parser.parse_args()
+    return serve(args.dir, args.slots, args.interval, args.once)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
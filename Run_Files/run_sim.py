@@ -6,40 +6,1578 @@ Configurable build and simulation script using YAML configuration
 
 import yaml
 import argparse
+import asyncio
+import atexit
+import bisect
+import csv
+import fcntl
+import functools
+import signal
 import subprocess
+import tempfile
 import sys
 import os
 import shutil
 import glob
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import random
+import re
+import shlex
+import sqlite3
+import statistics
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@dataclass
+class SimJob:
+    """One simulation to run: a test, optionally pinned to a seed"""
+    test: str
+    seed: Optional[int] = None
+    image: Optional[str] = None
+    variant: Optional[str] = None
+    checkpoint: Optional[str] = None
+    point: Optional[dict] = None
+    
+    @property
+    def name(self):
+        """Unique name used for run directories and coverage databases"""
+        name = self.test if not self.point else f"{self.test}__{point_slug(self.point)}"
+        return name if self.seed is None else f"{name}_seed{self.seed}"
+
+
+@dataclass
+class TestResult:
+    """Outcome of a single simulation job"""
+    test: str
+    passed: bool
+    returncode: int
+    run_dir: str
+    log_file: str
+    wall_time: float = 0.0
+    seed: Optional[int] = None
+    errors: int = 0
+    fatals: int = 0
+    warnings: int = 0
+    killed_reason: Optional[str] = None
+    started_at: float = 0.0
+    debug_log: Optional[str] = None
+    debug_waves: Optional[str] = None
+    bucket: Optional[str] = None
+    point: Optional[dict] = None
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def sweep_values(value):
+    """Values of a swept parameter.
+    
+    A list sweeps its elements, {range: [start, stop, step]} counts from
+    start to stop inclusive, anything else is a single value.
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict) and 'range' in value:
+        start, stop, *step = value['range']
+        step = step[0] if step else 1
+        if not step:
+            raise ValueError(f"sweep range {value['range']} has a zero step")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [start + i * step for i in range(max(0, count))]
+        return [round(v, 12) if isinstance(v, float) else v for v in values]
+    return [value]
+
+
+def sweep_points(axes, mode="cartesian", samples=None, seed=None):
+    """Parameter points ({key: value}) of a sweep over axes ({key: values}).
+    
+    The Cartesian product of the axes, or in "sample" mode `samples`
+    distinct points of it drawn without building the whole product.
+    """
+    keys = list(axes)
+    sizes = [len(axes[key]) for key in keys]
+    total = math.prod(sizes)
+    if mode == "sample" and samples and samples < total:
+        indexes = sorted(random.Random(seed).sample(range(total), samples))
+    else:
+        indexes = range(total)
+    for index in indexes:
+        point = {}
+        for key, size in zip(reversed(keys), reversed(sizes)):
+            index, position = divmod(index, size)
+            point[key] = axes[key][position]
+        yield {key: point[key] for key in keys}
+
+
+def point_order(point):
+    """Sort key of a parameter point, numbers in numeric order"""
+    return tuple((0, value, "") if isinstance(value, (int, float)) else (1, 0, str(value))
+                 for value in (point or {}).values())
+
+
+def point_slug(point):
+    """File-name safe rendering of a parameter point"""
+    return "_".join(re.sub(r"[^\w.-]+", "", f"{key}-{value}") for key, value in point.items())
+
+
+def list_entry(test, seed=None, point=None):
+    """One "test [seed] [key=value ...]" line of a --test-list"""
+    fields = [test] + ([] if seed is None else [str(seed)])
+    fields += [f"{key}={value}" for key, value in (point or {}).items()]
+    return " ".join(fields)
+
+
+def slug_point(slug, axes):
+    """Parameter point of a point_slug, matched against the sweep axes, or None"""
+    point = {}
+    for key, values in axes.items():
+        matches = [value for value in values
+                   if slug == point_slug({key: value}) or slug.startswith(f"{point_slug({key: value})}_")]
+        if not matches:
+            return None
+        point[key] = max(matches, key=lambda value: len(point_slug({key: value})))
+        slug = slug[len(point_slug({key: point[key]})) + 1:]
+    return point if not slug else None
+
+
+class LogWatcher:
+    """Scan simulator output line by line and decide when to stop a run.
+    
+    Counts UVM_ERROR/UVM_FATAL/UVM_WARNING messages and reports a kill
+    reason once a fatal or hang signature is seen, the error threshold is
+    reached, the simulator has been silent for idle_timeout seconds or has
+    run longer than simulation.job_timeout seconds.
+    """
+    
+    def __init__(self, config):
+        watch_config = config.get('simulation', {}).get('log_watch', {})
+        self.enabled = watch_config.get('enabled', True)
+        self.fatal_re = self._compile(watch_config.get('fatal_patterns', [r"^UVM_FATAL(?!\s*:)"]))
+        self.error_re = self._compile(watch_config.get('error_patterns', [r"^UVM_ERROR(?!\s*:)"]))
+        self.warning_re = self._compile(watch_config.get('warning_patterns', [r"^UVM_WARNING(?!\s*:)"]))
+        self.hang_re = self._compile(watch_config.get('hang_patterns', []))
+        self.max_errors = watch_config.get('max_errors', 0)
+        self.idle_timeout = watch_config.get('idle_timeout', 0)
+        self.job_timeout = config.get('simulation', {}).get('job_timeout', 0)
+        
+        self.errors = 0
+        self.fatals = 0
+        self.warnings = 0
+        self.kill_reason = None
+        self.cancelled = False
+        self.started = self.last_output = time.monotonic()
+    
+    @staticmethod
+    def _compile(patterns):
+        return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+    
+    def feed(self, line):
+        """Account for one output line, return the kill reason if the run should stop"""
+        self.last_output = time.monotonic()
+        if self.fatal_re and self.fatal_re.search(line):
+            self.fatals += 1
+            self.kill_reason = self.kill_reason or f"fatal: {line.strip()[:200]}"
+        elif self.error_re and self.error_re.search(line):
+            self.errors += 1
+            if self.max_errors and self.errors >= self.max_errors:
+                self.kill_reason = self.kill_reason or f"error limit reached ({self.errors} errors)"
+        elif self.warning_re and self.warning_re.search(line):
+            self.warnings += 1
+        elif self.hang_re and self.hang_re.search(line):
+            self.kill_reason = self.kill_reason or f"hang: {line.strip()[:200]}"
+        return self.kill_reason if self.enabled else None
+    
+    def idle_expired(self):
+        """True if the simulator has produced no output for idle_timeout seconds"""
+        if not (self.enabled and self.idle_timeout):
+            return False
+        if time.monotonic() - self.last_output < self.idle_timeout:
+            return False
+        self.kill_reason = self.kill_reason or f"hang: no output for {self.idle_timeout}s"
+        return True
+    
+    def timed_out(self):
+        """True once the run has taken longer than job_timeout seconds"""
+        if not self.job_timeout or time.monotonic() - self.started < self.job_timeout:
+            return False
+        self.kill_reason = self.kill_reason or f"timeout after {format_duration(self.job_timeout)}"
+        return True
+    
+    def cancel(self, reason=None):
+        """Mark the run as cancelled by the user or a regression timeout"""
+        self.cancelled = True
+        self.kill_reason = self.kill_reason or reason or "cancelled"
+    
+    def check_interval(self):
+        """How often idle_expired()/timed_out() need checking, None if never"""
+        return 1.0 if (self.enabled and self.idle_timeout) or self.job_timeout else None
+
+
+LOG_EXTENSIONS = {'gzip': ".gz", 'zstd': ".zst"}
+UVM_SEVERITY_RE = re.compile(r"^(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)(?!\s*:)")
+
+
+class CompressedLog:
+    """Write-only text log compressed in independent blocks, with a message index.
+    
+    A new gzip member (or zstd frame) is started every block_size
+    uncompressed bytes, so a reader can start decompressing at any block.
+    The sidecar index <log>.idx records where each block starts and the
+    uncompressed offset, line number and severity of every indexed UVM
+    message, which is enough to seek straight to the first error.
+    """
+    
+    def __init__(self, path, fmt="gzip", level=6, block_size=1 << 20,
+                 index_severities=("UVM_WARNING", "UVM_ERROR", "UVM_FATAL")):
+        self.path = path
+        self.fmt = fmt
+        self.level = level
+        self.block_size = block_size
+        self.index_severities = set(index_severities)
+        self.file = open(path, 'wb')
+        self.stream = None
+        self.blocks = []
+        self.messages = []
+        self.counts = Counter()
+        self.offset = 0
+        self.lines = 0
+        self.block_bytes = 0
+    
+    def start_block(self):
+        self.blocks.append([self.file.tell(), self.offset, self.lines])
+        if self.fmt == "zstd":
+            self.stream = zstandard.ZstdCompressor(level=self.level).stream_writer(self.file, closefd=False)
+        else:
+            self.stream = gzip.GzipFile(fileobj=self.file, mode='wb', compresslevel=self.level, mtime=0)
+        self.block_bytes = 0
+    
+    def end_block(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+    
+    def write(self, text):
+        """Append one or more complete lines"""
+        for line in text.splitlines(keepends=True):
+            match = UVM_SEVERITY_RE.match(line)
+            if match:
+                self.counts[match.group(1)] += 1
+                if match.group(1) in self.index_severities:
+                    self.messages.append([self.offset, self.lines + 1, match.group(1)])
+            if self.stream is None or self.block_bytes >= self.block_size:
+                self.end_block()
+                self.start_block()
+            data = line.encode('utf-8', errors='replace')
+            self.stream.write(data)
+            self.offset += len(data)
+            self.block_bytes += len(data)
+            self.lines += line.endswith("\n")
+    
+    def close(self):
+        self.end_block()
+        self.file.close()
+        index = {'format': self.fmt, 'bytes': self.offset, 'lines': self.lines,
+                 'counts': dict(self.counts), 'blocks': self.blocks, 'messages': self.messages}
+        with open(f"{self.path}.idx", 'w') as f:
+            json.dump(index, f)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_log_index(path):
+    """Sidecar index of a compressed log, or None"""
+    try:
+        with open(f"{path}.idx", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def open_log(path, offset=0):
+    """Read a plain, .gz or .zst log as text, starting at an uncompressed byte offset.
+    
+    Compressed logs with an index start decompressing at the block holding
+    the offset instead of at the beginning of the file.
+    """
+    if not path.endswith((".gz", ".zst")):
+        f = open(path, 'rb')
+        f.seek(offset)
+        return io.TextIOWrapper(f, encoding='utf-8', errors='replace')
+    
+    raw = open(path, 'rb')
+    skip = offset
+    index = load_log_index(path) if offset else None
+    if index and index['blocks']:
+        block = index['blocks'][max(0, bisect.bisect_right([b[1] for b in index['blocks']], offset) - 1)]
+        raw.seek(block[0])
+        skip = offset - block[1]
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raw.close()
+            raise RuntimeError(f"reading {path} needs the zstandard module")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    else:
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    while skip > 0:
+        skipped = len(stream.read(min(skip, 1 << 20)))
+        if not skipped:
+            break
+        skip -= skipped
+    return io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+
+
+def first_message(path, severities=("UVM_ERROR", "UVM_FATAL")):
+    """(line number, text) of the first message of one of the severities, or None.
+    
+    Uses the index of a compressed log to decompress only from that
+    message on; plain or unindexed logs are scanned.
+    """
+    index = load_log_index(path)
+    if index is not None:
+        for offset, line_no, severity in index['messages']:
+            if severity in severities:
+                with open_log(path, offset) as f:
+                    return line_no, f.readline().rstrip("\n")
+        return None
+    with open_log(path) as f:
+        for line_no, line in enumerate(f, 1):
+            match = UVM_SEVERITY_RE.match(line)
+            if match and match.group(1) in severities:
+                return line_no, line.rstrip("\n")
+    return None
+
+
+# Rules turning a failure message into a signature shared by failures with the same cause
+SIGNATURE_RULES = [
+    (re.compile(r"\b0x[0-9a-fA-F_]+\b"), "0x<H>"),
+    (re.compile(r"\b\d*'[sS]?[hHdDbBoO][0-9a-fA-FxXzZ_?]+"), "'<V>"),
+    (re.compile(r"@\s*\d+(?:\.\d+)?\s*(?:fs|ps|ns|us|ms|s)?\b"), "@ <T>"),
+    # Whole numbers with an optional time unit (100ns); digits inside names (r10, stage2) stay
+    (re.compile(r"(?<!\w)\d+(?:\.\d+)?(?:fs|ps|ns|us|ms|s)?(?!\w|\.\d)"), "<N>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def failure_signature(message):
+    """Normalise numbers, addresses and times out of a failure message"""
+    for pattern, replacement in SIGNATURE_RULES:
+        message = pattern.sub(replacement, message)
+    return message.strip()
+
+
+class RunHistory:
+    """SQLite store of every compile and simulation run.
+    
+    Shared by concurrent run_sim.py invocations; sqlite serialises the
+    writers. Used to order regressions longest-first and to estimate their
+    completion time. The database is only opened (and created) on first
+    use, so commands that never record a run leave no file behind.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            test TEXT,
+            seed INTEGER,
+            config_hash TEXT,
+            started_at REAL,
+            wall_time REAL,
+            status TEXT,
+            exit_code INTEGER,
+            log_file TEXT
+        );
+        CREATE INDEX IF NOT EXISTS runs_kind_test ON runs (kind, test);
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+    
+    @property
+    def conn(self):
+        """Connection to the database, opened on first use (callers hold self.lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+    
+    def empty(self):
+        """True while no database exists yet, so queries need not create one"""
+        return self._conn is None and not os.path.exists(self.path)
+    
+    def record(self, kind, test, seed, config_hash, started_at, wall_time, passed, exit_code, log_file):
+        """Store one finished run"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (kind, test, seed, config_hash, started_at, wall_time, status, exit_code, log_file) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, test, seed, config_hash, started_at, wall_time,
+                 "pass" if passed else "fail", exit_code, log_file))
+    
+    def expected_runtimes(self, tests, samples=10):
+        """Median wall time of the last passing simulations of each test"""
+        estimates = {}
+        if self.empty():
+            return estimates
+        with self.lock:
+            for test in set(tests):
+                rows = self.conn.execute(
+                    "SELECT wall_time FROM runs WHERE kind = 'simulate' AND test = ? AND status = 'pass' "
+                    "ORDER BY id DESC LIMIT ?", (test, samples)).fetchall()
+                if rows:
+                    estimates[test] = statistics.median(r[0] for r in rows)
+        return estimates
+    
+    def summary(self):
+        """Per test: number of runs, pass count, median and max wall time"""
+        if self.empty():
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT test, COUNT(*), SUM(status = 'pass'), MAX(wall_time) FROM runs "
+                "WHERE kind = 'simulate' GROUP BY test ORDER BY test").fetchall()
+        medians = self.expected_runtimes([r[0] for r in rows], samples=1000)
+        return [(test, runs, passes, medians.get(test), longest) for test, runs, passes, longest in rows]
+
+
+class MetricsCollector:
+    """Wall time, child CPU time and peak RSS per phase and per child process.
+    
+    Phases nest (a report generated at the end of a merge is its own phase),
+    and the wall time of a phase excludes the phases nested inside it. Child
+    processes are attributed to the innermost phase running when they start.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.processes = []
+        self.phase_times = []
+        self._stack = []
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a phase of the flow"""
+        now = time.monotonic()
+        if self._stack:
+            parent = self._stack[-1]
+            parent['wall_time'] += now - parent['resumed_at']
+        entry = {'phase': name, 'wall_time': 0.0, 'resumed_at': now}
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            now = time.monotonic()
+            self._stack.pop()
+            entry['wall_time'] += now - entry['resumed_at']
+            if self._stack:
+                self._stack[-1]['resumed_at'] = now
+            with self.lock:
+                self.phase_times.append((name, entry['wall_time']))
+    
+    def current_phase(self):
+        """Name of the innermost running phase"""
+        return self._stack[-1]['phase'] if self._stack else "other"
+    
+    def record_process(self, phase, name, wall_time, usage, exit_code):
+        """Store the resource usage of one finished child process"""
+        with self.lock:
+            self.processes.append({
+                'phase': phase,
+                'name': name,
+                'wall_time': round(wall_time, 3),
+                'cpu_user': round(usage.ru_utime, 3) if usage else None,
+                'cpu_system': round(usage.ru_stime, 3) if usage else None,
+                'max_rss_kb': usage.ru_maxrss if usage else None,
+                'exit_code': exit_code,
+            })
+    
+    def phase_summary(self):
+        """Per phase: wall time, summed child CPU time, largest child RSS"""
+        summary = {}
+        for name, wall_time in self.phase_times:
+            entry = summary.setdefault(name, {'phase': name, 'wall_time': 0.0, 'cpu_user': 0.0,
+                                              'cpu_system': 0.0, 'max_rss_kb': 0, 'processes': 0})
+            entry['wall_time'] += wall_time
+        for proc in self.processes:
+            entry = summary.setdefault(proc['phase'], {'phase': proc['phase'], 'wall_time': 0.0,
+                                                       'cpu_user': 0.0, 'cpu_system': 0.0,
+                                                       'max_rss_kb': 0, 'processes': 0})
+            entry['processes'] += 1
+            entry['cpu_user'] += proc['cpu_user'] or 0.0
+            entry['cpu_system'] += proc['cpu_system'] or 0.0
+            entry['max_rss_kb'] = max(entry['max_rss_kb'], proc['max_rss_kb'] or 0)
+        for entry in summary.values():
+            for key in ('wall_time', 'cpu_user', 'cpu_system'):
+                entry[key] = round(entry[key], 3)
+        return list(summary.values())
+    
+    def write(self, metrics_config):
+        """Export the collected metrics as JSON/CSV and optionally OpenMetrics text"""
+        output_dir = metrics_config.get('output_dir', 'metrics')
+        formats = metrics_config.get('formats', ['json'])
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+        base = os.path.join(output_dir, f"run_{stamp}_{os.getpid()}")
+        phases = self.phase_summary()
+        written = []
+        
+        if formats:
+            os.makedirs(output_dir, exist_ok=True)
+        if 'json' in formats:
+            with open(f"{base}.json", 'w') as f:
+                json.dump({'started_at': self.started_at, 'wall_time': round(time.time() - self.started_at, 3),
+                           'phases': phases, 'processes': self.processes}, f, indent=2)
+            written.append(f"{base}.json")
+        if 'csv' in formats:
+            fields = ['kind', 'phase', 'name', 'wall_time', 'cpu_user', 'cpu_system', 'max_rss_kb',
+                      'exit_code', 'processes']
+            with open(f"{base}.csv", 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields, restval='')
+                writer.writeheader()
+                for entry in phases:
+                    writer.writerow({'kind': 'phase', 'name': entry['phase'], **entry})
+                for proc in self.processes:
+                    writer.writerow({'kind': 'process', **proc})
+            written.append(f"{base}.csv")
+        
+        openmetrics_file = metrics_config.get('openmetrics_file')
+        if openmetrics_file:
+            os.makedirs(os.path.dirname(openmetrics_file) or '.', exist_ok=True)
+            gauges = [('wall_seconds', 'wall_time', 'Wall time of the phase'),
+                      ('cpu_user_seconds', 'cpu_user', 'User CPU time of child processes'),
+                      ('cpu_system_seconds', 'cpu_system', 'System CPU time of child processes'),
+                      ('max_rss_bytes', 'max_rss_kb', 'Peak RSS of the largest child process'),
+                      ('processes', 'processes', 'Number of child processes')]
+            # Write then rename so a scraper never reads a partial file
+            tmp_file = f"{openmetrics_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                for metric, key, help_text in gauges:
+                    f.write(f"# TYPE run_sim_phase_{metric} gauge\n")
+                    f.write(f"# HELP run_sim_phase_{metric} {help_text}.\n")
+                    for entry in phases:
+                        value = entry[key] * 1024 if key == 'max_rss_kb' else entry[key]
+                        f.write(f'run_sim_phase_{metric}{{phase="{entry["phase"]}"}} {value}\n')
+                f.write("# EOF\n")
+            os.replace(tmp_file, openmetrics_file)
+            written.append(openmetrics_file)
+        
+        return written
+
+
+def timed_phase(name):
+    """Decorator recording a SimRunner method as a metrics phase"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def memory_available_mb():
+    """MemAvailable from /proc/meminfo in MB, None where it cannot be read"""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+async def reap_child(proc):
+    """Reap a Popen child with wait4 and return its resource usage.
+    
+    wait4 is polled with WNOHANG so the event loop keeps serving the other
+    children; asyncio's own subprocess support would reap them without rusage.
+    """
+    delay = 0.001
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return usage
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+
+def uncancel():
+    """Withdraw a cancellation request the current task has handled itself"""
+    task = asyncio.current_task()
+    if task is not None and hasattr(task, 'uncancel'):  # Python 3.11+
+        task.uncancel()
+
+
+async def reap_child_shielded(proc, on_cancel=None):
+    """reap_child() that cancellation cannot interrupt.
+    
+    A cancelled caller keeps waiting until the child is reaped, so it is
+    never left a zombie and its resource usage is kept; on_cancel() is
+    called on every cancellation, e.g. to stop the child. Returns the usage
+    and whether a cancellation arrived meanwhile; the caller decides whether
+    to re-raise it.
+    """
+    reap = asyncio.ensure_future(reap_child(proc))
+    cancelled = False
+    while True:
+        try:
+            return await asyncio.shield(reap), cancelled
+        except asyncio.CancelledError:
+            cancelled = True
+            uncancel()
+            if on_cancel:
+                on_cancel()
+
+
+async def pipe_reader(pipe, limit=1 << 24):
+    """StreamReader over a child's output pipe, and the transport to close after EOF"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader, transport
+
+
+async def gather_limited(coros, limit):
+    """Await coroutines with at most `limit` of them running at a time, results in order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+class ProgressLine:
+    """Live running/passed/failed/ETA status of a set of jobs.
+    
+    On a terminal the status line is redrawn in place below the regular
+    output; otherwise it is printed as a normal line every `interval`
+    seconds. Expected durations come from the run history, falling back to
+    the mean of the jobs finished so far.
+    """
+    
+    def __init__(self, names, workers, expected=None, interval=30.0):
+        self.total = len(names)
+        self.queued = set(names)
+        self.workers = workers
+        self.expected = expected or {}
+        self.tty = sys.stdout.isatty()
+        self.interval = 1.0 if self.tty else interval
+        self.running = {}
+        self.passed = 0
+        self.failed = 0
+        self.durations = []
+    
+    @property
+    def done(self):
+        return self.passed + self.failed
+    
+    def started(self, name):
+        self.queued.discard(name)
+        self.running[name] = time.monotonic()
+    
+    def finished(self, name, passed, wall_time):
+        self.running.pop(name, None)
+        self.durations.append(wall_time)
+        if passed:
+            self.passed += 1
+        else:
+            self.failed += 1
+    
+    def eta(self):
+        """Estimated time until all jobs are done, None without estimates"""
+        default = statistics.mean(self.durations) if self.durations else None
+        now = time.monotonic()
+        remaining = []
+        for name, started in self.running.items():
+            expected = self.expected.get(name, default)
+            if expected is None:
+                return None
+            remaining.append(max(0.0, expected - (now - started)))
+        for name in self.queued:
+            expected = self.expected.get(name, default)
+            if expected is None:
+                return None
+            remaining.append(expected)
+        return estimate_makespan(remaining, self.workers)
+    
+    def status(self):
+        eta = self.eta()
+        line = (f"⏳ [{self.done}/{self.total}] running {len(self.running)}, passed {self.passed}, "
+                f"failed {self.failed}, queued {len(self.queued)}")
+        return line + (f", ETA {format_duration(eta)}" if eta is not None and self.done < self.total else "")
+    
+    def say(self, message):
+        """Print a message above the status line"""
+        if self.tty:
+            sys.stdout.write(f"\r\033[K{message}\n{self.status()}")
+            sys.stdout.flush()
+        else:
+            print(message)
+    
+    def draw(self):
+        if self.tty:
+            sys.stdout.write(f"\r\033[K{self.status()}")
+            sys.stdout.flush()
+        else:
+            print(self.status())
+    
+    async def run(self):
+        """Redraw the status every interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.draw()
+    
+    def close(self):
+        if self.tty:
+            sys.stdout.write("\r\033[K")
+            sys.stdout.flush()
+
+
+class LicenseSemaphore:
+    """Counting semaphore over license tokens, shared by all run_sim.py processes on a host.
+    
+    Each token is a slot file locked with flock; the kernel drops the lock
+    when its holder exits, so tokens of crashed or killed runners are never
+    leaked.
+    """
+    
+    def __init__(self, lock_dir, feature, tokens):
+        self.feature = feature
+        self.slots = [os.path.join(lock_dir, f"{feature}.{i}.lock") for i in range(tokens)]
+        os.makedirs(lock_dir, exist_ok=True)
+    
+    def try_acquire(self):
+        """Lock a free slot without blocking, return its file or None"""
+        for slot in self.slots:
+            f = open(slot, 'a')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except BlockingIOError:
+                f.close()
+        return None
+    
+    @staticmethod
+    def release(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+
+class ResourceGate:
+    """Admits jobs only while cores, memory and license tokens are free.
+    
+    Cores are accounted per runner against max_cpus. A job needs its
+    declared memory both unreserved by this runner's admitted jobs and
+    free in /proc/meminfo (after memory_reserve_mb), which also covers
+    other processes on the host. Licenses come from LicenseSemaphores.
+    A job larger than the whole host is admitted alone.
+    """
+    
+    def __init__(self, config):
+        self.config = config.get('resources', {})
+        self.max_cpus = self.config.get('max_cpus') or os.cpu_count() or 1
+        self.memory_reserve = self.config.get('memory_reserve_mb', 0)
+        self.poll_interval = self.config.get('poll_interval', 1.0)
+        lock_dir = self.config.get('lock_dir', '/tmp/run_sim_licenses')
+        self.licenses = {feature: LicenseSemaphore(lock_dir, feature, tokens)
+                         for feature, tokens in (self.config.get('licenses') or {}).items()}
+        available = memory_available_mb()
+        self.memory_total = available - self.memory_reserve if available is not None else None
+        self.cond = threading.Condition()
+        self.cpus_used = 0
+        self.memory_used = 0
+        self.running = 0
+    
+    def request(self, test=None, kind="simulate"):
+        """Declared cpus, memory_mb and license of a simulate (per test) or compile job"""
+        request = {'cpus': 1, 'memory_mb': 0, 'license': None}
+        request.update(self.config.get(kind) or {})
+        if kind == "simulate" and test:
+            request.update((self.config.get('tests') or {}).get(test) or {})
+        return request
+    
+    def blocked_by(self, request):
+        """What keeps a job from starting now, or None"""
+        if self.running == 0:
+            return None
+        if self.cpus_used + request['cpus'] > self.max_cpus:
+            return "cores"
+        if self.memory_total is not None:
+            available = memory_available_mb()
+            if (self.memory_used + request['memory_mb'] > self.memory_total
+                    or (available is not None and available - self.memory_reserve < request['memory_mb'])):
+                return "memory"
+        return None
+    
+    def try_admit(self, request):
+        """Reserve a job's resources if it can start now.
+        
+        Returns (True, license token or None) when admitted, (False, what it
+        waits for) otherwise.
+        """
+        semaphore = self.licenses.get(request['license'])
+        with self.cond:
+            reason = self.blocked_by(request)
+            token = None
+            if reason is None and semaphore:
+                token = semaphore.try_acquire()
+                reason = None if token else f"a {semaphore.feature} license"
+            if reason:
+                return False, reason
+            self.cpus_used += request['cpus']
+            self.memory_used += request['memory_mb']
+            self.running += 1
+            return True, token
+    
+    def release(self, request, token):
+        if token:
+            LicenseSemaphore.release(token)
+        with self.cond:
+            self.cpus_used -= request['cpus']
+            self.memory_used -= request['memory_mb']
+            self.running -= 1
+            self.cond.notify_all()
+    
+    @contextmanager
+    def reserve(self, request, name):
+        """Block the calling thread until the job is admitted, hold its resources while it runs"""
+        waiting = None
+        while True:
+            admitted, detail = self.try_admit(request)
+            if admitted:
+                break
+            if detail != waiting:
+                print(f"⏳ {name} waiting for {detail}")
+                waiting = detail
+            with self.cond:
+                self.cond.wait(self.poll_interval)
+        try:
+            yield
+        finally:
+            self.release(request, detail)
+    
+    @asynccontextmanager
+    async def reserve_async(self, request, name, say=print):
+        """reserve() for jobs running on the event loop"""
+        waiting = None
+        while True:
+            admitted, detail = self.try_admit(request)
+            if admitted:
+                break
+            if detail != waiting:
+                say(f"⏳ {name} waiting for {detail}")
+                waiting = detail
+            await asyncio.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            self.release(request, detail)
+
+
+class ToolBackend:
+    """Command prefixes for the EDA tools driven by the flow (real Synopsys tools)"""
+    
+    name = "synopsys"
+    
+    def __init__(self, config):
+        self.config = config
+        # Variables the tools need on top of run_sim.py's own environment
+        self.env = {}
+    
+    def command(self, tool, image=None):
+        """argv prefix for vcs, urg or a compiled simv image"""
+        if tool == "simv":
+            return [image]
+        return [tool]
+    
+    def child_env(self):
+        """env= for tool processes (None: inherit run_sim.py's environment unchanged)"""
+        return dict(os.environ, **self.env) if self.env else None
+
+
+class FakeToolBackend(ToolBackend):
+    """Routes vcs, simv and urg to fake_tools.py.
+    
+    The fake tools produce logs, exit codes and .vdb directories in the same
+    shape as the real ones, with outcomes and run times controlled by the
+    tools.fake config section.
+    """
+    
+    name = "fake"
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_tools.py")
+    
+    def __init__(self, config):
+        super().__init__(config)
+        fake_config = config.get('tools', {}).get('fake', {})
+        self.env = {'RUN_SIM_FAKE_CONFIG': json.dumps(fake_config)}
+    
+    def command(self, tool, image=None):
+        cmd = [sys.executable, "-S", self.script, tool]
+        if tool == "simv":
+            cmd.append(image)
+        return cmd
+
+
+TOOL_BACKENDS = {backend.name: backend for backend in (ToolBackend, FakeToolBackend)}
+
+
+class LocalExecutor:
+    """Runs simulation jobs as child processes of run_sim.py"""
+    
+    name = "local"
+    
+    def __init__(self, runner):
+        self.runner = runner
+    
+    async def run_async(self, cmd, log_file, cwd, name, request=None):
+        """Run cmd in cwd to completion, return the exit code and the LogWatcher.
+        
+        request holds the job's declared resources (see ResourceGate); the
+        local executor is admitted by the gate before it is called.
+        Cancelling the task stops the job.
+        """
+        return await self.runner.run_watched_async(cmd, log_file, cwd=cwd, name=name)
+    
+    def reset(self):
+        """Forget an earlier cancel_all() before a new set of jobs"""
+    
+    def cancel_all(self):
+        """Stop every outstanding job (local jobs are stopped by cancelling their tasks)"""
+
+
+class BatchExecutor(LocalExecutor, ABC):
+    """Submits simulation jobs to a batch queue and follows their logs.
+    
+    Each job is a small shell script in its run directory that writes the
+    simulator output to the log and its exit status to an exit_code file,
+    so run directories must be on a file system shared with the execution
+    hosts. The log is tailed through a LogWatcher while the job runs and
+    the job is cancelled when the watcher reports a kill reason. Subclasses
+    implement submit, poll_jobs and cancel for one queueing system.
+    
+    The states of all outstanding jobs are fetched by a single poller thread
+    with one queue query every poll_interval, however many jobs are in
+    flight; the threads following the jobs wait for its next round.
+    """
+    
+    PENDING, RUNNING, DONE = "pending", "running", "done"
+    
+    # Threads following batch jobs, only started as jobs are in flight
+    MAX_THREADS = 1024
+    
+    def __init__(self, runner):
+        super().__init__(runner)
+        executor_config = runner.config.get('executor', {})
+        self.options = executor_config.get(self.name) or {}
+        self.poll_interval = executor_config.get('poll_interval', 5)
+        self.cancelled = threading.Event()
+        self.threads = None
+        # Shared by the poller thread and the job threads
+        self.round = threading.Condition()
+        self.generation = 0
+        self.outstanding = set()
+        self.states = {}
+        self.poller = None
+    
+    @abstractmethod
+    def submit(self, script, name, cwd, request=None):
+        """Queue a job script, return its job id or None if submission failed"""
+    
+    @abstractmethod
+    def poll_jobs(self, job_ids):
+        """{job id: PENDING, RUNNING or DONE} from one query for all job_ids.
+        
+        Jobs the queue no longer knows are DONE; jobs missing from the
+        result (e.g. after a transient query failure) count as RUNNING.
+        """
+    
+    @abstractmethod
+    def cancel(self, job_id):
+        """Remove a job from the queue, killing it if it already runs"""
+    
+    def wait_state(self, job_id, interruptible=True):
+        """State of job_id from the poller's next round.
+        
+        Returns early with the last known state once the executor is
+        cancelled, unless interruptible is False.
+        """
+        with self.round:
+            self.outstanding.add(job_id)
+            if self.poller is None:
+                self.poller = threading.Thread(target=self.poll_loop, name=f"{self.name}-poll", daemon=True)
+                self.poller.start()
+            self.round.notify_all()
+            generation = self.generation
+            while self.generation == generation and not (interruptible and self.cancelled.is_set()):
+                self.round.wait()
+            state = self.states.get(job_id, self.RUNNING)
+            if state == self.DONE:
+                self.outstanding.discard(job_id)
+                self.states.pop(job_id, None)
+            return state
+    
+    def poll_loop(self):
+        """Poller thread: query the states of all outstanding jobs every poll_interval"""
+        while True:
+            with self.round:
+                while not self.outstanding:
+                    self.round.wait()
+                job_ids = sorted(self.outstanding)
+            try:
+                states = self.poll_jobs(job_ids)
+            except Exception as e:
+                print(f"❌ {self.name} status query failed: {e}")
+                states = {}
+            with self.round:
+                self.states.update(states)
+                self.generation += 1
+                self.round.notify_all()
+            time.sleep(self.poll_interval)
+    
+    def query(self, cmd):
+        """Run a queue command, return its stdout or None if it failed"""
+        result = self.query_result(cmd)
+        if result is None or result.returncode != 0:
+            return None
+        return result.stdout
+    
+    def query_result(self, cmd):
+        """Run a queue command, return the CompletedProcess or None if it could not start"""
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True)
+        except OSError as e:
+            print(f"❌ {cmd[0]} failed: {e}")
+            return None
+    
+    def write_script(self, cmd, log_file, cwd):
+        script = os.path.join(os.path.abspath(cwd), "job.sh")
+        with open(script, 'w') as f:
+            f.write("#!/bin/sh\n")
+            for key, value in sorted(self.runner.backend.env.items()):
+                f.write(f"export {key}={shlex.quote(value)}\n")
+            f.write(f"cd {shlex.quote(os.path.abspath(cwd))} || exit 1\n"
+                    f"{shlex.join(cmd)} > {shlex.quote(os.path.abspath(log_file))} 2>&1\n"
+                    "echo $? > exit_code\n")
+        os.chmod(script, 0o755)
+        return script
+    
+    def collect(self, cwd, log_file, watcher, stopped):
+        """Exit code of a finished job; notes a stop by the watcher in its log"""
+        exit_file = os.path.join(cwd, "exit_code")
+        for _ in range(1 if stopped else 3):
+            # Give a shared file system a moment to show the file
+            try:
+                with open(exit_file, 'r') as f:
+                    returncode = int(f.read().strip())
+                break
+            except (OSError, ValueError):
+                if not stopped:
+                    time.sleep(1.0)
+        else:
+            returncode = -signal.SIGTERM if stopped else -1
+        if stopped:
+            with open(log_file, 'a') as f:
+                f.write(f"\n*** run_sim.py: stopping simulation ({watcher.kill_reason}) ***\n")
+        return returncode
+    
+    async def run_async(self, cmd, log_file, cwd, name, request=None):
+        """Follow the blocking submit/poll loop of run() in a worker thread"""
+        if self.threads is None:
+            self.threads = ThreadPoolExecutor(max_workers=self.MAX_THREADS, thread_name_prefix=self.name)
+        future = asyncio.get_running_loop().run_in_executor(
+            self.threads, self.run, cmd, log_file, cwd, name, request)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The whole set of jobs is being cancelled; wait for this one to be collected
+            self.cancel_all()
+            returncode, watcher = await future
+            watcher.cancel(self.runner.stop_reason)
+            return returncode, watcher
+    
+    def run(self, cmd, log_file, cwd, name, request=None):
+        """Submit a job, follow its log until it is done, return the exit code and the LogWatcher"""
+        # The job writes a plain log, compressed once it is collected
+        plain_log = log_file
+        for ext in LOG_EXTENSIONS.values():
+            if log_file.endswith(ext):
+                plain_log = log_file[:-len(ext)]
+        returncode, watcher = self.run_batch(cmd, plain_log, cwd, name, request)
+        if plain_log != log_file:
+            self.runner.compress_log(plain_log, log_file)
+        return returncode, watcher
+    
+    def run_batch(self, cmd, log_file, cwd, name, request):
+        watcher = LogWatcher(self.runner.config)
+        phase = self.runner.metrics.current_phase()
+        start = time.monotonic()
+        for path in (log_file, os.path.join(cwd, "exit_code")):
+            if os.path.exists(path):
+                os.remove(path)
+        
+        job_id = None if self.cancelled.is_set() else self.submit(self.write_script(cmd, log_file, cwd), name, cwd, request)
+        if job_id is None:
+            if self.cancelled.is_set():
+                watcher.cancel(self.runner.stop_reason)
+            watcher.kill_reason = watcher.kill_reason or f"{self.name} submission failed"
+            open(log_file, 'w').close()
+            return -1, watcher
+        
+        position, pending, stopped = 0, b"", False
+        while True:
+            # Blocks until the poller's next round, or until cancel_all()
+            state = self.wait_state(job_id, interruptible=not stopped)
+            if state == self.PENDING:
+                # Queue time counts neither as idle nor against the job timeout
+                watcher.started = watcher.last_output = time.monotonic()
+            
+            # Read new output after polling, so the last lines are seen once the job is done
+            if os.path.exists(log_file):
+                with open(log_file, 'rb') as f:
+                    f.seek(position)
+                    data = f.read()
+                    position = f.tell()
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    watcher.feed(line.decode('utf-8', errors='replace') + "\n")
+            
+            if state == self.DONE:
+                break
+            reason = watcher.kill_reason if watcher.enabled else None
+            if self.cancelled.is_set() and not stopped:
+                watcher.cancel(self.runner.stop_reason)
+            if not stopped and (reason or watcher.idle_expired() or watcher.timed_out() or watcher.cancelled):
+                stopped = True
+                self.cancel(job_id)
+        
+        if pending:
+            watcher.feed(pending.decode('utf-8', errors='replace'))
+        returncode = self.collect(cwd, log_file, watcher, stopped)
+        self.runner.metrics.record_process(phase, name, time.monotonic() - start, None, returncode)
+        return returncode, watcher
+    
+    def reset(self):
+        self.cancelled.clear()
+    
+    def cancel_all(self):
+        with self.round:
+            self.cancelled.set()
+            # Wake the job threads so they cancel their jobs right away
+            self.round.notify_all()
+
+
+class LsfExecutor(BatchExecutor):
+    """IBM Spectrum LSF: bsub, bjobs and bkill"""
+    
+    name = "lsf"
+    STATES = {'PEND': "pending", 'PSUSP': "pending", 'WAIT': "pending",
+              'RUN': "running", 'USUSP': "running", 'SSUSP': "running"}
+    
+    def submit(self, script, name, cwd, request=None):
+        cmd = ["bsub", "-J", name, "-cwd", os.path.abspath(cwd), "-o", os.path.join(os.path.abspath(cwd), "lsf.out")]
+        if request:
+            cmd += ["-n", str(request['cpus'])]
+            if request['memory_mb']:
+                cmd += ["-R", f"rusage[mem={request['memory_mb']}]"]
+            if request['license']:
+                cmd += ["-R", f"rusage[{request['license']}=1]"]
+        cmd += self.options.get('submit_options', []) + [script]
+        output = self.query(cmd)
+        match = re.search(r"Job <(\d+)>", output or "")
+        if not match:
+            print(f"❌ bsub failed for {name}")
+            return None
+        return match.group(1)
+    
+    def poll_jobs(self, job_ids):
+        # bjobs lists known jobs on stdout and "Job <id> is not found" on stderr
+        result = self.query_result(["bjobs", "-noheader", "-o", "jobid stat"] + job_ids)
+        if result is None or (result.returncode != 0 and not result.stdout.strip()
+                              and "is not found" not in result.stderr):
+            return {}  # Transient bjobs failure, ask again later
+        states = dict.fromkeys(job_ids, self.DONE)
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0] in states:
+                states[fields[0]] = self.STATES.get(fields[1], self.DONE)
+        return states
+    
+    def cancel(self, job_id):
+        self.query(["bkill", job_id])
+
+
+class SlurmExecutor(BatchExecutor):
+    """Slurm: sbatch, squeue and scancel"""
+    
+    name = "slurm"
+    STATES = {'PENDING': "pending", 'CONFIGURING': "pending", 'REQUEUED': "pending",
+              'RUNNING': "running", 'COMPLETING': "running", 'SUSPENDED': "running"}
+    
+    def submit(self, script, name, cwd, request=None):
+        cmd = ["sbatch", "--parsable", "-J", name, "-D", os.path.abspath(cwd),
+               "-o", os.path.join(os.path.abspath(cwd), "slurm.out")]
+        if request:
+            cmd.append(f"--cpus-per-task={request['cpus']}")
+            if request['memory_mb']:
+                cmd.append(f"--mem={request['memory_mb']}M")
+            if request['license']:
+                cmd.append(f"--licenses={request['license']}")
+        cmd += self.options.get('submit_options', []) + [script]
+        output = self.query(cmd)
+        if not output or not output.strip():
+            print(f"❌ sbatch failed for {name}")
+            return None
+        return output.strip().split(";")[0]
+    
+    def poll_jobs(self, job_ids):
+        # squeue forgets finished jobs: missing from the output, or an error naming the id
+        result = self.query_result(["squeue", "-h", "-j", ",".join(job_ids), "-o", "%i %T"])
+        if result is None or (result.returncode != 0 and "Invalid job id" not in result.stderr):
+            return {}  # Transient squeue failure (e.g. slurmctld timeout), ask again later
+        states = dict.fromkeys(job_ids, self.DONE)
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0] in states:
+                states[fields[0]] = self.STATES.get(fields[1], self.DONE)
+        return states
+    
+    def cancel(self, job_id):
+        self.query(["scancel", job_id])
+
+
+class LocalQueueExecutor(BatchExecutor):
+    """File-system job queue served by local_queue.py, a stand-in for a batch farm.
+    
+    Jobs are JSON files moved between pending/, running/ and done/ under
+    the queue directory; cancel/ holds cancellation requests.
+    """
+    
+    name = "local_queue"
+    
+    # Variables passed to jobs when executor.local_queue.env is not set
+    ENV = ["PATH", "HOME", "USER", "LANG", "TMPDIR", "VCS_HOME", "SNPSLMD_LICENSE_FILE",
+           "LM_LICENSE_FILE", "DESIGN_RTL_DIR"]
+    
+    def __init__(self, runner):
+        super().__init__(runner)
+        self.queue_dir = self.options.get('dir', 'job_queue')
+        self.env = self.options.get('env') or self.ENV
+        for sub in ("pending", "running", "done", "cancel"):
+            os.makedirs(os.path.join(self.queue_dir, sub), exist_ok=True)
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+    
+    def job_file(self, state, job_id):
+        return os.path.join(self.queue_dir, state, f"{job_id}.json")
+    
+    def submit(self, script, name, cwd, request=None):
+        with self.lock:
+            job_id = f"{time.time_ns()}_{os.getpid()}_{next(self.counter)}"
+        # Only allow-listed variables, job files are plain text in a shared directory
+        env = {key: os.environ[key] for key in self.env if key in os.environ}
+        job = {'id': job_id, 'name': name, 'script': script, 'cwd': os.path.abspath(cwd),
+               'env': env, 'submitted_at': time.time()}
+        tmp_file = self.job_file("pending", job_id) + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_file, self.job_file("pending", job_id))
+        return job_id
+    
+    def poll_jobs(self, job_ids):
+        return {job_id: self.poll(job_id) for job_id in job_ids}
+    
+    def poll(self, job_id):
+        for state in (self.DONE, self.RUNNING, self.PENDING):
+            if os.path.exists(self.job_file(state, job_id)):
+                return state
+        # Moved between directories while we looked, ask again later
+        return self.RUNNING
+    
+    def cancel(self, job_id):
+        try:
+            # Not claimed by the daemon yet: finish it here
+            os.remove(self.job_file("pending", job_id))
+            with open(self.job_file("done", job_id), 'w') as f:
+                json.dump({'id': job_id, 'cancelled': True}, f)
+        except FileNotFoundError:
+            open(os.path.join(self.queue_dir, "cancel", job_id), 'w').close()
+
+
+EXECUTORS = {executor.name: executor for executor in (LocalExecutor, LsfExecutor, SlurmExecutor, LocalQueueExecutor)}
+
+
+def estimate_makespan(durations, workers):
+    """Completion time of durations run longest-first on `workers` slots"""
+    slots = [0.0] * max(1, min(workers, len(durations)))
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots) if durations else 0.0
+
+
+def format_duration(seconds):
+    """Render seconds as h:mm:ss"""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+# Extensions hashed when walking +incdir+ directories for the build cache
+HEADER_EXTENSIONS = ('.sv', '.svh', '.v', '.vh', '.svi', '.inc')
+
+# VCS options taking the next argument as a value (not a source file), and
+# options whose next argument is a file the compile reads
+VCS_VALUE_OPTIONS = {'-top', '-o', '-l', '-ntb_opts', '-CFLAGS', '-LDFLAGS', '-cm', '-cm_dir', '-cm_name',
+                     '-cm_hier', '-cm_log', '-assert', '-y', '-Mdir', '-e', '-timescale'}
+VCS_FILE_OPTIONS = {'-v', '-P'}
+
+# Section headers and table rows of urg text reports (modinfo.txt)
+URG_SECTION_RE = re.compile(r"^(Line|Cond|Condition|Branch|FSM|Toggle) Coverage for Module\s*:\s*(\S+)")
+URG_ROW_RE = re.compile(r"^\s*([A-Z_]+)\s+(\d+)\s+(\d+)\s+(\d+)\s+[\d.]+\s*$")
+
+
+def parse_urg_items(report_dir):
+    """Collect the covered items of a urg text report.
+    
+    Every numbered row of a module's line/cond/branch/FSM/toggle table is an
+    item, identified by module, metric, construct and source line. An item
+    counts as covered if the row reports at least one covered point.
+    """
+    items = set()
+    for report in glob.glob(os.path.join(report_dir, "modinfo*.txt")):
+        section = None
+        with open(report, 'r', errors='replace') as f:
+            for line in f:
+                header = URG_SECTION_RE.match(line)
+                if header:
+                    section = (header.group(2), header.group(1).lower())
+                    continue
+                row = URG_ROW_RE.match(line) if section else None
+                if row and int(row.group(4)) > 0:
+                    kind, line_no = row.group(1), row.group(2)
+                    items.add(f"{section[0]}:{section[1]}:{kind}:{line_no}")
+    return items
+
+
+# Design units declared in a SystemVerilog file and the headers it includes
+SV_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+SV_UNIT_RE = re.compile(r"^[ \t]*(?:virtual[ \t]+)?(module|macromodule|interface|program|package|class)"
+                        r"[ \t]+(?:automatic[ \t]+|static[ \t]+)?(\w+)", re.M)
+SV_INCLUDE_RE = re.compile(r'^[ \t]*`include[ \t]+"([^"]+)"', re.M)
+
+# Unit kinds that urg reports coverage for, by module name
+COVERED_UNIT_KINDS = ('module', 'macromodule', 'interface', 'program')
+
+
+def scan_sources(sources, incdirs):
+    """Content hash, declared design units and resolved `include targets of
+    every source file and of every header reachable from them.
+    
+    Includes resolve against the including file's directory, then the
+    +incdir+ directories, like VCS. Unreadable files get a None hash.
+    """
+    files = {}
+    queue = list(sources)
+    while queue:
+        path = os.path.normpath(queue.pop())
+        if path in files:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            files[path] = {'hash': None, 'units': [], 'includes': []}
+            continue
+        text = SV_COMMENT_RE.sub("", data.decode('utf-8', errors='replace'))
+        includes = []
+        for name in SV_INCLUDE_RE.findall(text):
+            for base in [os.path.dirname(path)] + incdirs:
+                candidate = os.path.normpath(os.path.join(base, name))
+                if os.path.isfile(candidate):
+                    includes.append(candidate)
+                    break
+        files[path] = {'hash': hashlib.sha256(data).hexdigest(),
+                       'units': [list(unit) for unit in SV_UNIT_RE.findall(text)],
+                       'includes': includes}
+        queue.extend(includes)
+    return files
+
+
+def affected_units(files, path):
+    """Design units a change to path can affect.
+    
+    A file's own declarations; a header without any stands for the units
+    of the files including it, followed up the include chain.
+    """
+    includers = {}
+    for source, entry in files.items():
+        for header in entry['includes']:
+            includers.setdefault(header, []).append(source)
+    units, seen, stack = set(), set(), [path]
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        own = files.get(current, {}).get('units', [])
+        if own:
+            units.update(tuple(unit) for unit in own)
+        else:
+            stack.extend(includers.get(current, []))
+    return units
+
 
 class SimRunner:
     def __init__(self, config_file="sim_config.yaml"):
         self.config_file = config_file
         self.config = self.load_config()
         self.coverage_databases = []
+        self.force_compile = False
+        self.metrics = MetricsCollector()
+        self.progress = None
+        self.stop_reason = None
+        self.set_backend(self.config.get('tools', {}).get('backend', 'synopsys'))
+        self.set_executor(self.config.get('executor', {}).get('backend', 'local'))
+        self.resources = None
+        if self.config.get('resources', {}).get('enabled', False):
+            self.resources = ResourceGate(self.config)
+        self.history = None
+        history_config = self.config.get('history', {})
+        if history_config.get('enabled', False):
+            self.history = RunHistory(history_config.get('database', 'run_history.db'))
         
     def load_config(self):
         """Load configuration from YAML file"""
         try:
             with open(self.config_file, 'r') as f:
-                return yaml.safe_load(f)
+                config = yaml.safe_load(f)
         except FileNotFoundError:
             print(f"Error: Configuration file {self.config_file} not found")
             sys.exit(1)
         except yaml.YAMLError as e:
             print(f"Error parsing YAML config: {e}")
             sys.exit(1)
+        
+        jobs = (config.get('regression') or {}).get('jobs', 1)
+        if isinstance(jobs, bool) or not isinstance(jobs, int) or jobs < 1:
+            print(f"Error: regression.jobs in {self.config_file} must be an integer of at least 1, got {jobs!r}")
+            sys.exit(1)
+        return config
+    
+    def set_backend(self, name):
+        """Select the tool backend (synopsys or fake)"""
+        if name not in TOOL_BACKENDS:
+            print(f"Error: unknown tool backend '{name}' (choose from {', '.join(TOOL_BACKENDS)})")
+            sys.exit(1)
+        self.backend = TOOL_BACKENDS[name](self.config)
     
-    def build_vcs_command(self, test_name=None):
-        """Build VCS compilation command from configuration"""
-        cmd = ["vcs"]
+    def set_executor(self, name):
+        """Select where simulation jobs run (local, lsf, slurm or local_queue)"""
+        if name not in EXECUTORS:
+            print(f"Error: unknown executor '{name}' (choose from {', '.join(EXECUTORS)})")
+            sys.exit(1)
+        self.executor = EXECUTORS[name](self)
+    
+    def test_defines(self, test_name=None):
+        """Preprocessor defines ("NAME" or "NAME=VALUE") a test is compiled with"""
+        defines = list(self.config['build'].get('defines') or [])
+        if test_name:
+            defines += self.config['test'].get('test_defines', {}).get(test_name) or []
+            if self.config['build'].get('image_pool', {}).get('test_name_define', True):
+                defines.append(f"TEST_NAME={test_name}")
+        return defines
+    
+    def image_dir(self, test_name=None, variant=None):
+        """Pool directory of the image a test runs on, shared by equal define sets"""
+        pool_dir = self.config['build'].get('image_pool', {}).get('dir', 'images')
+        defines = json.dumps(sorted(set(self.test_defines(test_name))))
+        key = hashlib.sha256(defines.encode()).hexdigest()[:12]
+        return os.path.join(pool_dir, f"{variant}_{key}" if variant else key)
+    
+    def uses_image_pool(self, test_names):
+        """Whether a multi-test run compiles into the image pool.
+        
+        The pool is opt-in (build.image_pool.enabled), except for runs that
+        need images of their own: two-pass variants, checkpoints and tests
+        with test_defines.
+        """
+        if self.config['build'].get('image_pool', {}).get('enabled', False):
+            return True
+        if self.two_pass_config().get('enabled', False) or self.checkpoint_config().get('enabled', False):
+            return True
+        test_defines = self.config['test'].get('test_defines', {})
+        return any(test_defines.get(test_name) for test_name in test_names)
+    
+    def two_pass_config(self):
+        """regression.two_pass section of the configuration"""
+        return self.config.get('regression', {}).get('two_pass', {})
+    
+    def checkpoint_config(self):
+        """simulation.checkpoint section of the configuration"""
+        return self.config['simulation'].get('checkpoint', {})
+    
+    def dumps_waves(self, variant=None):
+        """Whether images of a variant are built with wave dumping"""
+        return self.config['build']['wave_dump'] if variant is None else variant == "debug"
+    
+    def build_vcs_command(self, test_name=None, image_dir=None, variant=None):
+        """Build VCS compilation command from configuration.
+        
+        With image_dir, simv, csrc and the compile log are placed in that
+        directory so several images can be built side by side. The "fast"
+        variant drops wave dumping and the two-pass debug_options (also from
+        the file list, through a filtered copy), the "debug" variant forces
+        both on and leaves coverage out.
+        """
+        cmd = self.backend.command("vcs")
         
         # Add base VCS options
-        cmd.extend(self.config['build']['vcs_options'])
+        vcs_options = list(self.config['build']['vcs_options'])
+        debug_options = self.two_pass_config().get('debug_options', [])
+        if variant == "fast":
+            vcs_options = [opt for opt in vcs_options if opt not in debug_options]
+        elif variant == "debug":
+            vcs_options += [opt for opt in debug_options if opt not in vcs_options]
+        cmd.extend(vcs_options)
         
         # Add coverage options if enabled
-        if self.config['build']['coverage']['enabled']:
+        if self.config['build']['coverage']['enabled'] and variant != "debug":
             coverage_types = "+".join(self.config['build']['coverage']['types'])
             cmd.extend(["-cm", coverage_types])
             
@@ -51,25 +1589,47 @@ class SimRunner:
                         cmd.append(opt)
         
         # Add file list
-        cmd.extend(["-f", "cv32e40p_vcs.f"])
+        file_list = "cv32e40p_vcs.f"
+        if variant == "fast" and debug_options:
+            file_list = self.filter_file_list(file_list, debug_options,
+                                              os.path.join(image_dir or "", "cv32e40p_vcs_fast.f"))
+        cmd.extend(["-f", file_list])
         
-        # Add test-specific defines if test is specified
-        if test_name:
-            cmd.extend([f"+define+TEST_NAME={test_name}"])
+        # Add global and test-specific defines
+        cmd.extend(f"+define+{define}" for define in self.test_defines(test_name))
         
         # Add wave dump options
-        if self.config['build']['wave_dump']:
+        if self.dumps_waves(variant):
             wave_format = self.config['simulation']['waves']['format']
             if wave_format == "vcd":
                 cmd.extend(["+vcs+dumpvars"])
             elif wave_format == "fsdb":
                 cmd.extend(["+fsdb+all"])
         
+        if image_dir:
+            if "-l" in cmd:
+                idx = cmd.index("-l") + 1
+                cmd[idx] = os.path.join(image_dir, os.path.basename(cmd[idx]))
+            cmd.extend([f"-Mdir={os.path.join(image_dir, 'csrc')}", "-o", os.path.join(image_dir, "simv")])
+        
         return cmd
     
-    def build_simv_command(self, test_name):
-        """Build simulation command from configuration"""
-        cmd = ["./simv"]
+    def build_simv_command(self, test_name, simv="./simv", seed=None, variant=None,
+                           checkpoint=None, save=False, point=None):
+        """Build simulation command from configuration.
+        
+        A two-pass variant ("fast" or "debug") sets its own UVM verbosity;
+        the fast pass writes no waves and the debug pass no coverage.
+        With a checkpoint directory the run restores its snapshot through a
+        UCLI do-script (save=True writes the snapshot instead, without
+        coverage); a restored run applies its seed with the reseed plusarg.
+        A sweep point sets its plusargs over test_params and the configured
+        plusargs; without one swept test_params run their first value.
+        """
+        cmd = self.backend.command("simv", simv)
+        restore = checkpoint is not None and not save
+        cov_name = SimJob(test_name, seed, point=point).name
+        verbosity = self.two_pass_config().get(f"{variant}_verbosity") if variant else None
         
         # Add test name
         cmd.append(f"+UVM_TESTNAME={test_name}")
@@ -78,21 +1638,30 @@ class SimRunner:
         for plusarg in self.config['simulation']['plusargs']:
             if plusarg == "+UVM_TESTNAME":
                 continue  # Already added above
+            if verbosity and plusarg.startswith("+UVM_VERBOSITY="):
+                continue  # Replaced by the variant's verbosity below
+            if point and plusarg[1:].split("=", 1)[0] in point:
+                continue  # Swept, added with the test parameters below
             cmd.append(plusarg)
+        if verbosity:
+            cmd.append(f"+UVM_VERBOSITY={verbosity}")
         
         # Add test-specific parameters
-        if test_name in self.config['test']['test_params']:
-            params = self.config['test']['test_params'][test_name]
-            for key, value in params.items():
-                cmd.append(f"+{key}={value}")
+        params = {key: sweep_values(value)[0]
+                  for key, value in (self.config['test']['test_params'].get(test_name) or {}).items()}
+        params.update(point or {})
+        for key, value in params.items():
+            cmd.append(f"+{key}={value}")
         
-        # Add seed configuration
+        # Add seed configuration (an explicit seed overrides seed_mode)
         seed_mode = self.config['simulation']['seed_mode']
-        if seed_mode == "fixed":
-            cmd.append(f"+ntb_random_seed={self.config['simulation']['fixed_seed']}")
+        seed_arg = self.checkpoint_config().get('reseed_plusarg', "+ntb_random_reseed") if restore else "+ntb_random_seed"
+        if seed is not None:
+            cmd.append(f"{seed_arg}={seed}")
+        elif seed_mode == "fixed":
+            cmd.append(f"{seed_arg}={self.config['simulation']['fixed_seed']}")
         elif seed_mode == "random":
-            import random
-            cmd.append(f"+ntb_random_seed={random.randint(1, 2**31-1)}")
+            cmd.append(f"{seed_arg}={random.randint(1, 2**31-1)}")
         
         # Add timeout
         if self.config['simulation']['timeout']:
@@ -100,21 +1669,26 @@ class SimRunner:
         
         # Add wave dump file
         wave_file = self.config['simulation']['waves']['file']
-        if wave_file:
+        if wave_file and variant != "fast":
             cmd.append(f"+vcdfile={wave_file}")
         
+        # Save/restore a checkpoint through UCLI
+        if checkpoint is not None:
+            script = "save.do" if save else "restore.do"
+            cmd.extend(["-ucli", "-do", os.path.abspath(os.path.join(checkpoint, script))])
+        
         # Add coverage options if enabled
-        if self.config['build']['coverage']['enabled']:
-            coverage_dir = f"{self.config['build']['coverage']['output_dir']}_{test_name}"
+        if self.config['build']['coverage']['enabled'] and variant != "debug" and not save:
+            coverage_dir = self.coverage_dir(cov_name)
             cmd.extend(["-cm_dir", coverage_dir])
             
             # Add coverage simulation options
             if 'sim_options' in self.config['build']['coverage']:
                 for opt in self.config['build']['coverage']['sim_options']:
                     if opt == "-cm_name":
-                        cmd.extend([opt, test_name])
+                        cmd.extend([opt, cov_name])
                     elif opt == "-cm_log":
-                        cmd.extend([opt, f"coverage_{test_name}.log"])
+                        cmd.extend([opt, f"coverage_{cov_name}.log"])
                     else:
                         cmd.append(opt)
             
@@ -123,37 +1697,390 @@ class SimRunner:
                 for opt in self.config['build']['coverage']['compile_options']:
                     # Add runtime options that were skipped during compile
                     if '-cm_name' in opt:
-                        cmd.extend(["-cm_name", test_name])
+                        cmd.extend(["-cm_name", cov_name])
                     elif '-cm_log' in opt:
                         # Extract log filename and use it
-                        log_file = opt.split()[-1] if len(opt.split()) > 1 else f"coverage_{test_name}.log"
+                        log_file = opt.split()[-1] if len(opt.split()) > 1 else f"coverage_{cov_name}.log"
                         cmd.extend(["-cm_log", log_file])
         
         return cmd
     
+    def filter_file_list(self, file_list, drop, output):
+        """Copy of a -f file list without the options in drop, returns its path.
+        
+        Paths in a -f list are relative to the working directory, so the copy
+        can live anywhere. It is only rewritten when its content changes.
+        """
+        with open(file_list, 'r') as f:
+            lines = []
+            for line in f:
+                code, comment = (line.split('//', 1) + [None])[:2]
+                kept = [token for token in code.split() if token not in drop]
+                if kept != code.split():
+                    line = " ".join(kept) + (f" //{comment}" if comment is not None else "\n")
+                lines.append(line)
+        content = "".join(lines)
+        try:
+            with open(output, 'r') as f:
+                if f.read() == content:
+                    return output
+        except OSError:
+            pass
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w') as f:
+            f.write(content)
+        return output
+    
+    def expand_file_list(self, file_list, sources=None, incdirs=None, base_dir=""):
+        """Expand a VCS -f file list into source files and include directories.
+        
+        Paths in a -f list are relative to the working directory, paths in a
+        -F list are relative to the list itself (same rules as VCS).
+        """
+        with open(file_list, 'r') as f:
+            tokens = []
+            for line in f:
+                tokens.extend(line.split('//', 1)[0].split())
+        return self.collect_sources(tokens, sources, incdirs, base_dir)
+    
+    def collect_sources(self, tokens, sources=None, incdirs=None, base_dir=""):
+        """Source files and include directories named by VCS arguments.
+        
+        Follows -f/-F file lists; the values of options such as -top or -o
+        are not sources, the files after -v and -P are.
+        """
+        sources = [] if sources is None else sources
+        incdirs = [] if incdirs is None else incdirs
+        
+        i = 0
+        while i < len(tokens):
+            token = os.path.expandvars(tokens[i])
+            if token in ('-f', '-F') and i + 1 < len(tokens):
+                nested = os.path.join(base_dir, os.path.expandvars(tokens[i + 1]))
+                nested_base = os.path.dirname(nested) if token == '-F' else base_dir
+                if os.path.exists(nested):
+                    self.expand_file_list(nested, sources, incdirs, nested_base)
+                i += 1
+            elif token in VCS_FILE_OPTIONS and i + 1 < len(tokens):
+                sources.append(os.path.join(base_dir, os.path.expandvars(tokens[i + 1])))
+                i += 1
+            elif token in VCS_VALUE_OPTIONS:
+                i += 1
+            elif token.startswith('+incdir+'):
+                for inc in token[len('+incdir+'):].split('+'):
+                    if inc:
+                        incdirs.append(os.path.join(base_dir, inc))
+            elif not token.startswith(('-', '+')):
+                sources.append(os.path.join(base_dir, token))
+            i += 1
+        
+        return sources, incdirs
+    
+    def build_fingerprint(self, cmd):
+        """Hash everything that can change the compiled image.
+        
+        Covers the full VCS command line (options, defines, coverage and wave
+        flags), the contents of every file in the expanded file lists, of the
+        source files named on the command line itself (e.g. the DPI .cc in
+        vcs_options) and of every header reachable through +incdir+ directories.
+        """
+        digest = hashlib.sha256()
+        digest.update("\0".join(cmd).encode())
+        digest.update(os.environ.get('VCS_HOME', '').encode())
+        
+        sources, incdirs = [], []
+        for i, arg in enumerate(cmd):
+            if arg == "-f" and i + 1 < len(cmd):
+                sources.append(cmd[i + 1])
+        # Arguments after the tool launcher, which is not part of the build
+        self.collect_sources(cmd[len(self.backend.command("vcs")):], sources, incdirs)
+        
+        headers = set()
+        for inc in incdirs:
+            for root, _, files in os.walk(inc):
+                headers.update(os.path.join(root, name) for name in files
+                               if name.endswith(HEADER_EXTENSIONS))
+        
+        for path in sources + sorted(headers - set(sources)):
+            digest.update(f"\0{path}\0".encode())
+            try:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(chunk)
+            except OSError:
+                digest.update(b"<missing>")
+        
+        return digest.hexdigest()
+    
+    def cache_stamp_file(self, image_dir=None):
+        """File recording the fingerprint of the simv in image_dir (default: cwd)"""
+        cache_config = self.config['build'].get('cache', {})
+        return os.path.join(image_dir or "", cache_config.get('stamp_file', 'simv.build_hash'))
+    
+    def image_is_current(self, fingerprint, image_dir=None):
+        """True if simv exists and was built from the given fingerprint"""
+        simv = os.path.join(image_dir or "", "simv")
+        if not (os.path.exists(simv) and os.path.isdir(f"{simv}.daidir")):
+            return False
+        try:
+            with open(self.cache_stamp_file(image_dir), 'r') as f:
+                return json.load(f).get('fingerprint') == fingerprint
+        except (OSError, ValueError):
+            return False
+    
+    def config_hash(self):
+        """Short hash of the effective configuration, stored with every run"""
+        return hashlib.sha256(json.dumps(self.config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    def record_run(self, kind, test, seed, started_at, wall_time, passed, exit_code, log_file):
+        """Add a run to the history database, if enabled"""
+        if self.history:
+            self.history.record(kind, test, seed, self.config_hash(), started_at,
+                                wall_time, passed, exit_code, log_file)
+    
+    def run_process(self, cmd, name, capture=False):
+        """subprocess.run() that also records wall time, CPU time and peak RSS"""
+        return asyncio.run(self.run_process_async(cmd, name, capture))
+    
+    async def run_process_async(self, cmd, name, capture=False):
+        """run_process() for the event loop, so many children can be in flight.
+        
+        Captured output goes through temporary files rather than pipes so the
+        child can be reaped with wait4 without risking a pipe deadlock.
+        """
+        start = time.monotonic()
+        phase = self.metrics.current_phase()
+        out = tempfile.TemporaryFile(mode='w+') if capture else None
+        err = tempfile.TemporaryFile(mode='w+') if capture else None
+        try:
+            proc = subprocess.Popen(cmd, stdout=out, stderr=err, text=True, env=self.backend.child_env())
+            usage = await reap_child(proc)
+            stdout = stderr = None
+            if capture:
+                out.seek(0)
+                err.seek(0)
+                stdout, stderr = out.read(), err.read()
+        finally:
+            for f in (out, err):
+                if f:
+                    f.close()
+        self.metrics.record_process(phase, name, time.monotonic() - start, usage, proc.returncode)
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+    
+    def write_metrics(self):
+        """Export phase timings, called once when the runner exits"""
+        metrics_config = self.config.get('metrics', {})
+        if not metrics_config.get('enabled', False) or not self.metrics.phase_times:
+            return
+        for path in self.metrics.write(metrics_config):
+            print(f"📈 Metrics written to {path}")
+    
+    @timed_phase("compile")
     def compile(self, test_name=None):
         """Compile the design"""
         print("=" * 60)
         print("COMPILATION PHASE")
         print("=" * 60)
         
-        cmd = self.build_vcs_command(test_name)
-        print(f"Running: {' '.join(cmd)}")
+        return self.build_image(test_name)
+    
+    @timed_phase("compile")
+    def compile_images(self, test_names, jobs=1, variant=None):
+        """Compile one pooled image per distinct define set, in parallel.
+        
+        Returns {test: image_dir} for every test whose image was built or
+        found current in the build cache.
+        """
+        groups = {}
+        for test_name in test_names:
+            groups.setdefault(self.image_dir(test_name, variant), []).append(test_name)
+        
+        workers = max(1, min(jobs, len(groups)))
+        print("=" * 60)
+        print(f"COMPILATION PHASE ({len(groups)} images for {len(test_names)} tests, {workers} in parallel)")
+        print("=" * 60)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {image_dir: pool.submit(self.build_image, tests[0], image_dir, variant)
+                       for image_dir, tests in groups.items()}
+            built = {image_dir: future.result() for image_dir, future in futures.items()}
+        
+        return {test_name: image_dir for image_dir, tests in groups.items()
+                if built[image_dir] for test_name in tests}
+    
+    @timed_phase("checkpoint")
+    def prepare_checkpoints(self, sim_jobs, jobs=1):
+        """Save one snapshot per (image, test) and point the jobs at it.
+        
+        The common prefix (reset, UVM build, boot) runs once up to
+        checkpoint.save_at and every job of that test restores from there.
+        The UVM test is constructed before the snapshot, so tests cannot
+        share one; seeds can, through the reseed plusarg. Runs dumping waves
+        start from time 0, and a test whose snapshot fails runs from time 0.
+        """
+        checkpoint_config = self.checkpoint_config()
+        selected = checkpoint_config.get('tests') or None
+        eligible = [job for job in sim_jobs if selected is None or job.test in selected]
+        if eligible and self.dumps_waves(eligible[0].variant):
+            print("⚠️  Checkpoints are skipped while waves are dumped, running from time 0")
+            return
+        
+        keys = list(dict.fromkeys((job.image, job.test, job.variant, point_slug(job.point or {}))
+                                  for job in eligible))
+        if not keys:
+            return
+        print("=" * 60)
+        print(f"CHECKPOINT PHASE ({len(keys)} snapshots at {checkpoint_config.get('save_at', '0')})")
+        print("=" * 60)
+        
+        points = {point_slug(job.point or {}): job.point for job in eligible}
+        saved = asyncio.run(gather_limited([self.save_checkpoint(image, test, variant, points[slug])
+                                            for image, test, variant, slug in keys], jobs))
+        checkpoints = dict(zip(keys, saved))
+        for job in eligible:
+            job.checkpoint = checkpoints[(job.image, job.test, job.variant, point_slug(job.point or {}))]
+    
+    async def save_checkpoint(self, image_dir, test_name, variant=None, point=None):
+        """Snapshot of a test (at a sweep point) on a pooled image, reused while image and command are unchanged.
+        
+        Returns the checkpoint directory, or None if the snapshot could not
+        be saved.
+        """
+        checkpoint_config = self.checkpoint_config()
+        checkpoint_dir = os.path.join(image_dir, "checkpoints", SimJob(test_name, point=point).name)
+        snapshot = os.path.abspath(os.path.join(checkpoint_dir, "snapshot"))
+        stamp_file = os.path.join(checkpoint_dir, "checkpoint.json")
+        simv = os.path.abspath(os.path.join(image_dir, "simv"))
+        cmd = self.build_simv_command(test_name, simv=simv, seed=checkpoint_config.get('seed', 1),
+                                      variant=variant, checkpoint=checkpoint_dir, save=True, point=point)
+        
+        # A rebuilt image changes the simv, whose snapshots are then stale
+        digest = hashlib.sha256("\0".join(cmd).encode())
+        digest.update(str(checkpoint_config.get('save_at')).encode())
+        stat = os.stat(simv)
+        digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+        fingerprint = digest.hexdigest()
+        try:
+            with open(stamp_file, 'r') as f:
+                if json.load(f).get('fingerprint') == fingerprint and os.path.exists(snapshot):
+                    self.say(f"♻️  Reusing checkpoint of {test_name} in {checkpoint_dir}")
+                    return checkpoint_dir
+        except (OSError, ValueError):
+            pass
+        
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        for path in (stamp_file, snapshot):
+            if os.path.exists(path):
+                os.remove(path)
+        with open(os.path.join(checkpoint_dir, "save.do"), 'w') as f:
+            f.write(f"run {checkpoint_config.get('save_at', '0')}\nsave {snapshot}\nquit\n")
+        with open(os.path.join(checkpoint_dir, "restore.do"), 'w') as f:
+            f.write(f"restore {snapshot}\nrun\nquit\n")
+        
+        log_file = os.path.join(checkpoint_dir, "save.log")
+        self.say(f"Running: {' '.join(cmd)}")
+        returncode, watcher = await self.run_watched_async(cmd, log_file, cwd=checkpoint_dir,
+                                                           name=f"checkpoint {test_name}")
+        if returncode != 0 or watcher.errors or watcher.fatals or not os.path.exists(snapshot):
+            self.say(f"⚠️  Could not save a checkpoint of {test_name}, check {log_file}; running it from time 0")
+            return None
+        with open(stamp_file, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'command': cmd}, f, indent=2)
+        self.say(f"✅ Checkpoint of {test_name} saved to {checkpoint_dir}")
+        return checkpoint_dir
+    
+    def build_image(self, test_name=None, image_dir=None, variant=None):
+        """Run vcs for one image unless the build cache says it is current.
+        
+        Without image_dir simv is built in the working directory. Pooled
+        images may compile concurrently, so their vcs output only goes to
+        the compile log inside the image directory.
+        """
+        cmd = self.build_vcs_command(test_name, image_dir, variant)
+        label = f"[{os.path.basename(image_dir)}] " if image_dir else ""
+        
+        fingerprint = None
+        if self.config['build'].get('cache', {}).get('enabled', False):
+            fingerprint = self.build_fingerprint(cmd)
+            if not self.force_compile and self.image_is_current(fingerprint, image_dir):
+                print(f"♻️  {label}Build cache hit ({fingerprint[:12]}), reusing existing simv")
+                return True
+        
+        print(f"{label}Running: {' '.join(cmd)}")
+        
+        # Drop the stamp first so an interrupted build is never treated as current
+        stamp_file = self.cache_stamp_file(image_dir)
+        if image_dir:
+            os.makedirs(image_dir, exist_ok=True)
+        if os.path.exists(stamp_file):
+            os.remove(stamp_file)
         
         # Always run VCS directly without redirecting output
         # VCS will handle logging through its -l option if specified
-        result = subprocess.run(cmd)
+        # vcs always runs locally, so it is admitted whatever the executor
+        admission = (self.resources.reserve(self.resources.request(kind="compile"), f"{label}vcs")
+                     if self.resources else nullcontext())
+        with admission:
+            started_at = time.time()
+            result = self.run_process(cmd, "vcs", capture=bool(image_dir))
+        
+        # Check if -l option is in vcs_options to determine log file name
+        has_log_option = "-l" in cmd
+        if has_log_option:
+            log_file = cmd[cmd.index("-l") + 1]
+        else:
+            log_file = os.path.join(image_dir or "", self.config['logging']['compile_log'])
+            if image_dir:
+                with open(log_file, 'w') as f:
+                    f.write(result.stdout + result.stderr)
+        self.record_run("compile", test_name, None, started_at, time.time() - started_at,
+                        result.returncode == 0, result.returncode, log_file)
         
         if result.returncode != 0:
-            # Check if -l option is in vcs_options to determine log file name
-            has_log_option = any('-l' in opt for opt in self.config['build']['vcs_options'])
-            log_file = "comp.log" if has_log_option else self.config['logging']['compile_log']
-            print(f"❌ Compilation failed! Check {log_file} for details")
+            print(f"❌ {label}Compilation failed! Check {log_file} for details")
             return False
         else:
-            print("✅ Compilation successful!")
+            print(f"✅ {label}Compilation successful!")
+            if fingerprint:
+                with open(stamp_file, 'w') as f:
+                    json.dump({'fingerprint': fingerprint, 'command': cmd}, f, indent=2)
             return True
     
+    def log_compression(self):
+        """Effective logging.compression settings, or None for plain logs"""
+        compression = self.config['logging'].get('compression') or {}
+        if not compression.get('enabled', False):
+            return None
+        if compression.get('format', 'gzip') == "zstd" and zstandard is None:
+            print("⚠️  zstandard module not installed, compressing logs with gzip")
+            compression['format'] = "gzip"
+        return compression
+    
+    def log_path(self, log_file):
+        """Name of a simulation log, with the compression extension if enabled"""
+        compression = self.log_compression()
+        if compression:
+            return log_file + LOG_EXTENSIONS[compression.get('format', 'gzip')]
+        return log_file
+    
+    def open_log_writer(self, log_file):
+        """Plain file for logs without a compression extension, a CompressedLog otherwise"""
+        compression = self.log_compression()
+        if not compression or not log_file.endswith(tuple(LOG_EXTENSIONS.values())):
+            return open(log_file, 'w')
+        return CompressedLog(log_file, compression.get('format', 'gzip'), compression.get('level', 6),
+                             compression.get('block_size', 1 << 20),
+                             compression.get('index_severities', ["UVM_WARNING", "UVM_ERROR", "UVM_FATAL"]))
+    
+    def compress_log(self, plain_log, log_file):
+        """Compress a finished plain log into log_file and remove it"""
+        with open(plain_log, 'r', errors='replace') as src, self.open_log_writer(log_file) as dst:
+            for line in src:
+                dst.write(line)
+        os.remove(plain_log)
+    
+    @timed_phase("simulate")
     def simulate(self, test_name):
         """Run simulation"""
         print("=" * 60)
@@ -164,33 +2091,614 @@ class SimRunner:
         print(f"Running test: {test_name}")
         print(f"Command: {' '.join(cmd)}")
         
-        # Run simulation
+        # Run simulation; compressed logs are kept per test instead of overwritten
         log_file = self.config['logging']['simulation_log']
-        with open(log_file, 'w') as f:
-            result = subprocess.run(cmd, stdout=f, stderr=subprocess.STDOUT)
+        if self.log_compression():
+            run_dir = self.job_run_dir(SimJob(test_name))
+            os.makedirs(run_dir, exist_ok=True)
+            log_file = self.log_path(os.path.join(run_dir, os.path.basename(log_file)))
+        started_at = time.time()
+        returncode, watcher = self.run_watched(cmd, log_file, name=test_name)
+        print(f"UVM_ERROR: {watcher.errors}  UVM_FATAL: {watcher.fatals}  UVM_WARNING: {watcher.warnings}")
         
-        if result.returncode != 0:
+        passed = returncode == 0 and not watcher.errors and not watcher.fatals
+        self.record_run("simulate", test_name, None, started_at, time.time() - started_at,
+                        passed, returncode, log_file)
+        
+        if watcher.kill_reason:
+            print(f"🛑 Simulation stopped early ({watcher.kill_reason})")
+        if not passed:
             print(f"❌ Simulation failed! Check {log_file} for details")
             return False
         else:
             print("✅ Simulation completed successfully!")
             
-            # Track coverage database if coverage is enabled
-            if self.config['build']['coverage']['enabled']:
-                coverage_dir = f"{self.config['build']['coverage']['output_dir']}_{test_name}.vdb"
-                if os.path.exists(coverage_dir):
-                    self.coverage_databases.append(coverage_dir)
-                    print(f"📊 Coverage data saved to: {coverage_dir}")
-            
+            self.track_coverage(test_name)
             return True
     
+    def run_watched(self, cmd, log_file, cwd=None, name="simv"):
+        """Blocking run_watched_async(); Ctrl-C stops the simulator and raises KeyboardInterrupt"""
+        returncode, watcher = asyncio.run(self.run_watched_async(cmd, log_file, cwd, name))
+        if watcher.cancelled:
+            raise KeyboardInterrupt
+        return returncode, watcher
+    
+    async def run_watched_async(self, cmd, log_file, cwd=None, name="simv"):
+        """Run a simulator process, streaming its output to log_file through a LogWatcher.
+        
+        The process is terminated as soon as the watcher reports a kill
+        reason (including idle and job timeouts) or the task is cancelled.
+        Its remaining output is still logged and it is reaped with wait4, so
+        the exit code and resource usage are kept. Returns the exit code and
+        the watcher with the parsed counts.
+        """
+        watcher = LogWatcher(self.config)
+        phase = self.metrics.current_phase()
+        start = time.monotonic()
+        with self.open_log_writer(log_file) as f:
+            proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    env=self.backend.child_env())
+            try:
+                reader, transport = await pipe_reader(proc.stdout)
+            except asyncio.CancelledError:
+                self.stop_process(proc)
+                proc.stdout.close()
+                await reap_child_shielded(proc)
+                raise
+            stopping = False
+            try:
+                while True:
+                    reason = None
+                    try:
+                        line = await asyncio.wait_for(reader.readline(), watcher.check_interval())
+                    except asyncio.TimeoutError:
+                        line = None
+                    except asyncio.CancelledError:
+                        # Handled as a stop: the output is drained and the child reaped
+                        uncancel()
+                        watcher.cancel(self.stop_reason)
+                        line = None
+                    except ValueError:
+                        continue  # Line longer than the reader limit, dropped
+                    if line == b"":
+                        break
+                    if line:
+                        text = line.decode('utf-8', errors='replace')
+                        f.write(text)
+                        reason = watcher.feed(text)
+                    if not stopping and (reason or watcher.idle_expired() or watcher.timed_out()
+                                         or watcher.cancelled):
+                        stopping = True
+                        f.write(f"\n*** run_sim.py: stopping simulation ({watcher.kill_reason}) ***\n")
+                        self.stop_process(proc)
+            finally:
+                transport.close()
+            # The output is complete: a late cancellation stops the child but still reaps it
+            usage, _ = await reap_child_shielded(proc, on_cancel=lambda: self.stop_process(proc))
+        
+        self.metrics.record_process(phase, name, time.monotonic() - start, usage, proc.returncode)
+        return proc.returncode, watcher
+    
+    @staticmethod
+    def stop_process(proc, grace=5.0):
+        """Send SIGTERM to a child process and SIGKILL if it is still alive after grace seconds.
+        
+        Signals are sent by pid without polling, the child is only ever reaped
+        by reap_child() so its resource usage is not lost.
+        """
+        def send(sig):
+            if proc.returncode is None:
+                try:
+                    os.kill(proc.pid, sig)
+                except ProcessLookupError:
+                    pass
+        
+        send(signal.SIGTERM)
+        timer = threading.Timer(grace, send, args=(signal.SIGKILL,))
+        timer.daemon = True
+        timer.start()
+    
+    def coverage_dir(self, test_name):
+        """Coverage database path (without .vdb suffix) for a test"""
+        return f"{self.config['build']['coverage']['output_dir']}_{test_name}"
+    
+    def track_coverage(self, test_name):
+        """Record the coverage database of a finished test, if one was written"""
+        if not self.config['build']['coverage']['enabled']:
+            return
+        coverage_dir = f"{self.coverage_dir(test_name)}.vdb"
+        if os.path.exists(coverage_dir):
+            self.coverage_databases.append(coverage_dir)
+        elif isinstance(self.executor, BatchExecutor):
+            # Batch jobs write their databases on the execution host
+            self.say(f"⚠️  {test_name}: {coverage_dir} not found, coverage databases must be on a "
+                     f"file system shared with the {self.executor.name} execution hosts")
+            self.say(f"📊 Coverage data saved to: {coverage_dir}")
+    
+    def job_run_dir(self, job):
+        """Private working directory for a job in parallel mode"""
+        regression = self.config.get('regression', {})
+        run_dir = os.path.join(regression.get('run_dir', 'runs'), job.test)
+        if job.point:
+            run_dir = os.path.join(run_dir, point_slug(job.point))
+        if job.seed is not None:
+            run_dir = os.path.join(run_dir, f"seed_{job.seed}")
+        if job.variant == "debug":
+            run_dir = os.path.join(run_dir, "debug")
+        return run_dir
+    
+    def expand_seeds(self, test_names, num_seeds=None, seed_list=None):
+        """Fan each test out into one job per seed.
+        
+        An explicit seed list wins over num_seeds. Generated seeds come from
+        regression.base_seed when set, so a whole seed set can be regenerated.
+        """
+        if seed_list:
+            seeds = list(seed_list)
+        elif num_seeds:
+            base_seed = self.config.get('regression', {}).get('base_seed')
+            rng = random.Random(base_seed)
+            seeds = rng.sample(range(1, 2**31), num_seeds)
+        else:
+            return [SimJob(t) for t in test_names]
+        return [SimJob(t, seed) for t in test_names for seed in seeds]
+    
+    def sweep_axes(self, test_name):
+        """Swept parameters of a test, {plusarg: values}.
+        
+        test_params values given as a list or {range: [...]} are swept, as
+        are regression.sweep.plusargs, which apply to every test.
+        """
+        axes = {}
+        for key, value in (self.config['test']['test_params'].get(test_name) or {}).items():
+            if isinstance(value, (list, dict)):
+                axes[key] = sweep_values(value)
+        for key, value in (self.sweep_config().get('plusargs') or {}).items():
+            axes[key] = sweep_values(value)
+        return {key: values for key, values in axes.items() if values}
+    
+    def sweep_config(self):
+        return self.config.get('regression', {}).get('sweep', {})
+    
+    def expand_sweep(self, sim_jobs):
+        """Fan each job out into one job per point of its test's parameter sweep.
+        
+        Cartesian mode runs every combination of the swept values, sample
+        mode a reproducible random subset of regression.sweep.samples points
+        (the same points for every seed of a test).
+        """
+        sweep_config = self.sweep_config()
+        mode = sweep_config.get('mode', 'cartesian')
+        points = {}
+        for test in dict.fromkeys(job.test for job in sim_jobs if job.point is None):
+            axes = self.sweep_axes(test)
+            if axes:
+                points[test] = list(sweep_points(axes, mode, sweep_config.get('samples'),
+                                                 sweep_config.get('seed')))
+        if not points:
+            return sim_jobs
+        
+        expanded = []
+        for job in sim_jobs:
+            if job.point is not None or job.test not in points:
+                expanded.append(job)
+            else:
+                expanded.extend(replace(job, point=point) for point in points[job.test])
+        for test, test_points in points.items():
+            axes = ", ".join(f"{key}[{len(values)}]" for key, values in self.sweep_axes(test).items())
+            print(f"📊 Sweeping {test}: {len(test_points)} points over {axes} ({mode})")
+        return expanded
+    
+    def admit(self, request, name):
+        """Wait for a local job's resources; batch queues do their own admission"""
+        if request is None or self.executor.name != "local":
+            return nullcontext()
+        return self.resources.reserve_async(request, name, say=self.say)
+    
+    def say(self, message):
+        """Print a message, above the live progress line while one is shown"""
+        if self.progress:
+            self.progress.say(message)
+        else:
+            print(message)
+    
+    async def simulate_isolated(self, job):
+        """Run one simulation job in its own run directory.
+        
+        The job runs on its pooled image, or on the simv in the working
+        directory when it has none. Many jobs can run at once on the event
+        loop: the log, wave file and coverage log land in the job's run
+        directory, and the coverage database path is made absolute so it
+        stays in the working directory.
+        """
+        run_dir = self.job_run_dir(job)
+        os.makedirs(run_dir, exist_ok=True)
+        
+        simv = os.path.join(job.image, "simv") if job.image else "simv"
+        cmd = self.build_simv_command(job.test, simv=os.path.abspath(simv), seed=job.seed,
+                                      variant=job.variant, checkpoint=job.checkpoint, point=job.point)
+        if "-cm_dir" in cmd:
+            idx = cmd.index("-cm_dir")
+            cmd[idx + 1] = os.path.abspath(cmd[idx + 1])
+        
+        log_file = self.log_path(os.path.join(run_dir, os.path.basename(self.config['logging']['simulation_log'])))
+        request = self.resources.request(job.test) if self.resources else None
+        async with self.admit(request, job.name):
+            self.say(f"🚀 Started {job.name} in {run_dir}")
+            if self.progress:
+                self.progress.started(job.name)
+            started_at = time.time()
+            start = time.monotonic()
+            returncode, watcher = await self.executor.run_async(cmd, log_file, run_dir, job.name, request)
+            wall_time = time.monotonic() - start
+        
+        passed = returncode == 0 and not watcher.errors and not watcher.fatals
+        return TestResult(test=job.test, seed=job.seed, passed=passed,
+                          returncode=returncode, run_dir=run_dir,
+                          log_file=log_file, wall_time=wall_time,
+                          errors=watcher.errors, fatals=watcher.fatals,
+                          warnings=watcher.warnings, killed_reason=watcher.kill_reason,
+                          started_at=started_at, point=job.point)
+    
+    def schedule_jobs(self, sim_jobs):
+        """Order jobs longest-first using the run history.
+        
+        Returns the ordered jobs and the expected runtime of each. Tests
+        without history are assumed to be as long as the longest known test
+        and are started first.
+        """
+        if not self.history:
+            return sim_jobs, {}
+        estimates = self.history.expected_runtimes(job.test for job in sim_jobs)
+        if not estimates:
+            return sim_jobs, {}
+        unknown = max(estimates.values(), default=0.0)
+        expected = {job.name: estimates.get(job.test, unknown) for job in sim_jobs}
+        ordered = sorted(sim_jobs, key=lambda job: (job.test in estimates, -expected[job.name]))
+        return ordered, expected
+    
+    async def run_jobs(self, sim_jobs, jobs, expected=None, on_result=None):
+        """Run simulation jobs on the event loop, at most `jobs` at a time.
+        
+        Shows a live running/passed/failed/ETA line and calls
+        on_result(job, result) as each job finishes. Ctrl-C or
+        regression.timeout stops the whole set: running simulators are
+        terminated and keep their results, queued jobs are reported as failed
+        without being started. Returns the results in completion order and
+        the reason the set was stopped, or None.
+        """
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(jobs)
+        interval = self.config.get('regression', {}).get('progress_interval', 30.0)
+        self.progress = ProgressLine([job.name for job in sim_jobs], jobs, expected, interval)
+        self.executor.reset()
+        results = []
+        self.stop_reason = None
+        
+        async def run_one(job):
+            async with limit:
+                result = await self.simulate_isolated(job)
+            self.progress.finished(job.name, result.passed, result.wall_time)
+            results.append(result)
+            if on_result:
+                on_result(job, result)
+        
+        tasks = [asyncio.create_task(run_one(job)) for job in sim_jobs]
+        
+        def stop(reason):
+            if self.stop_reason:
+                return
+            self.stop_reason = reason
+            outstanding = sum(1 for task in tasks if not task.done())
+            self.progress.say(f"🛑 Stopping {outstanding} outstanding jobs ({reason})")
+            self.executor.cancel_all()
+            for task in tasks:
+                task.cancel()
+        
+        try:
+            loop.add_signal_handler(signal.SIGINT, stop, "interrupted")
+            handles_sigint = True
+        except (NotImplementedError, RuntimeError):
+            handles_sigint = False  # Not the main thread, Ctrl-C stays a KeyboardInterrupt
+        timeout = self.config.get('regression', {}).get('timeout', 0)
+        timer = loop.call_later(timeout, stop, "regression timeout") if timeout else None
+        ticker = asyncio.create_task(self.progress.run())
+        try:
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            ticker.cancel()
+            if timer:
+                timer.cancel()
+            if handles_sigint:
+                loop.remove_signal_handler(signal.SIGINT)
+            self.progress.close()
+            self.progress = None
+        
+        for job, outcome in zip(sim_jobs, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                run_dir = self.job_run_dir(job)
+                log_file = self.log_path(os.path.join(run_dir, os.path.basename(self.config['logging']['simulation_log'])))
+                results.append(TestResult(test=job.test, seed=job.seed, passed=False, returncode=-1,
+                                          run_dir=run_dir, log_file=log_file, killed_reason=self.stop_reason,
+                                          point=job.point))
+            elif isinstance(outcome, BaseException):
+                raise outcome
+        return results, self.stop_reason
+    
+    @timed_phase("simulate")
+    def run_parallel(self, sim_jobs, jobs):
+        """Simulate jobs concurrently on their already compiled images.
+        
+        Raises KeyboardInterrupt after the summary when stopped with Ctrl-C.
+        """
+        print("=" * 60)
+        print(f"PARALLEL SIMULATION PHASE ({len(sim_jobs)} jobs, {jobs} in parallel)")
+        print("=" * 60)
+        
+        sim_jobs, expected = self.schedule_jobs(sim_jobs)
+        if expected:
+            eta = estimate_makespan(list(expected.values()), jobs)
+            print(f"⏱️  Estimated regression time: {format_duration(eta)} (longest jobs first)")
+        
+        finished = []
+        
+        def report(job, result):
+            finished.append(result)
+            self.record_run("simulate", result.test, result.seed, result.started_at,
+                            result.wall_time, result.passed, result.returncode, result.log_file)
+            progress = f"[{len(finished)}/{len(sim_jobs)}]"
+            if result.passed:
+                self.say(f"✅ {job.name} passed ({result.wall_time:.1f}s) {progress}")
+                self.track_coverage(job.name)
+            else:
+                reason = result.killed_reason or f"exit code {result.returncode}"
+                self.say(f"❌ {job.name} failed ({reason}, {result.errors} errors, "
+                         f"{result.fatals} fatals), check {result.log_file} {progress}")
+        
+        start = time.monotonic()
+        results, stop_reason = asyncio.run(self.run_jobs(sim_jobs, jobs, expected, report))
+        print(f"Regression wall time: {format_duration(time.monotonic() - start)}")
+        
+        self.print_summary(results)
+        self.write_results(results)
+        if any(r.point for r in results):
+            self.print_sweep(results)
+            self.write_failed_points(results)
+        if stop_reason == "interrupted":
+            raise KeyboardInterrupt
+        return results
+    
+    def print_summary(self, results):
+        """Print a pass/fail table for a set of test results"""
+        print("=" * 60)
+        print("REGRESSION SUMMARY")
+        print("=" * 60)
+        for result in sorted(results, key=lambda r: (r.test, point_order(r.point), r.seed or 0)):
+            status = "PASS" if result.passed else "FAIL"
+            seed = "-" if result.seed is None else result.seed
+            test = SimJob(result.test, point=result.point).name
+            print(f"  {status}  {test:40} {seed:>10}  {result.wall_time:8.1f}s  "
+                  f"E:{result.errors:<4} F:{result.fatals:<2} {result.log_file}")
+        passed = sum(1 for r in results if r.passed)
+        print(f"Passed: {passed}/{len(results)}")
+        
+        failed = sorted({(r.test, r.seed) for r in results if not r.passed and r.seed is not None and not r.point})
+        if failed:
+            print("Replay failing seeds with:")
+            for test, seed in failed:
+                print(f"  ./run_sim.py -t {test} --seed-list {seed}")
+    
+    def print_sweep(self, results):
+        """Tabulate results by parameter point and write them to sweep.csv"""
+        points = {}
+        for result in results:
+            key = (result.test, point_slug(result.point or {}))
+            points.setdefault(key, []).append(result)
+        groups = sorted(points.values(), key=lambda members: (members[0].test, point_order(members[0].point)))
+        
+        rows = []
+        for members in groups:
+            started = [r for r in members if r.started_at]
+            rows.append({
+                'test': members[0].test, **(members[0].point or {}),
+                'runs': len(members), 'passed': sum(r.passed for r in members),
+                'failed': sum(not r.passed for r in members),
+                'mean_wall_time': round(statistics.fmean(r.wall_time for r in started), 3) if started else '',
+                'errors': sum(r.errors for r in members), 'fatals': sum(r.fatals for r in members),
+            })
+        
+        print("=" * 60)
+        print(f"PARAMETER SWEEP ({len(rows)} points)")
+        print("=" * 60)
+        labels = [" ".join(f"{key}={value}" for key, value in (members[0].point or {}).items()) or "-"
+                  for members in groups]
+        width = max(len(label) for label in labels + ["point"])
+        print(f"  {'test':32} {'point':{width}} {'runs':>4} {'pass':>4} {'fail':>4} {'mean':>8}  errors")
+        for row, point in zip(rows, labels):
+            mean = f"{row['mean_wall_time']:.1f}s" if row['mean_wall_time'] != '' else "-"
+            print(f"  {row['test']:32} {point:{width}} {row['runs']:>4} {row['passed']:>4} {row['failed']:>4} "
+                  f"{mean:>8}  E:{row['errors']} F:{row['fatals']}")
+        
+        run_dir = self.config.get('regression', {}).get('run_dir', 'runs')
+        os.makedirs(run_dir, exist_ok=True)
+        sweep_file = os.path.join(run_dir, "sweep.csv")
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        with open(sweep_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"📄 Sweep results written to {sweep_file}")
+    
+    def write_failed_points(self, results):
+        """Write the failing points of a sweep to a --test-list and print how to replay them.
+        
+        A seed list would rerun every point, hence a test list. A sweep
+        without failures removes the list of an earlier sweep.
+        """
+        failed_points = [r for r in sorted(results, key=lambda r: (r.test, point_order(r.point), r.seed or 0))
+                         if not r.passed and r.point]
+        run_dir = self.config.get('regression', {}).get('run_dir', 'runs')
+        list_file = os.path.join(run_dir, "failed_points.txt")
+        if not failed_points:
+            if os.path.exists(list_file):
+                os.remove(list_file)
+            return
+        os.makedirs(run_dir, exist_ok=True)
+        with open(list_file, 'w') as f:
+            f.write("# failing test [seed] key=value ... of the last sweep\n")
+            for result in failed_points:
+                f.write(f"{list_entry(result.test, result.seed, result.point)}\n")
+        print("Replay failing sweep points with:")
+        print(f"  ./run_sim.py --test-list {list_file}")
+    
+    def write_results(self, results):
+        """Write per-(test, seed) results next to the run directories"""
+        run_dir = self.config.get('regression', {}).get('run_dir', 'runs')
+        os.makedirs(run_dir, exist_ok=True)
+        results_file = os.path.join(run_dir, "results.json")
+        with open(results_file, 'w') as f:
+            json.dump([vars(r) for r in results], f, indent=2)
+        print(f"📄 Results written to {results_file}")
+    
+    def failure_message(self, result):
+        """First UVM_ERROR/UVM_FATAL of a failed job, or why it failed without one"""
+        if not os.path.exists(result.log_file):
+            return f"log missing: {os.path.basename(result.log_file)}"
+        try:
+            found = first_message(result.log_file)
+        except (OSError, EOFError, RuntimeError) as e:
+            return f"log unreadable: {e}"
+        if found:
+            return found[1]
+        return f"no UVM_ERROR/UVM_FATAL: {result.killed_reason or f'exit code {result.returncode}'}"
+    
+    @timed_phase("triage")
+    def triage_failures(self, results):
+        """Bucket failed jobs by the normalised first UVM_ERROR/UVM_FATAL of their logs.
+        
+        Logs are read in parallel. Each bucket gets a count and, as its
+        representative, the failed job that ran the shortest, the cheapest to
+        rerun. Writes buckets.json and representatives.txt (a --test-list)
+        to triage.output_dir and returns the buckets, largest first, with
+        the representative TestResult of each. Jobs that never started have
+        no log and are left out.
+        """
+        failed = [r for r in results if not r.passed and r.started_at]
+        if not failed:
+            return []
+        print("=" * 60)
+        print(f"FAILURE TRIAGE ({len(failed)} failed jobs)")
+        print("=" * 60)
+        
+        triage_config = self.config.get('triage', {})
+        output_dir = triage_config.get('output_dir', 'triage')
+        workers = triage_config.get('workers') or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            messages = list(pool.map(self.failure_message, failed))
+        
+        groups = {}
+        for result, message in zip(failed, messages):
+            signature = failure_signature(message)
+            groups.setdefault(signature, []).append((result, message))
+        
+        buckets = []
+        for signature, members in groups.items():
+            bucket_id = hashlib.sha1(signature.encode()).hexdigest()[:8]
+            representative, message = min(members, key=lambda m: (m[0].wall_time, m[0].test, m[0].seed or 0))
+            for result, _ in members:
+                result.bucket = bucket_id
+            buckets.append({
+                'bucket': bucket_id, 'signature': signature, 'count': len(members),
+                'tests': sorted({r.test for r, _ in members}),
+                'representative': representative, 'message': message,
+                'jobs': sorted(([r.test, r.seed] for r, _ in members), key=lambda j: (j[0], j[1] or 0)),
+            })
+        buckets.sort(key=lambda b: (-b['count'], b['signature']))
+        
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "buckets.json"), 'w') as f:
+            json.dump([dict(b, representative={'test': b['representative'].test, 'seed': b['representative'].seed,
+                                               'point': b['representative'].point,
+                                               'log_file': b['representative'].log_file})
+                       for b in buckets], f, indent=2)
+        list_file = os.path.join(output_dir, "representatives.txt")
+        with open(list_file, 'w') as f:
+            f.write("# one failing test [seed] [key=value ...] per failure signature, largest bucket first\n")
+            for bucket in buckets:
+                rep = bucket['representative']
+                f.write(f"{list_entry(rep.test, rep.seed, rep.point)}  # {bucket['bucket']} x{bucket['count']}\n")
+        
+        print(f"{'bucket':8} {'count':>5}  {'representative':50} signature")
+        for bucket in buckets:
+            rep = bucket['representative']
+            print(f"{bucket['bucket']:8} {bucket['count']:>5}  {SimJob(rep.test, rep.seed, point=rep.point).name:50} "
+                  f"{bucket['signature'][:120]}")
+        print(f"📊 {len(failed)} failures in {len(buckets)} buckets, representatives written to {list_file}")
+        return buckets
+    
+    @timed_phase("debug_rerun")
+    def rerun_failures(self, results, jobs, representatives=None):
+        """Second pass of a two-pass regression: rerun failed jobs for debug.
+        
+        Pass one runs on fast images without waves and at low verbosity; the
+        failing (test, seed) pairs are rerun here on debug images with waves,
+        full debug access and high verbosity. The debug log and wave file are
+        attached to the original results. With representatives (one failed
+        result per triage bucket) only those are rerun.
+        """
+        failed = [r for r in results if not r.passed and r.started_at]
+        if representatives is not None and len(representatives) < len(failed):
+            print(f"🔍 Rerunning {len(representatives)} bucket representatives of {len(failed)} failures")
+            failed = representatives
+        max_reruns = self.two_pass_config().get('max_reruns', 0)
+        if max_reruns and len(failed) > max_reruns:
+            print(f"⚠️  {len(failed)} failures, rerunning only the first {max_reruns} for debug")
+            failed = failed[:max_reruns]
+        if not failed:
+            return results
+        
+        print("=" * 60)
+        print(f"DEBUG RERUN PHASE ({len(failed)} failed jobs)")
+        print("=" * 60)
+        if self.config['simulation']['seed_mode'] == "random" and any(r.seed is None for r in failed):
+            print("⚠️  seed_mode is random and no seeds were given, reruns may not reproduce the failures")
+        
+        images = self.compile_images(list(dict.fromkeys(r.test for r in failed)), jobs, variant="debug")
+        wave_file = self.config['simulation']['waves']['file']
+        originals = {SimJob(r.test, r.seed, point=r.point).name: r for r in failed if r.test in images}
+        
+        def attach(job, rerun):
+            result = originals[job.name]
+            self.record_run("debug", rerun.test, rerun.seed, rerun.started_at,
+                            rerun.wall_time, rerun.passed, rerun.returncode, rerun.log_file)
+            result.debug_log = rerun.log_file
+            waves = os.path.join(rerun.run_dir, os.path.basename(wave_file)) if wave_file else None
+            result.debug_waves = waves if waves and os.path.exists(waves) else None
+            
+            status = "did not reproduce" if rerun.passed else "reproduced"
+            self.say(f"🔍 {job.name} {status}, debug log {rerun.log_file}"
+                     + (f", waves {result.debug_waves}" if result.debug_waves else ""))
+        
+        debug_jobs = [SimJob(r.test, r.seed, images[r.test], "debug", point=r.point) for r in originals.values()]
+        _, stop_reason = asyncio.run(self.run_jobs(debug_jobs, jobs, on_result=attach))
+        
+        self.write_results(results)
+        if stop_reason == "interrupted":
+            raise KeyboardInterrupt
+        return results
+    
+    @timed_phase("merge_coverage")
     def merge_coverage(self):
         """Merge coverage databases from multiple test runs"""
         if not self.config['build']['coverage']['enabled']:
             print("⚠️  Coverage not enabled, skipping merge")
             return False
             
-        if len(self.coverage_databases) < 2:
+        merge_config = self.config.get('coverage_merge', {})
+        merged_dir = merge_config.get('merged_name', 'merged_coverage')
+        incremental = merge_config.get('incremental', False)
+        
+        if len(self.coverage_databases) < 2 and not (incremental and os.path.exists(merged_dir)):
             print("⚠️  Need at least 2 coverage databases to merge")
             return False
             
@@ -198,26 +2706,30 @@ class SimRunner:
         print("COVERAGE MERGE PHASE")
         print("=" * 60)
         
-        merge_config = self.config.get('coverage_merge', {})
-        merged_dir = merge_config.get('merged_name', 'merged_coverage')
+        databases = sorted(self.coverage_databases)
         
-        # Remove existing merged database
-        if os.path.exists(merged_dir):
-            shutil.rmtree(merged_dir)
+        if incremental:
+            success = self.merge_incremental(databases, merged_dir, merge_config)
+            if success is None:
+                print(f"✅ Merged coverage {merged_dir} is up to date")
+                return True
+        else:
+            # Remove existing merged database and the manifest describing it
+            manifest_file = self.merge_manifest_file(merged_dir, merge_config)
+            if os.path.exists(merged_dir):
+                shutil.rmtree(merged_dir)
+            if os.path.exists(manifest_file):
+                os.remove(manifest_file)
             
-        # Build urg merge command
-        cmd = ["urg", "-dir"]
-        cmd.extend(self.coverage_databases)
-        cmd.extend(["-dbname", merged_dir])
-        
-        print(f"Merging coverage databases: {', '.join(self.coverage_databases)}")
-        print(f"Running: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+            print(f"Merging coverage databases: {', '.join(databases)}")
+            success = self.merge_databases(databases, merged_dir, merge_config)
+            if success:
+                # A later --incremental run continues from this database
+                self.write_merge_manifest(manifest_file, merged_dir,
+                                          {db: self.database_fingerprint(db) for db in databases})
         
-        if result.returncode != 0:
+        if not success:
             print(f"❌ Coverage merge failed!")
-            print(f"Error: {result.stderr}")
             return False
         else:
             print(f"✅ Coverage merged successfully to: {merged_dir}")
@@ -228,6 +2740,154 @@ class SimRunner:
                 
             return True
     
+    def merge_databases(self, databases, dbname, merge_config):
+        """Merge databases into dbname, as a tree if there are more than group_size"""
+        if len(databases) <= merge_config.get('group_size', 16):
+            return self.run_urg_merge(databases, dbname)
+        return self.tree_merge(databases, dbname, merge_config)
+    
+    @staticmethod
+    def database_fingerprint(database):
+        """Cheap change detector for a coverage database: names, sizes and mtimes"""
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(database):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                digest.update(f"{os.path.relpath(path, database)}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+        return digest.hexdigest()
+    
+    def merge_incremental(self, databases, merged_dir, merge_config):
+        """Fold only new or changed databases into the existing merged database.
+        
+        A manifest next to merged_dir records the fingerprint of every database
+        already merged. Returns None if nothing needed merging, otherwise the
+        merge status. Coverage is accumulated: items hit by an older version of
+        a changed database stay covered.
+        """
+        manifest_file = self.merge_manifest_file(merged_dir, merge_config)
+        manifest = self.load_merge_manifest(manifest_file, merged_dir)
+        
+        fingerprints = {db: self.database_fingerprint(db) for db in databases}
+        pending = [db for db in databases if manifest.get(db) != fingerprints[db]]
+        if not pending:
+            return None
+        
+        print(f"Incremental merge: {len(pending)} new or changed of {len(databases)} databases")
+        print(f"Merging coverage databases: {', '.join(pending)}")
+        
+        if manifest:
+            # Merge into a scratch database and swap it in only on success
+            staging = f"{merged_dir}_incremental"
+            shutil.rmtree(staging, ignore_errors=True)
+            if not self.merge_databases([merged_dir] + pending, staging, merge_config):
+                shutil.rmtree(staging, ignore_errors=True)
+                return False
+            shutil.rmtree(merged_dir)
+            os.rename(staging, merged_dir)
+        else:
+            if os.path.exists(merged_dir):
+                shutil.rmtree(merged_dir)
+            if not self.merge_databases(pending, merged_dir, merge_config):
+                return False
+        
+        manifest.update({db: fingerprints[db] for db in pending})
+        self.write_merge_manifest(manifest_file, merged_dir, manifest)
+        return True
+    
+    @staticmethod
+    def merge_manifest_file(merged_dir, merge_config):
+        """Path of the manifest that lists the databases folded into merged_dir"""
+        return merge_config.get('manifest', f"{merged_dir}.manifest.json")
+    
+    def load_merge_manifest(self, manifest_file, merged_dir):
+        """Databases recorded as merged into merged_dir, as {database: fingerprint}.
+        
+        The manifest also stores the fingerprint of merged_dir itself. If the
+        merged database was rebuilt, removed or replaced since, its entries no
+        longer describe what it contains and the manifest is ignored.
+        """
+        if not (os.path.exists(merged_dir) and os.path.exists(manifest_file)):
+            return {}
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get('merged') != self.database_fingerprint(merged_dir):
+            print(f"⚠️  {manifest_file} does not match {merged_dir}, rebuilding the merged database")
+            return {}
+        return dict(manifest.get('databases', {}))
+    
+    def write_merge_manifest(self, manifest_file, merged_dir, databases):
+        """Record databases as merged into the current state of merged_dir"""
+        manifest = {'merged': self.database_fingerprint(merged_dir), 'databases': databases}
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    def run_urg_merge(self, databases, dbname, report=True):
+        """Merge databases into dbname with a single urg call"""
+        return asyncio.run(self.run_urg_merge_async(databases, dbname, report))
+    
+    async def run_urg_merge_async(self, databases, dbname, report=True):
+        """run_urg_merge() for the event loop"""
+        cmd = self.backend.command("urg") + ["-dir"]
+        cmd.extend(databases)
+        cmd.extend(["-dbname", dbname])
+        if not report:
+            # Partial merges run concurrently and must not share urgReport/
+            cmd.append("-noreport")
+        
+        print(f"Running: {' '.join(cmd)}")
+        result = await self.run_process_async(cmd, f"urg merge {dbname}", capture=True)
+        if result.returncode != 0:
+            print(f"Error merging into {dbname}: {result.stderr}")
+            return False
+        return True
+    
+    def tree_merge(self, databases, merged_dir, merge_config):
+        """Merge databases as a reduction tree of parallel urg processes.
+        
+        Level 0 merges groups of group_size databases, every following level
+        merges fan_in partial results, until the last level fits into a single
+        urg call that writes merged_dir. Independent merges of one level run
+        concurrently on up to `workers` processes.
+        """
+        group_size = max(2, merge_config.get('group_size', 16))
+        fan_in = max(2, merge_config.get('fan_in', 8))
+        workers = merge_config.get('workers') or os.cpu_count() or 1
+        work_dir = merge_config.get('work_dir', 'coverage_merge_tmp')
+        
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        
+        inputs, chunk, level = databases, group_size, 0
+        try:
+            while len(inputs) > chunk:
+                groups = [inputs[i:i + chunk] for i in range(0, len(inputs), chunk)]
+                print(f"Merge level {level}: {len(inputs)} databases in {len(groups)} groups")
+                
+                outputs, merges = [], []
+                for i, group in enumerate(groups):
+                    if len(group) == 1:
+                        # Nothing to merge, carry the database up a level
+                        outputs.append(group[0])
+                        continue
+                    output = os.path.join(work_dir, f"level{level}_group{i}.vdb")
+                    outputs.append(output)
+                    merges.append(self.run_urg_merge_async(group, output, False))
+                
+                if not all(asyncio.run(gather_limited(merges, workers))):
+                    return False
+                inputs, chunk, level = outputs, fan_in, level + 1
+            
+            print(f"Merge level {level}: {len(inputs)} databases into {merged_dir}")
+            return self.run_urg_merge(inputs, merged_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    @timed_phase("coverage_report")
     def generate_coverage_report(self, coverage_db):
         """Generate coverage report"""
         print("=" * 60)
@@ -244,7 +2904,7 @@ class SimRunner:
         os.makedirs(output_dir, exist_ok=True)
         
         # Build urg report command
-        cmd = ["urg", "-dir", coverage_db]
+        cmd = self.backend.command("urg") + ["-dir", coverage_db]
         
         if report_format == 'html':
             # Default HTML report (no -format needed)
@@ -262,7 +2922,7 @@ class SimRunner:
         print(f"Generating coverage report in {output_dir}")
         print(f"Running: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self.run_process(cmd, "urg report", capture=True)
         
         if result.returncode != 0:
             print(f"❌ Coverage report generation failed!")
@@ -272,12 +2932,71 @@ class SimRunner:
             print(f"✅ Coverage report generated in: {output_dir}")
             return True
     
-    def run_multiple_tests(self, test_names, compile_once=True):
-        """Run multiple tests and optionally merge coverage"""
+    def run_multiple_tests(self, test_names, compile_once=True, jobs=1,
+                           num_seeds=None, seed_list=None, sim_jobs=None):
+        """Run multiple tests and optionally merge coverage.
+        
+        By default the first test is compiled once in the working directory
+        and every test runs on that image. With the image pool (see
+        uses_image_pool) every distinct define set is compiled once into the
+        pool and each job runs isolated on the image matching its test. With
+        compile_once=False tests are compiled and simulated one after the
+        other. sim_jobs runs an explicit list of (test, seed) jobs instead of
+        expanding test_names.
+        """
+        if sim_jobs:
+            test_names = list(dict.fromkeys(job.test for job in sim_jobs))
         print(f"Running multiple tests: {', '.join(test_names)}")
         
         success = True
         compiled = False
+        seeded = bool(num_seeds or seed_list or sim_jobs)
+        swept = any(self.sweep_axes(test) for test in test_names)
+        pooled = self.uses_image_pool(test_names)
+        
+        if (jobs > 1 or seeded or swept or pooled) and not compile_once:
+            print("⚠️  --jobs/--seeds/sweeps/image pool need compiled images, ignoring --compile-each")
+            compile_once = True
+        
+        if pooled:
+            # Two-pass: everything on fast images first, failures rerun for debug
+            variant = "fast" if self.two_pass_config().get('enabled', False) else None
+            sim_jobs = self.expand_sweep(sim_jobs or self.expand_seeds(test_names, num_seeds, seed_list))
+            images = self.compile_images(test_names, jobs, variant)
+            runnable = [job for job in sim_jobs if job.test in images]
+            for job in runnable:
+                job.image = images[job.test]
+                job.variant = variant
+            skipped = len(sim_jobs) - len(runnable)
+            if skipped:
+                print(f"❌ Skipping {skipped} jobs whose image failed to compile")
+            if runnable and self.checkpoint_config().get('enabled', False):
+                self.prepare_checkpoints(runnable, jobs)
+            results = self.run_parallel(runnable, jobs) if runnable else []
+            buckets = None
+            if self.config.get('triage', {}).get('enabled', False):
+                buckets = self.triage_failures(results)
+                if buckets:
+                    self.write_results(results)
+            if variant:
+                representatives = None
+                if buckets and self.two_pass_config().get('representatives_only', False):
+                    representatives = [bucket['representative'] for bucket in buckets]
+                self.rerun_failures(results, jobs, representatives)
+            success = not skipped and all(r.passed for r in results)
+            test_names = []
+        
+        # Seeded jobs always run isolated so their logs do not overwrite each other
+        elif jobs > 1 or seeded or swept:
+            success = self.compile(test_names[0])
+            if success:
+                sim_jobs = self.expand_sweep(sim_jobs or self.expand_seeds(test_names, num_seeds, seed_list))
+                results = self.run_parallel(sim_jobs, jobs)
+                if self.config.get('triage', {}).get('enabled', False):
+                    if self.triage_failures(results):
+                        self.write_results(results)
+                success = all(r.passed for r in results)
+            test_names = []
         
         for i, test_name in enumerate(test_names):
             print(f"\n{'='*60}")
@@ -285,19 +3004,15 @@ class SimRunner:
             print(f"{'='*60}")
             
             # Compile only for first test if compile_once is True
-            need_compile = not compiled if compile_once else True
-            need_sim = True
-            
-            if need_compile:
+            if not compiled or not compile_once:
                 success = self.compile(test_name)
                 compiled = True
                 if not success:
                     break
-                    
-            if success and need_sim:
-                success = self.simulate(test_name)
-                if not success:
-                    break
+            
+            success = self.simulate(test_name)
+            if not success:
+                break
         
         # Merge coverage if enabled and successful
         if success and self.config['build']['coverage']['enabled']:
@@ -307,6 +3022,264 @@ class SimRunner:
                 
         return success
     
+    def database_job(self, database):
+        """Map a per-test coverage database path back to its (test, seed, point) job"""
+        prefix = f"{self.config['build']['coverage']['output_dir']}_"
+        name = os.path.basename(database)
+        name = name[:-len(".vdb")] if name.endswith(".vdb") else name
+        name = name[len(prefix):] if name.startswith(prefix) else name
+        match = re.match(r"^(.*)_seed(\d+)$", name)
+        seed = int(match.group(2)) if match else None
+        name = match.group(1) if match else name
+        # A sweep point follows the test name after "__"
+        test, _, slug = name.partition("__")
+        return SimJob(test, seed, point=slug_point(slug, self.sweep_axes(test)) if slug else None)
+    
+    def database_items(self, database, report_dir):
+        """Covered items of one database, via a urg text report"""
+        cmd = self.backend.command("urg") + ["-dir", database, "-format", "text", "-report", report_dir]
+        result = self.run_process(cmd, f"urg text {database}", capture=True)
+        if result.returncode != 0:
+            print(f"❌ urg failed on {database}: {result.stderr}")
+            return None
+        return parse_urg_items(report_dir)
+    
+    @timed_phase("grade_coverage")
+    def grade_coverage(self, databases):
+        """Rank tests by the coverage they add and write a minimal test/seed list.
+        
+        Each database's covered items are extracted in parallel, then a greedy
+        set cover picks, at every step, the database that adds the most items
+        not covered yet. The selected databases, in that order, reach the same
+        coverage as all of them together.
+        """
+        print("=" * 60)
+        print("COVERAGE GRADING")
+        print("=" * 60)
+        
+        grading_config = self.config.get('coverage_grading', {})
+        output_dir = grading_config.get('output_dir', 'grading')
+        workers = self.config.get('coverage_merge', {}).get('workers') or os.cpu_count() or 1
+        os.makedirs(output_dir, exist_ok=True)
+        
+        databases = sorted(databases)
+        print(f"Extracting covered items from {len(databases)} databases")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {db: pool.submit(self.database_items, db,
+                                       os.path.join(output_dir, "reports", os.path.basename(db)))
+                       for db in databases}
+            coverage = {db: future.result() for db, future in futures.items()}
+        
+        failed = [db for db, items in coverage.items() if items is None]
+        if failed:
+            print(f"❌ Grading failed, could not read: {', '.join(failed)}")
+            return False
+        
+        hits = Counter(item for items in coverage.values() for item in items)
+        total = len(hits)
+        
+        # Greedy set cover over the remaining uncovered items
+        remaining = set(hits)
+        candidates = dict(coverage)
+        ranking = []
+        while remaining and candidates:
+            best = max(sorted(candidates), key=lambda db: len(candidates[db] & remaining))
+            gain = len(candidates[best] & remaining)
+            if gain == 0:
+                break
+            remaining -= candidates.pop(best)
+            ranking.append((best, gain))
+        
+        grades = []
+        covered = 0
+        for db, gain in ranking:
+            covered += gain
+            job = self.database_job(db)
+            grades.append({
+                'database': db, 'test': job.test, 'seed': job.seed, 'point': job.point,
+                'items': len(coverage[db]),
+                'unique': sum(1 for item in coverage[db] if hits[item] == 1),
+                'incremental': gain,
+                'cumulative_percent': 100.0 * covered / total if total else 100.0,
+            })
+        
+        redundant = sorted(candidates)
+        with open(os.path.join(output_dir, "grading.json"), 'w') as f:
+            json.dump({'total_items': total, 'selected': grades, 'redundant': redundant}, f, indent=2)
+        
+        list_file = os.path.join(output_dir, "minimal_tests.txt")
+        with open(list_file, 'w') as f:
+            f.write("# test [seed] [key=value ...], ordered by incremental coverage\n")
+            for grade in grades:
+                f.write(f"{list_entry(grade['test'], grade['seed'], grade['point'])}\n")
+        
+        print(f"{'test':40} {'seed':>10} {'unique':>7} {'incr':>7} {'cumul':>7}")
+        for grade in grades:
+            seed = "-" if grade['seed'] is None else grade['seed']
+            test = SimJob(grade['test'], point=grade['point']).name
+            print(f"{test:40} {seed:>10} {grade['unique']:>7} "
+                  f"{grade['incremental']:>7} {grade['cumulative_percent']:>6.1f}%")
+        print(f"✅ {len(grades)} of {len(databases)} databases reach all {total} covered items, "
+              f"list written to {list_file}")
+        self.update_covered_modules(coverage)
+        return True
+    
+    def impact_config(self):
+        """impact section of the configuration"""
+        return self.config.get('impact', {})
+    
+    def impact_config_hash(self):
+        """Short hash of the settings that can change compile and simulation results.
+        
+        Covers the build, simulation and test sections, without the switches
+        main() flips per invocation (coverage, checkpoints) and the build
+        cache and image pool bookkeeping.
+        """
+        settings = json.loads(json.dumps({key: self.config.get(key, {}) for key in ('build', 'simulation', 'test')},
+                                         default=str))
+        settings['build'].pop('cache', None)
+        settings['build'].pop('image_pool', None)
+        settings['build'].get('coverage', {}).pop('enabled', None)
+        settings['simulation'].pop('checkpoint', None)
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    def load_impact_state(self):
+        """Baseline of the last green run: file hashes, config hash and covered modules per test"""
+        try:
+            with open(self.impact_config().get('state_file', 'impact_state.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_impact_state(self, state):
+        state_file = self.impact_config().get('state_file', 'impact_state.json')
+        tmp_file = f"{state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, state_file)
+    
+    def scan_design(self):
+        """scan_sources() over the -f file lists and +incdir+ directories of the compile"""
+        sources, incdirs = [], [os.path.expandvars(d) for d in self.config['environment'].get('include_dirs', [])]
+        cmd = self.build_vcs_command(self.config['test']['default_test'])
+        for i, arg in enumerate(cmd):
+            if arg == "-f" and i + 1 < len(cmd) and os.path.exists(cmd[i + 1]):
+                file_list_sources = []
+                self.expand_file_list(cmd[i + 1], file_list_sources, incdirs)
+                sources.extend(file_list_sources)
+        return scan_sources(sources, incdirs)
+    
+    def update_covered_modules(self, coverage):
+        """Store the modules each test covered, from {database: covered items}.
+        
+        Items are keyed "module:..." (see parse_urg_items); the modules of
+        all databases of a test are combined.
+        """
+        covered = {}
+        for database, items in coverage.items():
+            if items:
+                modules = covered.setdefault(self.database_job(database).test, set())
+                modules.update(item.split(":", 1)[0] for item in items)
+        if not covered:
+            return
+        state = self.load_impact_state()
+        state.setdefault('covered_modules', {}).update({test: sorted(m) for test, m in covered.items()})
+        self.save_impact_state(state)
+    
+    def impacted_tests(self, test_names):
+        """Tests affected by source changes since the last green run.
+        
+        A changed file selects the tests named after the classes it
+        declares (the test's own file), or the tests whose coverage touched
+        the modules it declares. Anything else (packages, shared testbench
+        classes, headers without design units, removed files, a changed
+        configuration) selects every test, as do tests without covered
+        modules on record. Returns {test: [reasons]}.
+        """
+        state = self.load_impact_state()
+        if not state.get('files'):
+            return {test: ["no green baseline"] for test in test_names}
+        if state.get('config_hash') != self.impact_config_hash():
+            return {test: ["configuration changed"] for test in test_names}
+        
+        current = self.scan_design()
+        baseline = state['files']
+        files = dict(baseline, **current)
+        changed = sorted(path for path in set(current) | set(baseline)
+                         if current.get(path, {}).get('hash') != baseline.get(path, {}).get('hash'))
+        covered = {test: set(modules) for test, modules in state.get('covered_modules', {}).items()}
+        known_modules = set().union(*covered.values())
+        
+        selected = {test: ["no covered modules on record"] for test in test_names if test not in covered}
+        for path in changed:
+            units = affected_units(files, path)
+            names = {name for _, name in units}
+            if units and names <= set(self.config['test']['available_tests']):
+                hits = [test for test in test_names if test in names]
+            elif units and all(kind in COVERED_UNIT_KINDS and name in known_modules for kind, name in units):
+                hits = [test for test in test_names if covered.get(test, set()) & names]
+            else:
+                hits = list(test_names)
+            for test in hits:
+                selected.setdefault(test, []).append(path)
+        return selected
+    
+    def record_green_run(self, test_names):
+        """Make the current sources the impact baseline after all tests passed.
+        
+        Also stores the modules covered by the coverage databases of this
+        run, impact.databases_per_test of them per test.
+        """
+        state = self.load_impact_state()
+        state.update({'files': self.scan_design(), 'config_hash': self.impact_config_hash(), 'green_at': time.time()})
+        self.save_impact_state(state)
+        
+        per_test = self.impact_config().get('databases_per_test', 1)
+        databases, counts = [], Counter()
+        for database in sorted(self.coverage_databases):
+            test = self.database_job(database).test
+            if test in test_names and counts[test] < per_test:
+                counts[test] += 1
+                databases.append(database)
+        if databases:
+            report_root = os.path.join(self.config.get('coverage_grading', {}).get('output_dir', 'grading'), "reports")
+            workers = self.config.get('coverage_merge', {}).get('workers') or os.cpu_count() or 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                items = pool.map(lambda db: self.database_items(db, os.path.join(report_root, os.path.basename(db))),
+                                 databases)
+                self.update_covered_modules(dict(zip(databases, items)))
+        print(f"📄 Impact baseline updated ({len(state['files'])} files, "
+              f"{len(databases)} coverage databases)")
+    
+    def load_test_list(self, list_file):
+        """Read a "test [seed] [key=value ...]" list, e.g. the minimal set written by grading.
+        
+        key=value fields pin the job to that sweep point; a test listed
+        without them is swept as usual.
+        """
+        sim_jobs = []
+        with open(list_file, 'r') as f:
+            for line in f:
+                fields = line.split('#', 1)[0].split()
+                if fields:
+                    seeds = [field for field in fields[1:] if "=" not in field]
+                    point = dict(field.split("=", 1) for field in fields[1:] if "=" in field)
+                    point = {key: yaml.safe_load(value) for key, value in point.items()}
+                    sim_jobs.append(SimJob(fields[0], int(seeds[0]) if seeds else None, point=point or None))
+        return sim_jobs
+    
+    def show_history(self):
+        """Print runtime statistics collected in the history database"""
+        if not self.history:
+            print("⚠️  Run history not enabled (history.enabled in config)")
+            return False
+        print(f"Run history from {self.history.path}:")
+        print(f"  {'test':40} {'runs':>6} {'passed':>6} {'median':>9} {'max':>9}")
+        for test, runs, passes, median, longest in self.history.summary():
+            median = format_duration(median) if median is not None else "-"
+            print(f"  {test:40} {runs:>6} {passes:>6} {median:>9} {format_duration(longest):>9}")
+        return True
+    
     def list_tests(self):
         """List available tests"""
         print("Available tests:")
@@ -348,6 +3321,10 @@ def main():
                        help="Only simulate (assumes already compiled)")
     parser.add_argument("--list-tests", action="store_true", 
                        help="List available tests")
+    parser.add_argument("--first-error", metavar="LOG",
+                       help="Print the first UVM_ERROR/UVM_FATAL of a (compressed) simulation log")
+    parser.add_argument("--history", action="store_true",
+                       help="Show per-test runtime statistics from the run history")
     parser.add_argument("--coverage", action="store_true", 
                        help="Enable coverage collection")
     parser.add_argument("--no-coverage", action="store_true", 
@@ -358,15 +3335,44 @@ def main():
                        help="Run multiple specific tests")
     parser.add_argument("--merge-coverage", action="store_true", 
                        help="Merge existing coverage databases")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Merge only new or changed coverage databases into the existing merged database")
+    parser.add_argument("--grade", action="store_true",
+                       help="Grade per-test coverage databases and write a minimal test/seed list")
+    parser.add_argument("--test-list",
+                       help="Run the (test, seed) jobs listed in a file, e.g. grading/minimal_tests.txt")
+    parser.add_argument("--triage", nargs='?', const="", metavar="RESULTS",
+                       help="Bucket the failures of a regression by signature "
+                            "(default: results.json in the regression run directory)")
     parser.add_argument("--coverage-report", 
                        help="Generate coverage report from database")
     parser.add_argument("--compile-each", action="store_true", 
-                       help="Compile for each test (default: compile once)")
+                       help="Compile and simulate each test in turn in the working directory "
+                            "(default: compile once, or once per define set with build.image_pool.enabled)")
+    parser.add_argument("--backend", choices=sorted(TOOL_BACKENDS),
+                       help="Tool backend (default: tools.backend from config)")
+    parser.add_argument("--two-pass", action="store_true",
+                       help="Run tests without waves at low verbosity, then rerun failures with full debug")
+    parser.add_argument("--impact", action="store_true",
+                       help="Run only the tests affected by source changes since the last green run")
+    parser.add_argument("--checkpoint", action="store_true",
+                       help="Run each test's reset/boot prefix once and restore every seed from a snapshot")
+    parser.add_argument("--executor", choices=sorted(EXECUTORS),
+                       help="Where simulation jobs run (default: executor.backend from config)")
+    parser.add_argument("--force-compile", action="store_true",
+                       help="Ignore the build cache and always run vcs")
+    parser.add_argument("--seeds", type=int,
+                       help="Run each test with N random seeds")
+    parser.add_argument("--seed-list", nargs='+', type=int,
+                       help="Run each test with each of the given seeds")
+    parser.add_argument("-j", "--jobs", type=positive_int,
+                       help="Number of tests to simulate in parallel (default: regression.jobs or 1)")
     
     args = parser.parse_args()
     
     # Create runner instance
     runner = SimRunner(args.config)
+    atexit.register(runner.write_metrics)
     
     # Override coverage settings if specified
     if args.coverage:
@@ -374,10 +3380,33 @@ def main():
     elif args.no_coverage:
         runner.config['build']['coverage']['enabled'] = False
     
+    runner.force_compile = args.force_compile
+    if args.backend:
+        runner.set_backend(args.backend)
+    if args.executor:
+        runner.set_executor(args.executor)
+    if args.incremental:
+        runner.config.setdefault('coverage_merge', {})['incremental'] = True
+    if args.two_pass:
+        runner.config.setdefault('regression', {}).setdefault('two_pass', {})['enabled'] = True
+    if args.checkpoint:
+        runner.config['simulation'].setdefault('checkpoint', {})['enabled'] = True
+    
     if args.list_tests:
         runner.list_tests()
         return
     
+    if args.history:
+        sys.exit(0 if runner.show_history() else 1)
+    
+    if args.first_error:
+        found = first_message(args.first_error)
+        if found is None:
+            print(f"No UVM_ERROR/UVM_FATAL in {args.first_error}")
+            return
+        print(f"{args.first_error}:{found[0]}: {found[1]}")
+        return
+    
     # Handle coverage report generation
     if args.coverage_report:
         if os.path.exists(args.coverage_report):
@@ -387,6 +3416,33 @@ def main():
             sys.exit(1)
         return
     
+    # Handle failure triage of an earlier regression
+    if args.triage is not None:
+        results_file = args.triage or os.path.join(
+            runner.config.get('regression', {}).get('run_dir', 'runs'), "results.json")
+        try:
+            with open(results_file, 'r') as f:
+                results = [TestResult(**r) for r in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"❌ Cannot read regression results {results_file}: {e}")
+            sys.exit(1)
+        if not any(not r.passed for r in results):
+            print(f"✅ No failures in {results_file}")
+            return
+        runner.triage_failures(results)
+        with open(results_file, 'w') as f:
+            json.dump([vars(r) for r in results], f, indent=2)
+        return
+    
+    # Handle coverage grading
+    if args.grade:
+        coverage_pattern = f"{runner.config['build']['coverage']['output_dir']}_*.vdb"
+        existing_dbs = glob.glob(coverage_pattern)
+        if not existing_dbs:
+            print(f"❌ No coverage databases found matching pattern: {coverage_pattern}")
+            sys.exit(1)
+        sys.exit(0 if runner.grade_coverage(existing_dbs) else 1)
+    
     # Handle coverage merge
     if args.merge_coverage:
         # Find existing coverage databases
@@ -402,10 +3458,41 @@ def main():
             sys.exit(1)
         return
     
+    jobs = args.jobs or runner.config.get('regression', {}).get('jobs', 1)
+    
     # Handle multiple test runs
-    if args.all_tests:
+    if args.test_list:
+        sim_jobs = runner.load_test_list(args.test_list)
+        invalid_tests = sorted({j.test for j in sim_jobs} - set(runner.config['test']['available_tests']))
+        if invalid_tests or not sim_jobs:
+            print(f"❌ Invalid or empty test list: {', '.join(invalid_tests)}")
+            runner.list_tests()
+            sys.exit(1)
+        success = runner.run_multiple_tests([], True, jobs, sim_jobs=sim_jobs)
+    elif args.impact:
+        available = runner.config['test']['available_tests']
+        candidates = args.multiple_tests or available
+        invalid_tests = [t for t in candidates if t not in available]
+        if invalid_tests:
+            print(f"❌ Invalid test names: {', '.join(invalid_tests)}")
+            runner.list_tests()
+            sys.exit(1)
+        impacted = runner.impacted_tests(candidates)
+        for test, reasons in sorted(impacted.items()):
+            more = f" (+{len(reasons) - 1} more)" if len(reasons) > 1 else ""
+            print(f"🔍 {test}: {reasons[0]}{more}")
+        print(f"📊 {len(impacted)} of {len(candidates)} tests affected since the last green run")
+        selected = [t for t in candidates if t in impacted]
+        success = runner.run_multiple_tests(selected, True, jobs, args.seeds, args.seed_list) if selected else True
+        # Only a selection over every test vouches for the tests left out
+        if success and set(candidates) == set(available):
+            runner.record_green_run(selected)
+    elif args.all_tests:
         test_names = runner.config['test']['available_tests']
-        success = runner.run_multiple_tests(test_names, not args.compile_each)
+        success = runner.run_multiple_tests(test_names, not args.compile_each, jobs,
+                                            args.seeds, args.seed_list)
+        if success and runner.impact_config().get('enabled', False):
+            runner.record_green_run(test_names)
     elif args.multiple_tests:
         # Validate test names
         invalid_tests = [t for t in args.multiple_tests if t not in runner.config['test']['available_tests']]
@@ -413,7 +3500,15 @@ def main():
             print(f"❌ Invalid test names: {', '.join(invalid_tests)}")
             runner.list_tests()
             sys.exit(1)
-        success = runner.run_multiple_tests(args.multiple_tests, not args.compile_each)
+        success = runner.run_multiple_tests(args.multiple_tests, not args.compile_each, jobs,
+                                            args.seeds, args.seed_list)
+    elif args.seeds or args.seed_list:
+        test_name = args.test or runner.config['test']['default_test']
+        if test_name not in runner.config['test']['available_tests']:
+            print(f"❌ Invalid test name: {test_name}")
+            runner.list_tests()
+            sys.exit(1)
+        success = runner.run_multiple_tests([test_name], True, jobs, args.seeds, args.seed_list)
     else:
         # Run single test
         success = runner.run(
@@ -425,4 +3520,8 @@ def main():
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted")
+        sys.exit(130)
@@ -0,0 +1,47 @@
+"""
+Shared fixtures for the run_sim.py and ASM_Generation tests
+Run from the repository root with: python -m pytest Run_Files/tests
+"""
+
+import os
+import sys
+
+import pytest
+import yaml
+
+RUN_FILES = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RUN_FILES)
+sys.path.insert(0, os.path.join(RUN_FILES, "ASM_Generation"))
+
+
+@pytest.fixture
+def fake_config(tmp_path, monkeypatch):
+    """sim_config.yaml on the fake backend, with a working directory of its own.
+
+    History and metrics are off and the fake tools never fail, so runs are
+    deterministic. Tests may edit the returned dict before calling make_runner.
+    """
+    with open(os.path.join(RUN_FILES, "sim_config.yaml"), 'r') as f:
+        config = yaml.safe_load(f)
+    config['tools']['backend'] = "fake"
+    config['tools']['fake'].update({'sim_time': [0.0, 0.0], 'compile_time': 0.0, 'merge_time': 0.0,
+                                    'log_lines': 20, 'error_rate': 0.0, 'fatal_rate': 0.0, 'crash_rate': 0.0})
+    config['history']['enabled'] = False
+    config['metrics']['enabled'] = False
+    config['coverage_merge']['report']['enabled'] = False
+    monkeypatch.chdir(tmp_path)
+    return config
+
+
+@pytest.fixture
+def make_runner(fake_config, tmp_path):
+    """Factory for a SimRunner on fake_config"""
+    from run_sim import SimRunner
+
+    def make():
+        config_file = tmp_path / "sim_config.yaml"
+        with open(config_file, 'w') as f:
+            yaml.safe_dump(fake_config, f)
+        return SimRunner(str(config_file))
+
+    return make
@@ -0,0 +1,113 @@
+"""
+Tests of the asm_encoder.py encoder against known RV32IM and CV32E40P encodings
+"""
+
+import struct
+
+import pytest
+
+from asm_encoder import AssemblyEncoder, EncodingError
+
+BASE = 0x180
+
+
+def encode(lines, base_address=BASE):
+    """Words of the linked image of some assembly lines"""
+    encoder = AssemblyEncoder(base_address)
+    encoder.add_lines(lines)
+    image = encoder.link()
+    return list(struct.unpack(f"<{len(image) // 4}I", image))
+
+
+@pytest.mark.parametrize("line, word", [
+    ("nop", 0x00000013),
+    ("addi x1, x0, 1", 0x00100093),
+    ("addi sp, sp, -16", 0xFF010113),
+    ("subi a0, a0, 4", 0xFFC50513),
+    ("add x3, x1, x2", 0x002081B3),
+    ("sub x3, x1, x2", 0x402081B3),
+    ("sra t0, t1, t2", 0x407352B3),
+    ("slli x1, x1, 3", 0x00309093),
+    ("srai a0, a1, 31", 0x41F5D513),
+    ("sltiu a0, a0, 1", 0x00153513),
+    ("lw x5, 8(x2)", 0x00812283),
+    ("lbu a0, -1(s0)", 0xFFF44503),
+    ("sw x5, 8(x2)", 0x00512423),
+    ("sb a0, -1(s0)", 0xFEA40FA3),
+    ("lui x5, 0x12345", 0x123452B7),
+    ("auipc ra, 0", 0x00000097),
+    ("jalr x0, x1, 0", 0x00008067),
+    ("jalr ra, 4(t0)", 0x004280E7),
+    ("mul x3, x1, x2", 0x022081B3),
+    ("divu a0, a1, a2", 0x02C5D533),
+    ("remu a0, a1, a2", 0x02C5F533),
+    # CORE-V: funct7 | rs2 | rs1 | 011 | rd | 0101011
+    ("cv.abs x5, x6", 0x500332AB),
+    ("cv.min a0, a1, a2", 0x56C5B52B),
+    ("cv.clip a0, a1, 5", 0x7055B52B),
+    ("cv.clipr a0, a1, a2", 0x74C5B52B),
+    ("cv.ror a0, a1, a2", 0x40C5B52B),
+    ("cv.cnt a0, a1", 0x4805B52B),
+])
+def test_known_encodings(line, word):
+    assert encode([line]) == [word]
+
+
+def test_labels_and_branches():
+    words = encode([
+        "_start:",
+        "loop: nop",
+        "    bne x1, x2, loop",      # backward, -4
+        "    beq x0, x0, done",      # forward, +8
+        "    j loop",                # backward jal x0, -12
+        "done: jal ra, loop",        # jal ra, -16
+    ])
+    assert words == [0x00000013, 0xFE209EE3, 0x00000463, 0xFF5FF06F, 0xFF1FF0EF]
+
+
+def test_data_section_follows_text():
+    words = encode([".text", "nop", ".section .data", ".word 0x11223344, -1", ".text", "nop"])
+    assert words == [0x00000013, 0x00000013, 0x11223344, 0xFFFFFFFF]
+
+
+def test_far_branch_is_relaxed_over_a_jal():
+    # 1100 nops put the target 4408 bytes away, beyond the +-4KiB of a branch
+    words = encode(["beq x1, x2, far"] + ["nop"] * 1100 + ["far: nop"])
+    assert len(words) == 1 + 1 + 1100 + 1
+    assert words[0] == 0x00209463  # bne x1, x2, +8 skips the jal
+    assert words[1] == 0x1340106F  # jal x0, +4404 reaches the target
+    assert words[2:] == [0x00000013] * 1101
+
+
+def test_far_jal_is_relaxed_into_auipc_jalr():
+    # The target is 1MiB + 8 bytes away, beyond the +-1MiB of jal
+    words = encode(["jal ra, far"] + ["nop"] * (1 << 18) + ["far: nop"])
+    assert words[0] == 0x00100097  # auipc ra, 0x100
+    assert words[1] == 0x008080E7  # jalr ra, 8(ra)
+    assert len(words) == 2 + (1 << 18) + 1
+
+
+def test_far_j_goes_through_t1():
+    words = encode(["j far"] + ["nop"] * (1 << 18) + ["far: nop"])
+    assert words[0] == 0x00100317  # auipc t1, 0x100
+    assert words[1] == 0x00830067  # jalr x0, 8(t1)
+
+
+def test_hex_image(tmp_path):
+    encoder = AssemblyEncoder(BASE)
+    encoder.add_lines(["addi x1, x0, 1", "nop"])
+    path = tmp_path / "prog.hex"
+    encoder.write_hex(str(path))
+    assert path.read_text() == "@00000180\n93 00 10 00 13 00 00 00\n"
+
+
+@pytest.mark.parametrize("lines, message", [
+    (["addi x1, x0, 4096"], "out of range"),
+    (["add x1, x2, x99"], "unknown register"),
+    (["fadd.s f0, f1, f2"], "unsupported instruction"),
+    (["j nowhere"], "undefined label"),
+    (["a: nop", "a: nop"], "defined twice"),
+])
+def test_encoding_errors(lines, message):
+    with pytest.raises(EncodingError, match=message):
+        encode(lines)
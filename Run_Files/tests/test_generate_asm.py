@@ -0,0 +1,119 @@
+"""
+Tests of the generate_asm.py weighted sampler and label manager
+"""
+
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from generate_asm import LabelManager, WeightedSampler, generate_program
+
+
+def test_weighted_sampler_distribution():
+    weights = {'add': 1.0, 'lw': 2.0, 'beq': 7.0, 'nop': 0.0}
+    sampler = WeightedSampler(list(weights), list(weights.values()), random.Random(1))
+    draws = 100000
+    counts = Counter(sampler.sample_batch(draws))
+    assert 'nop' not in counts
+    for item in ('add', 'lw', 'beq'):
+        assert counts[item] / draws == pytest.approx(weights[item] / 10.0, abs=0.01)
+
+
+def test_weighted_sampler_single_draws_match_distribution():
+    sampler = WeightedSampler(['a', 'b'], [3, 1], random.Random(2))
+    counts = Counter(sampler.sample() for _ in range(40000))
+    assert counts['a'] / 40000 == pytest.approx(0.75, abs=0.01)
+
+
+def test_weighted_sampler_is_reproducible():
+    items, weights = ['a', 'b', 'c', 'd'], [0.1, 0.2, 0.3, 0.4]
+
+    def draws(seed):
+        sampler = WeightedSampler(items, weights, random.Random(seed))
+        stream = iter(sampler)
+        return [sampler.sample() for _ in range(50)] + sampler.sample_batch(500) + [next(stream) for _ in range(50)]
+
+    assert draws(42) == draws(42)
+    assert draws(42) != draws(43)
+
+
+def test_weighted_sampler_needs_a_positive_weight():
+    with pytest.raises(ValueError):
+        WeightedSampler(['a', 'b'], [0, 0])
+
+
+def test_label_manager_pending_and_dangling():
+    labels = LabelManager(rng=random.Random(0))
+    first = labels.reference(0, reuse_probability=0.0)
+    second = labels.reference(1, reuse_probability=0.0)
+    third = labels.reference(2, reuse_probability=0.0)
+    assert [first, second, third] == ["label_0", "label_1", "label_2"]
+    assert labels.define(second) == "label_1:"
+    assert labels.dangling() == [first, third]
+    assert labels.dangling() == []
+
+
+def test_label_manager_reuses_recent_labels():
+    labels = LabelManager(window=4, rng=random.Random(0))
+    for position in range(10):
+        labels.reference(position, reuse_probability=0.0)
+    assert sorted(labels.recent) == ["label_6", "label_7", "label_8", "label_9"]
+    reused = {labels.reference(10, reuse_probability=1.0) for _ in range(50)}
+    assert reused <= set(labels.recent)
+    assert labels.counter == 10
+
+
+def test_label_manager_schedules_forward_targets():
+    labels = LabelManager(distance=(3, 5), rng=random.Random(5))
+    targets = [labels.reference(0, reuse_probability=0.0) for _ in range(8)]
+    placed = {}
+    for position in range(1, 10):
+        for label in labels.due(position):
+            placed[label] = position
+            labels.define(label)
+    assert set(placed) == set(targets)
+    assert all(3 <= position <= 5 for position in placed.values())
+    assert labels.dangling() == []
+
+
+def test_label_manager_skips_labels_defined_early():
+    labels = LabelManager(distance=(2, 2), rng=random.Random(0))
+    label = labels.reference(0, reuse_probability=0.0)
+    labels.define(label)
+    assert labels.due(2) == []
+
+
+def test_weighted_sampler_stream_does_not_depend_on_numpy(monkeypatch):
+    import generate_asm
+
+    def draws():
+        return WeightedSampler(['a', 'b', 'c'], [1, 2, 3], random.Random(9)).sample_batch(1000)
+
+    expected = draws()
+
+    class Unusable:
+        def __getattr__(self, name):
+            raise AssertionError("NumPy used without use_numpy")
+
+    monkeypatch.setattr(generate_asm, "np", Unusable())
+    assert draws() == expected
+    monkeypatch.setattr(generate_asm, "np", None)
+    assert draws() == expected
+    with pytest.raises(RuntimeError):
+        WeightedSampler(['a'], [1], random.Random(9), use_numpy=True)
+
+
+def test_generate_program_stats_file_next_to_output(tmp_path):
+    # A ".s" inside a directory name must not be mistaken for the extension
+    output = str(tmp_path / "runs.smoke" / "prog.s")
+    os.makedirs(os.path.dirname(output))
+    options = {
+        'num_instructions': 50, 'distribution': None, 'cv_weight': 0.0, 'branch_taken_rate': 0.5,
+        'misaligned_rate': 0.0, 'label_distance': None, 'buffer_size': -1, 'stats': True,
+        'hex': False, 'bin': False, 'base_address': 0x180, 'numpy': False,
+    }
+    entry = generate_program(output, 1, options)
+    assert entry['stats_file'] == str(tmp_path / "runs.smoke" / "prog_stats.json")
+    assert os.path.exists(entry['stats_file'])
@@ -0,0 +1,193 @@
+"""
+Tests of the run_sim.py helpers and of a regression on the fake tool backend
+"""
+
+import json
+import os
+
+import pytest
+
+from run_sim import (CompressedLog, first_message, failure_signature, load_log_index, open_log,
+                     sweep_points, sweep_values, zstandard)
+
+
+def test_sweep_values():
+    assert sweep_values([10, 20, 30]) == [10, 20, 30]
+    assert sweep_values({'range': [1, 4]}) == [1, 2, 3, 4]
+    assert sweep_values({'range': [0, 10, 4]}) == [0, 4, 8]
+    assert sweep_values({'range': [4, 1, -1]}) == [4, 3, 2, 1]
+    assert sweep_values({'range': [0.0, 0.3, 0.1]}) == [0.0, 0.1, 0.2, 0.3]
+    assert sweep_values({'range': [5, 1]}) == []
+    assert sweep_values(7) == [7]
+    with pytest.raises(ValueError):
+        sweep_values({'range': [0, 4, 0]})
+
+
+def test_sweep_points_cartesian():
+    points = list(sweep_points({'depth': [1, 2], 'num_transactions': [10, 20, 30]}))
+    assert len(points) == 6
+    # Last axis varies fastest, keys keep the axis order
+    assert points[:3] == [{'depth': 1, 'num_transactions': n} for n in (10, 20, 30)]
+    assert points[3] == {'depth': 2, 'num_transactions': 10}
+    assert [list(point) for point in points] == [['depth', 'num_transactions']] * 6
+
+
+def test_sweep_points_sample():
+    axes = {'a': list(range(100)), 'b': list(range(100))}
+    points = list(sweep_points(axes, "sample", samples=50, seed=3))
+    assert len(points) == 50
+    assert len({(p['a'], p['b']) for p in points}) == 50
+    assert points == list(sweep_points(axes, "sample", samples=50, seed=3))
+    assert points != list(sweep_points(axes, "sample", samples=50, seed=4))
+    # Asking for more samples than points gives the whole product
+    assert len(list(sweep_points({'a': [1, 2]}, "sample", samples=10))) == 2
+
+
+def test_failure_signature_buckets_by_cause():
+    first = failure_signature("UVM_ERROR tb.sv(120) @ 5430 ns: [SCB] mismatch at 0x0000_1f80: got 32'hdeadbeef, exp 17")
+    second = failure_signature("UVM_ERROR tb.sv(120) @ 98 ns: [SCB] mismatch at 0x2000_0004: got 32'h0, exp 3")
+    other = failure_signature("UVM_ERROR tb.sv(120) @ 98 ns: [SCB] timeout at 0x2000_0004")
+    assert first == second
+    assert first != other
+    assert "0x<H>" in first and "'<V>" in first and "@ <T>" in first and "<N>" in first
+
+
+def test_failure_signature_keeps_identifiers():
+    # Digits inside names are part of the name, not a value
+    signature = failure_signature("UVM_FATAL  @ 1ns: x5 != r10   in  stage2")
+    assert signature == "UVM_FATAL @ <T>: x5 != r10 in stage2"
+
+
+def write_log(path, fmt):
+    lines = [f"UVM_INFO cycle {i}\n" for i in range(300)]
+    lines[120] = "UVM_WARNING something odd\n"
+    lines[200] = "UVM_ERROR tb.sv(7) @ 2000 ns: [CHK] mismatch\n"
+    with CompressedLog(path, fmt=fmt, block_size=256) as log:
+        for start in range(0, len(lines), 7):
+            log.write("".join(lines[start:start + 7]))
+    return lines
+
+
+@pytest.mark.parametrize("fmt, ext", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_compressed_log_round_trip(tmp_path, fmt, ext):
+    if fmt == "zstd" and zstandard is None:
+        pytest.skip("zstandard is not installed")
+    path = str(tmp_path / f"sim.log{ext}")
+    lines = write_log(path, fmt)
+
+    index = load_log_index(path)
+    assert index['format'] == fmt
+    assert index['lines'] == len(lines)
+    assert index['bytes'] == len("".join(lines).encode())
+    assert len(index['blocks']) > 1
+    assert index['counts'] == {'UVM_INFO': 298, 'UVM_WARNING': 1, 'UVM_ERROR': 1}
+    assert [m[1:] for m in index['messages']] == [[121, "UVM_WARNING"], [201, "UVM_ERROR"]]
+
+    with open_log(path) as f:
+        assert f.read() == "".join(lines)
+    # Seeking through the index lands on the indexed message
+    offset = index['messages'][1][0]
+    with open_log(path, offset) as f:
+        assert f.readline() == lines[200]
+        assert f.read() == "".join(lines[201:])
+    assert first_message(path) == (201, lines[200].rstrip("\n"))
+
+
+def test_first_message_without_index(tmp_path):
+    path = str(tmp_path / "sim.log.gz")
+    lines = write_log(path, "gzip")
+    os.remove(f"{path}.idx")
+    assert first_message(path) == (201, lines[200].rstrip("\n"))
+    assert first_message(path, ("UVM_FATAL",)) is None
+
+
+def test_tree_merge_grouping(make_runner, monkeypatch):
+    runner = make_runner()
+    merges = []
+
+    async def fake_merge(databases, dbname, report=True):
+        merges.append((list(databases), dbname, report))
+        return True
+
+    monkeypatch.setattr(runner, "run_urg_merge_async", fake_merge)
+    databases = [f"db{i}.vdb" for i in range(10)]
+    assert runner.tree_merge(databases, "merged", {'group_size': 4, 'fan_in': 2, 'work_dir': "tmp_merge"})
+
+    level0 = [os.path.join("tmp_merge", f"level0_group{i}.vdb") for i in range(3)]
+    level1 = os.path.join("tmp_merge", "level1_group0.vdb")
+    assert merges == [
+        (databases[0:4], level0[0], False),
+        (databases[4:8], level0[1], False),
+        (databases[8:10], level0[2], False),
+        (level0[:2], level1, False),
+        # The odd group of level 1 is carried up without a merge
+        ([level1, level0[2]], "merged", True),
+    ]
+    assert not os.path.exists("tmp_merge")
+
+
+def test_tree_merge_stops_on_failure(make_runner, monkeypatch):
+    runner = make_runner()
+    merges = []
+
+    async def fake_merge(databases, dbname, report=True):
+        merges.append(dbname)
+        return dbname != os.path.join("tmp_merge", "level0_group1.vdb")
+
+    monkeypatch.setattr(runner, "run_urg_merge_async", fake_merge)
+    databases = [f"db{i}.vdb" for i in range(6)]
+    assert not runner.tree_merge(databases, "merged", {'group_size': 2, 'fan_in': 2, 'work_dir': "tmp_merge"})
+    assert "merged" not in merges
+
+
+def test_fake_backend_regression(make_runner, fake_config):
+    fake_config['regression']['base_seed'] = 7
+    runner = make_runner()
+    tests = ["cv32e40p_shift_test", "cv32e40p_arithmetic_test"]
+    assert runner.run_multiple_tests(tests, True, 4, num_seeds=3)
+
+    with open(os.path.join("runs", "results.json"), 'r') as f:
+        results = json.load(f)
+    assert len(results) == 6
+    assert all(r['passed'] for r in results)
+    assert {r['test'] for r in results} == set(tests)
+    assert len({r['seed'] for r in results}) == 3
+    for r in results:
+        assert os.path.exists(r['log_file'])
+    assert len(runner.coverage_databases) == 6
+    assert os.path.isdir("merged_coverage")
+
+
+def test_fake_backend_keeps_process_environment(make_runner):
+    before = dict(os.environ)
+    runner = make_runner()
+    assert runner.backend.name == "fake"
+    assert dict(os.environ) == before
+    assert "RUN_SIM_FAKE_CONFIG" in runner.backend.child_env()
+
+
+def test_fake_backend_config_reaches_the_tools(make_runner, fake_config):
+    # Every job fails, which only happens if the tools see this runner's config
+    fake_config['tools']['fake']['fatal_rate'] = 1.0
+    fake_config['triage']['enabled'] = False
+    runner = make_runner()
+    assert not runner.run_multiple_tests(["cv32e40p_shift_test"], True, 2, num_seeds=2)
+    with open(os.path.join("runs", "results.json"), 'r') as f:
+        results = json.load(f)
+    assert results and all(r['fatals'] for r in results)
+
+
+def test_multi_test_run_compiles_once_by_default(make_runner):
+    runner = make_runner()
+    assert runner.run_multiple_tests(["cv32e40p_shift_test", "cv32e40p_arithmetic_test"], True, 2)
+    assert os.path.exists("simv")
+    assert not os.path.exists("images")
+
+
+def test_image_pool_builds_an_image_per_define_set(make_runner, fake_config):
+    fake_config['build']['image_pool']['enabled'] = True
+    runner = make_runner()
+    tests = ["cv32e40p_shift_test", "cv32e40p_arithmetic_test"]
+    assert runner.run_multiple_tests(tests, True, 2)
+    assert sorted(os.listdir("images")) == sorted(os.path.basename(runner.image_dir(t)) for t in tests)
+    assert not os.path.exists("simv")